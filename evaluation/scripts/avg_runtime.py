@@ -1,17 +1,19 @@
 # Import Statements
 from matplotlib import pyplot as plt
 import numpy as np
-import sys
+import argparse
 import os
 
 # Custom utility functions
 from utils.utils import *
-
-# Argument Parsing
-# Check if an argument is provided and use it if available
-data_path = '../../measurements/merged_measurements_3.csv'
-if len(sys.argv) == 2:
-    data_path = sys.argv[1]
+from utils.datasets import DatasetGraph
+from utils.labels import map_labels
+from utils.report import run_figure_jobs, write_latex_entries
+from utils.rendering import save_figure
+from utils.streaming import DEFAULT_CHUNKSIZE, RunningMean, iter_build_chunks, read_measurement_chunks
+from utils.aggregates import AggregateStore, get_store_path
+from utils.profiling import DEFAULT_TRACE_PATH, enable_profiling, stage
+from utils.artifacts import configure_artifact_cache
 
 # Variable Definition
 label_key = 'label'
@@ -24,92 +26,44 @@ tables_dir = '../tables'
 os.makedirs(diagrams_dir, exist_ok=True)
 os.makedirs(tables_dir, exist_ok=True)
 
-def filtering_static_tc(data):
-    test_approaches_to_include = [1, 2, 3, 4]
-    data = data[(data['test_case'] != -1)]
-    # exclude tests prior to refactoring (prior build 140)
-    data = filter_data_sets_by_build(data, min_build_value=140)
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    return data
-
-def filtering_dynamic_combined_tc(data):
-    test_approaches_to_include = [5, 6]
-    data = data[(data['test_case'] != -1)]
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    # Filter out rows where runtime is greater than 60 seconds
-    # to only show raw dynamic test cases without deploy/destroy overhead
-    data = data[data['runtime(seconds)'] <= 60]
-    return data
-
-def filtering_dynamic_standalone_tc(data):
-    test_approaches_to_include = [5, 6]
-    # Filter for data sets including tc14
-    data = without_incomplete_data_sets(data, 14)
-    data = flatten_multi_tc_apply_destroy_cycles(data)
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    # Filter out rows where runtime is less than 60 seconds
-    # to exclude raw dynamic test cases without deploy/destroy overhead
-    data = data[data['runtime(seconds)'] > 60]
-    return data
-
-def filtering_deploy_destroy_phases(data):
-    # Cover the same build range as filtering_dynamic_standalone_tc
-    data = without_incomplete_data_sets(data, 14)
-    data = data[data['test_tool'].isin(['terraform apply', 'terraform destroy'])]
-    return data
-
-def filtering_static_stages(data):
-    test_approaches_to_include = [1, 2, 3, 4]
-    # Filter out rows with 'NA' in 'runtime(seconds)'
-    data = data[(data['runtime(seconds)'].notna())]
-    # exclude tests prior to refactoring (prior build 140)
-    data = filter_data_sets_by_build(data, min_build_value=140)
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    return data
-
-def filtering_dynamic_stages(data):
-    test_approaches_to_include = [5, 6]
-    data = without_incomplete_data_sets(data, 14)
-    data = flatten_multi_tc_apply_destroy_cycles(data)
-    # Filter out rows with 'NA' in 'runtime(seconds)'
-    data = data[(data['runtime(seconds)'].notna())]
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    return data
-
 def tc_data_processing(data):
     # Calculating Average Runtimes
     data = data.groupby(['test_case', 'test_approach'])['runtime(seconds)'].mean().reset_index()
-    # Sorting the results first by 'test_approach' and then by 'test_case'
-    data.sort_values(by=['test_approach', 'test_case'], inplace=True)
-    data['label'] = data.apply(lambda row: format_test_case_label(row['test_case'], row['test_approach']), axis=1)
-    return data
+    return tc_label_processing(data)
 
 def tc_costs_data_processing(data):
     # Calculating Average Costs
     data = data.groupby(['test_case', 'test_approach']).agg({runtime_key: 'mean', costs_key: 'mean'}).reset_index()
+    return tc_label_processing(data)
+
+def tc_label_processing(data):
     # Sorting the results first by 'test_approach' and then by 'test_case'
-    data.sort_values(by=['test_approach', 'test_case'], inplace=True)
-    data['label'] = data.apply(lambda row: format_test_case_label(row['test_case'], row['test_approach']), axis=1)
+    data = data.sort_values(by=['test_approach', 'test_case'])
+    data['label'] = map_labels(data, ['test_case', 'test_approach'], format_test_case_label)
     return data
 
 def deploy_phases_data_processing(data):
     # Calculating Average Runtimes
     data = data.groupby(['test_tool'])['runtime(seconds)'].mean().reset_index()
-    data['label'] = data.apply(lambda row: format_deploy_phase_label(row['test_tool']), axis=1)
+    return deploy_phases_label_processing(data)
+
+def deploy_phases_label_processing(data):
+    data['label'] = map_labels(data, ['test_tool'], format_deploy_phase_label)
     return data
 
-def stage_data_processing(data):
+def stage_build_sums(data):
     # Get overall stage runtimes: group by 'build', 'test_tool', and 'test_approach' and sum the runtimes
-    data = data.groupby(['build','test_approach', 'test_tool'])['runtime(seconds)'].sum().reset_index()
+    return data.groupby(['build','test_approach', 'test_tool'])['runtime(seconds)'].sum().reset_index()
+
+def stage_data_processing(data):
+    data = stage_build_sums(data)
     # Get average stage runtimes: group by 'test_tool' and 'test_approach' and calculate the average of these sums
     data = data.groupby(['test_approach', 'test_tool'])['runtime(seconds)'].mean().reset_index()
+    return stage_label_processing(data)
+
+def stage_label_processing(data):
     # Create a combined label for test tool and test approach
-    data['label'] = data['test_tool'] + " (TA" + data['test_approach'].astype(str) + ")"
+    data['label'] = map_labels(data, ['test_tool', 'test_approach'], format_stage_label)
     return data
 
 def generate_bar_plot(data, plot_title, xkey, xlabel, ykey, ylabel, output_path):
@@ -122,8 +76,7 @@ def generate_bar_plot(data, plot_title, xkey, xlabel, ykey, ylabel, output_path)
     plt.title(plot_title)
     plt.yscale('log')
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    save_figure(output_path)
 
 def generate_double_bar_plot(data, plot_title, xkey, xlabel, ykey, ylabel, y2key, y2label, output_path):
     # Define the width of the bars
@@ -151,8 +104,7 @@ def generate_double_bar_plot(data, plot_title, xkey, xlabel, ykey, ylabel, y2key
     plt.title(plot_title)
     fig.tight_layout()
     # Saving the figure
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    save_figure(output_path)
 
 def generate_bar_plots(title, data_sets, title_postfixes, xkey, xlabels, ykey, ylabel, output_path):
     num_plots = len(data_sets)
@@ -197,140 +149,319 @@ def generate_bar_plots(title, data_sets, title_postfixes, xkey, xlabels, ykey, y
             ax.axhline(y=10, color='red', linestyle='--')  # Add a 10-second marker line if max is greater than 10
 
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.show()
-
-
-# Data Loading, Filtering and Processing
-data = read_csv_to_dataframe(data_path)
-
-dynamic_combined_tc_data = filtering_dynamic_combined_tc(data)
-dynamic_standalone_tc_data = filtering_dynamic_standalone_tc(data)
-static_tc_data = filtering_static_tc(data)
-phases_data = deploy_phases_data_processing(filtering_deploy_destroy_phases(data))
-tc_runtime_data = tc_data_processing(pd.concat([
-    filtering_static_tc(data), 
-    dynamic_combined_tc_data, 
-    dynamic_standalone_tc_data
-]))
-
-tc_runtime_data_extended = pd.concat([
-    tc_runtime_data, 
-    deploy_phases_data_processing(filtering_deploy_destroy_phases(data))
-])
-
-tc_cost_data = tc_costs_data_processing(pd.concat([ 
-    dynamic_combined_tc_data, 
-    dynamic_standalone_tc_data
-]))
-
-stage_runtime_data = stage_data_processing(pd.concat([
-    filtering_static_stages(data), 
-    filtering_dynamic_stages(data)
-]))
-
-plots_info = [
-    {
-        "data": stage_runtime_data,
-        "label_prefix": 'stage_',
-        "caption": 'Average Test Stage Runtime',
-        "xlabel": 'Test Tool and Approach',
-        "ylabel": 'Average Runtime (Seconds, Log Scale)',
-        "type": "bar",
-        "digits": 2
-    },
-    {
-        "data": tc_cost_data,
-        "label_prefix": 'tc_cost_',
-        "caption": 'Average Runtime and Costs per Dynamic Test Case',
-        "xlabel": 'Test Case and Approach',
-        "ylabel": 'Average Runtime (Seconds)',
-        "y2label": 'Average Costs (USD)',
-        "type": "double_bar",
-        "digits": 2
-    },
-    {
-        "data": tc_runtime_data_extended,
-        "label_prefix": 'tc_',
-        "caption": 'Average Test Case Runtime',
-        "xlabel": 'Test Case and Approach',
-        "ylabel": 'Average Runtime (Seconds, Log Scale)',
-        "type": "bar",
-        "digits": 2
+    save_figure(output_path)
+
+
+def report_data(datasets):
+    """
+    Calculates the averages shown by this script from the data sets.
+
+    :param datasets: The DatasetGraph of the measurements.
+    :return: A dictionary of processed pandas DataFrames, see stream_report_data.
+    """
+    dynamic_combined_tc_data = datasets['dynamic_combined_tc']
+    dynamic_standalone_tc_data = datasets['dynamic_standalone_tc']
+    static_tc_data = datasets['static_tc']
+    return {
+        'phases': deploy_phases_data_processing(datasets['deploy_destroy_phases']),
+        'tc_runtime': tc_data_processing(pd.concat([
+            static_tc_data, 
+            dynamic_combined_tc_data, 
+            dynamic_standalone_tc_data
+        ])),
+        'tc_cost': tc_costs_data_processing(pd.concat([ 
+            dynamic_combined_tc_data, 
+            dynamic_standalone_tc_data
+        ])),
+        'stage_runtime': stage_data_processing(pd.concat([
+            datasets['static_stages'], 
+            datasets['dynamic_stages']
+        ])),
+        'static_tc': tc_data_processing(static_tc_data),
+        'dynamic_combined_tc': tc_data_processing(dynamic_combined_tc_data),
+        'dynamic_standalone_tc': tc_data_processing(dynamic_standalone_tc_data)
     }
-]
-
-filename = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
-
-# Iterate over the data structure and generate plots
-for plot_info in plots_info:
-    output_path = os.path.join(diagrams_dir, plot_info["label_prefix"] + filename + '.png')
-    if plot_info["type"] == "bar":
-        generate_bar_plot(
-            plot_info["data"],
-            plot_info["caption"],
-            xkey=label_key,
-            xlabel=plot_info["xlabel"],
-            ykey=runtime_key,
-            ylabel=plot_info["ylabel"],
-            output_path=output_path
-        )
-        header_key_pairs=[
-            (plot_info["xlabel"], label_key),
-            (plot_info["ylabel"], runtime_key)
-        ]
-    elif plot_info["type"] == "double_bar":
-        generate_double_bar_plot(
-            plot_info["data"],
-            plot_info["caption"],
-            xkey=label_key,
-            xlabel=plot_info["xlabel"],
-            ykey=runtime_key,
-            ylabel=plot_info["ylabel"],
-            y2key=costs_key,
-            y2label=plot_info["y2label"],
-            output_path=output_path
-        )
-        header_key_pairs=[
-            (plot_info["xlabel"], label_key),
-            (plot_info["ylabel"], runtime_key),
-            (plot_info["y2label"], costs_key)
-        ]
-    # Create LaTeX table and figure boilerplate
-    latex_label = plot_info["label_prefix"] + filename
-    write_latex(plot_info["caption"], latex_label)
-    write_latex(
-        caption=plot_info["caption"],
-        label=latex_label,
-        data=plot_info["data"],
-        header_key_pairs=header_key_pairs,
-        digits=plot_info["digits"]
-    )
-
-generate_bar_plots(
-    title="",
-    data_sets=[
-        tc_data_processing(static_tc_data),
-        tc_data_processing(dynamic_combined_tc_data), 
-        pd.concat([
-            tc_data_processing(dynamic_standalone_tc_data),
-            phases_data
-        ])
-    ],
-    title_postfixes=[
-        "Static Test Cases",
-        "Dynamic TC - Net Runtime",
-        "Standalone Dynamic TC and Phases",
-        "Deploy and Destroy Phases"
-    ],    
-    xkey=label_key,
-    xlabels=[
-        "Test Case and Approach",
-        "Test Case and Approach",
-        "Test Case and Approach",
-        "Deployment Phase"
-    ],
-    ykey=runtime_key,
-    ylabel="Average Runtime (Seconds)",
-    output_path=os.path.join(diagrams_dir, filename + '.png')
-)
\ No newline at end of file
+
+def stream_report_data(data_path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Calculates the same averages as report_data, reading the measurements in chunks.
+    Only sums and counts per group are kept between chunks, so peak memory is bounded
+    by the chunk size instead of the length of the measurement history.
+    Chunks are aligned to build boundaries, so apply-destroy cycles are never split.
+
+    :param data_path: Path to the merged measurements CSV or Parquet file.
+    :param chunksize: Number of rows read per chunk.
+    :return: A dictionary of processed pandas DataFrames with the keys 'phases', 'tc_runtime', 'tc_cost',
+             'stage_runtime', 'static_tc', 'dynamic_combined_tc' and 'dynamic_standalone_tc'.
+    """
+    tc_keys = ['test_case', 'test_approach']
+    means = {
+        'phases': RunningMean(['test_tool'], [runtime_key]),
+        'tc_runtime': RunningMean(tc_keys, [runtime_key]),
+        'tc_cost': RunningMean(tc_keys, [runtime_key, costs_key]),
+        'stage_runtime': RunningMean(['test_approach', 'test_tool'], [runtime_key]),
+        'static_tc': RunningMean(tc_keys, [runtime_key]),
+        'dynamic_combined_tc': RunningMean(tc_keys, [runtime_key]),
+        'dynamic_standalone_tc': RunningMean(tc_keys, [runtime_key])
+    }
+    for chunk in iter_build_chunks(read_measurement_chunks(data_path, chunksize)):
+        datasets = DatasetGraph(chunk)
+        means['phases'].add(datasets['deploy_destroy_phases'])
+        for name in ['static_tc', 'dynamic_combined_tc', 'dynamic_standalone_tc']:
+            means[name].add(datasets[name])
+            means['tc_runtime'].add(datasets[name])
+        for name in ['dynamic_combined_tc', 'dynamic_standalone_tc']:
+            means['tc_cost'].add(datasets[name])
+        # Per build sums are complete, as a build is never split across chunks
+        means['stage_runtime'].add(stage_build_sums(pd.concat([
+            datasets['static_stages'],
+            datasets['dynamic_stages']
+        ])))
+
+    return {
+        'phases': deploy_phases_label_processing(means['phases'].result()),
+        'tc_runtime': tc_label_processing(means['tc_runtime'].result()),
+        'tc_cost': tc_label_processing(means['tc_cost'].result()),
+        'stage_runtime': stage_label_processing(means['stage_runtime'].result()),
+        'static_tc': tc_label_processing(means['static_tc'].result()),
+        'dynamic_combined_tc': tc_label_processing(means['dynamic_combined_tc'].result()),
+        'dynamic_standalone_tc': tc_label_processing(means['dynamic_standalone_tc'].result())
+    }
+
+# Aggregates of the persisted store, static and dynamic data are kept apart
+# so builds can be removed from the static aggregates only (build-140 cut-off)
+tc_keys = ['test_case', 'test_approach']
+stage_keys = ['test_approach', 'test_tool']
+AGGREGATES = {
+    'phases': {'dataset': lambda datasets: datasets['deploy_destroy_phases'],
+               'keys': ['test_tool'], 'value': runtime_key},
+    'static_tc': {'dataset': lambda datasets: datasets['static_tc'],
+                  'keys': tc_keys, 'value': runtime_key},
+    'dynamic_combined_tc': {'dataset': lambda datasets: datasets['dynamic_combined_tc'],
+                            'keys': tc_keys, 'value': runtime_key},
+    'dynamic_standalone_tc': {'dataset': lambda datasets: datasets['dynamic_standalone_tc'],
+                              'keys': tc_keys, 'value': runtime_key},
+    'dynamic_combined_tc_costs': {'dataset': lambda datasets: datasets['dynamic_combined_tc'],
+                                  'keys': tc_keys, 'value': costs_key},
+    'dynamic_standalone_tc_costs': {'dataset': lambda datasets: datasets['dynamic_standalone_tc'],
+                                    'keys': tc_keys, 'value': costs_key},
+    'static_stages': {'dataset': lambda datasets: stage_build_sums(datasets['static_stages']),
+                      'keys': stage_keys, 'value': runtime_key},
+    'dynamic_stages': {'dataset': lambda datasets: stage_build_sums(datasets['dynamic_stages']),
+                       'keys': stage_keys, 'value': runtime_key}
+}
+
+def store_means(store, names, value_key=runtime_key):
+    # Mean per key over the given aggregates, in the format of groupby(keys)[value_key].mean().reset_index()
+    summary = store.summary(names)
+    keys = AGGREGATES[names[0]]['keys']
+    return summary[keys].assign(**{value_key: summary['mean'].astype(float)})
+
+def store_report_data(store):
+    """
+    Calculates the same averages as report_data from a persisted AggregateStore.
+
+    :param store: The AggregateStore with the aggregates of AGGREGATES.
+    :return: A dictionary of processed pandas DataFrames, see stream_report_data.
+    """
+    dynamic_tc = ['dynamic_combined_tc', 'dynamic_standalone_tc']
+    tc_cost = store_means(store, dynamic_tc).merge(
+        store_means(store, [name + '_costs' for name in dynamic_tc], costs_key), on=tc_keys, how='outer')
+    return {
+        'phases': deploy_phases_label_processing(store_means(store, ['phases'])),
+        'tc_runtime': tc_label_processing(store_means(store, ['static_tc'] + dynamic_tc)),
+        'tc_cost': tc_label_processing(tc_cost),
+        'stage_runtime': stage_label_processing(store_means(store, ['static_stages', 'dynamic_stages'])),
+        'static_tc': tc_label_processing(store_means(store, ['static_tc'])),
+        'dynamic_combined_tc': tc_label_processing(store_means(store, ['dynamic_combined_tc'])),
+        'dynamic_standalone_tc': tc_label_processing(store_means(store, ['dynamic_standalone_tc']))
+    }
+
+def incremental_report_data(data_path):
+    """
+    Calculates the same averages as report_data from the persisted aggregate store next to the
+    measurements file, after adding the builds merged since the last run.
+    Only the new builds are read and processed, unless the file was rewritten.
+
+    :param data_path: Path to the merged measurements CSV file.
+    :return: A dictionary of processed pandas DataFrames, see stream_report_data.
+    """
+    store = AggregateStore.load(get_store_path(data_path), AGGREGATES)
+    store.refresh(data_path)
+    store.save()
+    return store_report_data(store)
+
+def collect_report(datasets, filename):
+    """
+    Processes the data sets and collects all figures and LaTeX entries of this script.
+
+    :param datasets: The DatasetGraph of the measurements.
+    :param filename: The base name for figure files and LaTeX labels.
+    :return: A tuple (figure_jobs, latex_entries). Figure jobs are (function, kwargs) tuples,
+             LaTeX entries are kwargs for write_latex, both in the order of the original script.
+    """
+    return collect_report_from_data(report_data(datasets), filename)
+
+def collect_report_from_data(data, filename):
+    """
+    Collects all figures and LaTeX entries of this script from already processed data.
+
+    :param data: A dictionary of processed data as returned by report_data or stream_report_data.
+    :param filename: The base name for figure files and LaTeX labels.
+    :return: A tuple (figure_jobs, latex_entries), see collect_report.
+    """
+    phases_data = data['phases']
+    tc_runtime_data_extended = pd.concat([
+        data['tc_runtime'], 
+        phases_data
+    ])
+    tc_cost_data = data['tc_cost']
+    stage_runtime_data = data['stage_runtime']
+
+    plots_info = [
+        {
+            "data": stage_runtime_data,
+            "label_prefix": 'stage_',
+            "caption": 'Average Test Stage Runtime',
+            "xlabel": 'Test Tool and Approach',
+            "ylabel": 'Average Runtime (Seconds, Log Scale)',
+            "type": "bar",
+            "digits": 2
+        },
+        {
+            "data": tc_cost_data,
+            "label_prefix": 'tc_cost_',
+            "caption": 'Average Runtime and Costs per Dynamic Test Case',
+            "xlabel": 'Test Case and Approach',
+            "ylabel": 'Average Runtime (Seconds)',
+            "y2label": 'Average Costs (USD)',
+            "type": "double_bar",
+            "digits": 2
+        },
+        {
+            "data": tc_runtime_data_extended,
+            "label_prefix": 'tc_',
+            "caption": 'Average Test Case Runtime',
+            "xlabel": 'Test Case and Approach',
+            "ylabel": 'Average Runtime (Seconds, Log Scale)',
+            "type": "bar",
+            "digits": 2
+        }
+    ]
+
+    figure_jobs = []
+    latex_entries = []
+
+    # Iterate over the data structure and collect plots
+    for plot_info in plots_info:
+        output_path = os.path.join(diagrams_dir, plot_info["label_prefix"] + filename + '.png')
+        if plot_info["type"] == "bar":
+            figure_jobs.append((generate_bar_plot, dict(
+                data=plot_info["data"],
+                plot_title=plot_info["caption"],
+                xkey=label_key,
+                xlabel=plot_info["xlabel"],
+                ykey=runtime_key,
+                ylabel=plot_info["ylabel"],
+                output_path=output_path
+            )))
+            header_key_pairs=[
+                (plot_info["xlabel"], label_key),
+                (plot_info["ylabel"], runtime_key)
+            ]
+        elif plot_info["type"] == "double_bar":
+            figure_jobs.append((generate_double_bar_plot, dict(
+                data=plot_info["data"],
+                plot_title=plot_info["caption"],
+                xkey=label_key,
+                xlabel=plot_info["xlabel"],
+                ykey=runtime_key,
+                ylabel=plot_info["ylabel"],
+                y2key=costs_key,
+                y2label=plot_info["y2label"],
+                output_path=output_path
+            )))
+            header_key_pairs=[
+                (plot_info["xlabel"], label_key),
+                (plot_info["ylabel"], runtime_key),
+                (plot_info["y2label"], costs_key)
+            ]
+        # Create LaTeX table and figure boilerplate
+        latex_label = plot_info["label_prefix"] + filename
+        latex_entries.append(dict(caption=plot_info["caption"], label=latex_label))
+        latex_entries.append(dict(
+            caption=plot_info["caption"],
+            label=latex_label,
+            data=plot_info["data"],
+            header_key_pairs=header_key_pairs,
+            digits=plot_info["digits"]
+        ))
+
+    figure_jobs.append((generate_bar_plots, dict(
+        title="",
+        data_sets=[
+            data['static_tc'],
+            data['dynamic_combined_tc'], 
+            pd.concat([
+                data['dynamic_standalone_tc'],
+                phases_data
+            ])
+        ],
+        title_postfixes=[
+            "Static Test Cases",
+            "Dynamic TC - Net Runtime",
+            "Standalone Dynamic TC and Phases",
+            "Deploy and Destroy Phases"
+        ],    
+        xkey=label_key,
+        xlabels=[
+            "Test Case and Approach",
+            "Test Case and Approach",
+            "Test Case and Approach",
+            "Deployment Phase"
+        ],
+        ykey=runtime_key,
+        ylabel="Average Runtime (Seconds)",
+        output_path=os.path.join(diagrams_dir, filename + '.png')
+    )))
+
+    return figure_jobs, latex_entries
+
+
+if __name__ == '__main__':
+    # Argument Parsing
+    parser = argparse.ArgumentParser(description='Generates the average runtime figures and LaTeX entries.')
+    parser.add_argument('data_path', nargs='?', default='../../measurements/merged_measurements_3.csv',
+                        help='Path to the merged measurements CSV file (or Parquet file in streaming mode).')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='If set, streams the measurements in chunks of this many rows '
+                             'instead of loading them at once, for very large histories.')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Updates the persisted aggregates next to the CSV file with the newly merged builds '
+                             'and calculates the averages from them, instead of reading the whole history.')
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_PATH, default=None, metavar='TRACE',
+                        help=f"Records wall time, calls, rows and peak memory per stage, writes them as JSON trace "
+                             f"(default: {DEFAULT_TRACE_PATH}) and prints a summary at exit. "
+                             f"Also enabled by the environment variable EVAL_PROFILE.")
+    parser.add_argument('--force-rebuild', action='store_true',
+                        help='Renders all figures and LaTeX entries, even if their inputs are unchanged '
+                             'since the last run. Also enabled by the environment variable EVAL_FORCE_REBUILD.')
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling(args.profile)
+    if args.force_rebuild:
+        configure_artifact_cache(force=True)
+
+    filename = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
+    with stage('collect_report'):
+        if args.incremental:
+            figure_jobs, latex_entries = collect_report_from_data(incremental_report_data(args.data_path), filename)
+        elif args.chunksize:
+            figure_jobs, latex_entries = collect_report_from_data(
+                stream_report_data(args.data_path, args.chunksize), filename)
+        else:
+            # Data Loading
+            data = read_csv_to_dataframe(args.data_path)
+            figure_jobs, latex_entries = collect_report(DatasetGraph(data), filename)
+    run_figure_jobs(figure_jobs, workers=1)
+    write_latex_entries(latex_entries)
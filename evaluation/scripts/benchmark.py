@@ -0,0 +1,237 @@
+# Import Statements
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Custom utility functions
+from utils.utils import (read_csv_to_dataframe, without_incomplete_data_sets, flatten_multi_tc_apply_destroy_cycles,
+                         generate_summary_table, append_to_file)
+from utils.cache import get_cache_paths
+from utils.costs import COST_BREAKDOWN_FILE_PATH
+from utils.synthetic import write_measurements
+
+# Variable Definition
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_BASELINE = '../benchmarks/baseline.json'
+# Relative slowdown (or memory growth) compared to the baseline reported as regression
+DEFAULT_TOLERANCE = 0.25
+# Measurements below these limits are too noisy to be compared with the baseline
+MIN_COMPARED_SECONDS = 0.05
+MIN_COMPARED_MB = 1
+SCRIPTS = ['avg_runtime.py', 'runtime_distribution.py', 'cost_distribution.py']
+OUTPUT_FILE = '../output.tex'
+SUMMARY_HEADER_KEY_PAIRS = [("", 'label'), ('Runtime (Seconds)', 'runtime(seconds)')]
+
+
+def measure(func, setup, repeat=3):
+    """
+    Measures the wall time and peak memory of a function.
+
+    :param func: The function to measure.
+    :param setup: A function returning the argument tuple of a call, called before every call, not measured.
+    :param repeat: Number of timed calls, the fastest is reported.
+    :return: A dictionary with the keys 'seconds' and 'peak_mb'. The peak memory is traced
+             in an additional call, as tracing slows down the function.
+    """
+    # Warm-up call, e.g. for lazily loaded modules and cached cost rates
+    func(*setup())
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    args = setup()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(times), 'peak_mb': peak / 2 ** 20}
+
+
+def benchmark_functions(data_path, work_dir, repeat=3):
+    """
+    Measures the utils functions whose cost grows with the measurement history.
+
+    :param data_path: Path to the measurements CSV file.
+    :param work_dir: Directory for files written by the benchmarks.
+    :param repeat: Number of timed calls per function.
+    :return: A dictionary of function name -> measurement, see measure.
+    """
+    data = read_csv_to_dataframe(data_path, use_cache=False)
+    complete_data = without_incomplete_data_sets(data)
+    labeled_data = complete_data.assign(
+        label='TC' + complete_data['test_case'].astype(str) + ' (TA' + complete_data['test_approach'].astype(str) + ')')
+    table = generate_summary_table(labeled_data, SUMMARY_HEADER_KEY_PAIRS, 'Benchmark', 'benchmark')
+
+    def latex_file():
+        # A copy of the current LaTeX output, to which the table is appended
+        path = os.path.join(work_dir, 'output.tex')
+        if os.path.exists(OUTPUT_FILE):
+            shutil.copyfile(OUTPUT_FILE, path)
+        elif os.path.exists(path):
+            os.remove(path)
+        return path, 'benchmark', table
+
+    benchmarks = {
+        'read_csv_to_dataframe': (read_csv_to_dataframe, lambda: (data_path, False)),
+        'without_incomplete_data_sets': (without_incomplete_data_sets, lambda: (data,)),
+        'flatten_multi_tc_apply_destroy_cycles': (flatten_multi_tc_apply_destroy_cycles, lambda: (complete_data,)),
+        'generate_summary_table': (generate_summary_table,
+                                   lambda: (labeled_data, SUMMARY_HEADER_KEY_PAIRS, 'Benchmark', 'benchmark')),
+        'append_to_file': (append_to_file, latex_file)
+    }
+    results = {}
+    for name, (func, setup) in benchmarks.items():
+        results[name] = measure(func, setup, repeat)
+        print(f"  {name}: {format_measurement(results[name])}")
+    return results
+
+
+def benchmark_scripts(data_path, work_dir):
+    """
+    Measures the wall time and peak RSS of the evaluation scripts, each in its own process
+    with a cold Feather cache. Outputs are written to the work directory.
+
+    :param data_path: Absolute path to the measurements CSV file.
+    :param work_dir: Directory containing 'evaluation/scripts' as working directory of the scripts
+                     and the cost breakdown file in 'measurements'.
+    :return: A dictionary of script name -> measurement, see measure.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    cwd = os.path.join(work_dir, 'evaluation', 'scripts')
+    results = {}
+    for script in SCRIPTS:
+        for cache_path in get_cache_paths(data_path):
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+        start = time.perf_counter()
+        # Figures and LaTeX entries are always rendered, not reused from the artifact cache
+        process = subprocess.Popen([sys.executable, os.path.join(script_dir, script), data_path], cwd=cwd,
+                                   env={**os.environ, 'MPLBACKEND': 'Agg', 'EVAL_ARTIFACT_CACHE': '0'},
+                                   stdout=subprocess.DEVNULL)
+        # Resource usage of this child only, getrusage would report the maximum of all children
+        _, status, usage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+        if os.waitstatus_to_exitcode(status) != 0:
+            raise RuntimeError(f"{script} failed with exit code {os.waitstatus_to_exitcode(status)}")
+        # ru_maxrss is given in kilobytes on Linux and in bytes on macOS
+        peak = usage.ru_maxrss / 2 ** 20 if sys.platform == 'darwin' else usage.ru_maxrss / 2 ** 10
+        results[script] = {'seconds': seconds, 'peak_mb': peak}
+        print(f"  {script}: {format_measurement(results[script])}")
+    return results
+
+
+def prepare_work_dir(work_dir):
+    """
+    Creates the directory layout expected by the scripts, with relative paths as in the repository.
+    """
+    os.makedirs(os.path.join(work_dir, 'evaluation', 'scripts'), exist_ok=True)
+    breakdown_path = os.path.join(work_dir, 'evaluation', 'scripts', COST_BREAKDOWN_FILE_PATH)
+    os.makedirs(os.path.dirname(breakdown_path), exist_ok=True)
+    shutil.copyfile(COST_BREAKDOWN_FILE_PATH, breakdown_path)
+    return os.path.dirname(os.path.normpath(breakdown_path))
+
+
+def format_measurement(measurement):
+    return f"{measurement['seconds']:.3f} s, {measurement['peak_mb']:.1f} MB"
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    Compares benchmark results with a baseline.
+
+    :param results: The results, size -> group ('functions', 'scripts') -> name -> measurement.
+    :param baseline: The baseline results in the same format.
+    :param tolerance: Relative increase of time or memory reported as regression.
+    :return: A pandas DataFrame with one row per measurement found in both, and a 'regression' column.
+    """
+    rows = []
+    for size, groups in results.items():
+        for group, measurements in groups.items():
+            for name, measurement in measurements.items():
+                reference = baseline.get(size, {}).get(group, {}).get(name)
+                if reference is None:
+                    continue
+                time_ratio = measurement['seconds'] / reference['seconds'] if reference['seconds'] else float('nan')
+                memory_ratio = measurement['peak_mb'] / reference['peak_mb'] if reference['peak_mb'] else float('nan')
+                regression = ((reference['seconds'] >= MIN_COMPARED_SECONDS and time_ratio > 1 + tolerance)
+                              or (reference['peak_mb'] >= MIN_COMPARED_MB and memory_ratio > 1 + tolerance))
+                rows.append({'rows': size, 'name': name, 'seconds': measurement['seconds'],
+                             'time_ratio': time_ratio, 'peak_mb': measurement['peak_mb'],
+                             'memory_ratio': memory_ratio, 'regression': regression})
+    return pd.DataFrame(rows, columns=['rows', 'name', 'seconds', 'time_ratio', 'peak_mb', 'memory_ratio',
+                                       'regression'])
+
+
+if __name__ == '__main__':
+    # Argument Parsing
+    parser = argparse.ArgumentParser(
+        description='Benchmarks the analysis code on synthetic measurements of growing size '
+                    'and compares the results with a stored baseline.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f"Numbers of measurement rows to generate, e.g. 1000 to 10000000. Default: {DEFAULT_SIZES}.")
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic measurements.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed calls per function, the fastest counts.')
+    parser.add_argument('--no-scripts', action='store_true', help='Only benchmarks the utils functions.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help=f"Baseline file. Default: {DEFAULT_BASELINE}.")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Stores the results as new baseline instead of comparing with it.')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Relative increase of time or memory reported as regression. Default: {DEFAULT_TOLERANCE}.")
+    parser.add_argument('--keep', action='store_true', help='Keeps the generated measurements and outputs.')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='benchmark_')
+    results = {}
+    try:
+        data_dir = prepare_work_dir(work_dir)
+        for size in args.sizes:
+            data_path = os.path.join(data_dir, f"synthetic_measurements_{size}.csv")
+            rows = write_measurements(data_path, size, args.seed)
+            print(f"{rows} rows:")
+            results[str(size)] = {'functions': benchmark_functions(data_path, work_dir, args.repeat)}
+            if not args.no_scripts:
+                results[str(size)]['scripts'] = benchmark_scripts(data_path, work_dir)
+    finally:
+        if args.keep:
+            print(f"Generated files kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        baseline = {
+            'environment': {
+                'python': platform.python_version(),
+                'pandas': pd.__version__,
+                'machine': platform.machine(),
+                'processor': platform.processor(),
+                'seed': args.seed
+            },
+            'results': results
+        }
+        with open(args.baseline, 'w') as file:
+            json.dump(baseline, file, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+        comparison = compare_with_baseline(results, baseline['results'], args.tolerance)
+        print(comparison.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+        if comparison['regression'].any():
+            print(f"Regressions of more than {args.tolerance:.0%} compared to {args.baseline}")
+            sys.exit(1)
+    else:
+        print(f"No baseline found at {args.baseline}, store one with --save-baseline")
@@ -0,0 +1,79 @@
+# Import Statements
+import argparse
+import os
+
+# Custom utility functions
+from utils.utils import read_csv_to_dataframe, format_test_case_label
+from utils.datasets import DatasetGraph
+from utils.labels import map_labels
+from utils.attribution import ATTRIBUTION_LEVELS, attribute_costs, attribution_table, rollup_attribution
+from utils.profiling import DEFAULT_TRACE_PATH, enable_profiling, stage
+
+# Variable Definition
+label_key = 'label'
+default_output_path = '../tables/cost_attribution.feather'
+default_rollup_path = '../tables/cost_attribution_rollup.csv'
+
+
+def collect_attribution(datasets, level='resource'):
+    """
+    Breaks the costs of the dynamic test cases down per cost component and rolls them up per test case.
+
+    :param datasets: The DatasetGraph of the measurements.
+    :param level: Optional; the level of the roll-up, one of ATTRIBUTION_LEVELS (default is 'resource').
+    :return: A tuple (table, rollup): the attributed costs of every dynamic test case entry and component,
+             see attribution_table, and the average costs per test case, test approach and resource.
+    """
+    # Cycles are priced with their 'terraform apply' and 'terraform destroy' entries
+    data = datasets['flattened_cycles_with_originals']
+    attribution = attribute_costs(data)
+    # Only the entries of the dynamic test cases are kept
+    positions = data.index.get_indexer(datasets['dynamic_tc'].index)
+    attribution = attribution[attribution['entry'].isin(positions)]
+
+    table = attribution_table(data, attribution)
+    rollup = rollup_attribution(data, attribution, level=level).reset_index()
+    rollup.insert(0, label_key, map_labels(rollup, ['test_case', 'test_approach'], format_test_case_label))
+    return table, rollup
+
+
+if __name__ == '__main__':
+    # Argument Parsing
+    parser = argparse.ArgumentParser(
+        description='Breaks the cloud provider costs of the dynamic test cases down per resource and cost component '
+                    'of the infracost breakdown.')
+    parser.add_argument('data_path', nargs='?', default='../../measurements/merged_measurements_3.csv',
+                        help='Path to the merged measurements CSV file.')
+    parser.add_argument('--level', choices=ATTRIBUTION_LEVELS, default='resource',
+                        help='Level of the roll-up per test case. Default: resource.')
+    parser.add_argument('--output', default=default_output_path,
+                        help=f"Feather (or CSV) file for the costs of every test case entry and cost component. "
+                             f"Default: {default_output_path}.")
+    parser.add_argument('--rollup', default=default_rollup_path,
+                        help=f"CSV file for the average costs per test case and resource. Default: {default_rollup_path}.")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_PATH, default=None, metavar='TRACE',
+                        help=f"Records wall time, calls, rows and peak memory per stage, writes them as JSON trace "
+                             f"(default: {DEFAULT_TRACE_PATH}) and prints a summary at exit. "
+                             f"Also enabled by the environment variable EVAL_PROFILE.")
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling(args.profile)
+
+    # Data Loading
+    data = read_csv_to_dataframe(args.data_path)
+    with stage('collect_attribution'):
+        table, rollup = collect_attribution(DatasetGraph(data), args.level)
+
+    for path in [args.output, args.rollup]:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if args.output.endswith('.csv'):
+        table.to_csv(args.output, index=False)
+    else:
+        table.to_feather(args.output)
+    rollup.to_csv(args.rollup, index=False)
+    print(f"Costs of {len(table)} test case entries and cost components written to {args.output}")
+    print(f"Average costs per test case and {args.level} written to {args.rollup}")
+
+    # Resources driving the costs of all dynamic test cases, highest first
+    shares = rollup.drop(columns=[label_key, 'test_case', 'test_approach', 'total']).sum() / rollup['total'].sum()
+    print(shares.head(10).to_string(float_format=lambda value: f"{value:.1%}"))
@@ -1,16 +1,18 @@
 # Import Statements
 from matplotlib import pyplot as plt
-import sys
+import argparse
 import os
 
 # Custom utility functions
 from utils.utils import *
-
-# Argument Parsing
-# Check if an argument is provided and use it if available
-data_path = '../../measurements/merged_measurements_3.csv'
-if len(sys.argv) == 2:
-    data_path = sys.argv[1]
+from utils.datasets import DatasetGraph
+from utils.labels import map_labels
+from utils.report import run_figure_jobs, write_latex_entries
+from utils.rendering import save_figure
+from utils.sketches import DEFAULT_SKETCH_SIZE, grouped_sketches, sketch_statistics
+from utils.streaming import iter_build_chunks, read_measurement_chunks
+from utils.profiling import DEFAULT_TRACE_PATH, enable_profiling, stage
+from utils.artifacts import configure_artifact_cache
 
 # Variable Definition
 xkey = 'test_case'
@@ -24,24 +26,15 @@ plot_title = 'Test Case Cloud Provider Costs Distribution'
 diagrams_dir = '../diagrams'
 os.makedirs(diagrams_dir, exist_ok=True)
 
-def filtering_dynamic_tc(data):
-    test_approaches_to_include = [5, 6]
-    # Filter for data sets including tc14
-    data = without_incomplete_data_sets(data, 14)
-    data = flatten_multi_tc_apply_destroy_cycles(data, delete_originals=False)
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    # Filter out deploy/destroy entries
-    data = data[(data['test_case'] != -1)]
-    return data
-
 def tc_data_processing(data):
     # Sorting the results first by 'test_approach' and then by 'test_case'
-    data['label'] = data.apply(lambda row: short_test_case_label(row['test_case']), axis=1)
+    data = data.copy()
+    data['label'] = map_labels(data, ['test_case'], short_test_case_label)
     data.sort_values(by=[xkey], inplace=True)
     return data
 
-def generate_box_whisker_plots(title, data_sets, title_postfixes, xkey, xlabel, ykey, ylabel, output_path):
+def generate_box_whisker_plots(title, data_sets, title_postfixes, xkey, xlabel, ykey, ylabel, output_path,
+                               sketched=False):
     num_plots = len(data_sets)
     # Determine the number of rows and columns for the subplots
     if num_plots == 2:
@@ -51,12 +44,14 @@ def generate_box_whisker_plots(title, data_sets, title_postfixes, xkey, xlabel,
     plt.figure(figsize=(7 * cols, 6 * rows))
     for i in range(num_plots):
         plt.subplot(1, num_plots, i + 1)
-        generate_single_box_whisker_plot(data_sets[i], xkey, xlabel, ykey, ylabel)
+        if sketched:
+            generate_single_box_whisker_plot_from_sketches(data_sets[i], xlabel, ylabel)
+        else:
+            generate_single_box_whisker_plot(data_sets[i], xkey, xlabel, ykey, ylabel)
         postfix = title_postfixes[i] if i < len(title_postfixes) else ""
         plt.title(title + " " + postfix)
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    save_figure(output_path)
 
 def generate_single_box_whisker_plot(data, xkey, xlabel, ykey, ylabel):
     unique_keys = data[xkey].unique()
@@ -68,33 +63,157 @@ def generate_single_box_whisker_plot(data, xkey, xlabel, ykey, ylabel):
     plt.xlabel(xlabel)
     plt.xticks(range(1, len(unique_keys) + 1), unique_keys)
 
-# Data Loading, Filtering and Processing
-data = read_csv_to_dataframe(data_path)
-tc_data = tc_data_processing(filtering_dynamic_tc(data))
-tc_data_net = tc_data[tc_data['test_case'].isin([4, 7, 9])]
-tc_data_complete = tc_data[~tc_data['test_case'].isin([4, 7, 9])]
-filename = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
-output_path = os.path.join(diagrams_dir, filename + '.png')
-
-generate_box_whisker_plots(
-    title=plot_title,
-    data_sets=[tc_data_net, tc_data_complete],
-    title_postfixes=[" (Multiple TC in One Cycle)", " (Complete Cycle)"],
-    xkey=label_key,
-    xlabel=xlabel,
-    ykey=ykey,
-    ylabel=ylabel,
-    output_path=output_path
-)
-write_latex(
-    caption=plot_title,
-    label=filename,
-    data=tc_data,
-    header_key_pairs=[
-        ("", label_key),
-        (ylabel, ykey)
-    ],
-    digits=5,
-    summary_table=True
-)
-write_latex(caption=plot_title, label=filename)
\ No newline at end of file
+def generate_single_box_whisker_plot_from_sketches(sketches, xlabel, ylabel):
+    # Render the boxes from precomputed statistics instead of raw samples
+    plt.gca().bxp([sketch.box_statistics() for sketch in sketches.values()])
+    plt.ylabel(ylabel)
+    plt.xlabel(xlabel)
+    plt.xticks(range(1, len(sketches) + 1), list(sketches))
+
+def tc_sketches(data, sketch_size=DEFAULT_SKETCH_SIZE, sketches=None):
+    # Sketch the costs per test case, labels are derived from the test case afterwards
+    return grouped_sketches(data, xkey, ykey, sketch_size, sketches)
+
+def stream_tc_sketches(data_path, chunksize, sketch_size=DEFAULT_SKETCH_SIZE):
+    """
+    Sketches the costs per test case, reading the measurements in chunks aligned to build boundaries.
+    Only the sketches are kept between chunks, not the samples.
+
+    :param data_path: Path to the merged measurements CSV or Parquet file.
+    :param chunksize: Number of rows read per chunk.
+    :param sketch_size: Size parameter k of the quantile sketches.
+    :return: A dictionary of test case -> QuantileSketch.
+    """
+    sketches = {}
+    for chunk in iter_build_chunks(read_measurement_chunks(data_path, chunksize)):
+        tc_sketches(DatasetGraph(chunk)['dynamic_tc'], sketch_size, sketches)
+    return sketches
+
+def collect_report(datasets, filename):
+    """
+    Processes the data sets and collects all figures and LaTeX entries of this script.
+
+    :param datasets: The DatasetGraph of the measurements.
+    :param filename: The base name for figure files and LaTeX labels.
+    :return: A tuple (figure_jobs, latex_entries). Figure jobs are (function, kwargs) tuples,
+             LaTeX entries are kwargs for write_latex, both in the order of the original script.
+    """
+    # Data Filtering and Processing
+    tc_data = tc_data_processing(datasets['dynamic_tc'])
+    tc_data_net = tc_data[tc_data['test_case'].isin([4, 7, 9])]
+    tc_data_complete = tc_data[~tc_data['test_case'].isin([4, 7, 9])]
+    output_path = os.path.join(diagrams_dir, filename + '.png')
+
+    figure_jobs = [(generate_box_whisker_plots, dict(
+        title=plot_title,
+        data_sets=[tc_data_net, tc_data_complete],
+        title_postfixes=[" (Multiple TC in One Cycle)", " (Complete Cycle)"],
+        xkey=label_key,
+        xlabel=xlabel,
+        ykey=ykey,
+        ylabel=ylabel,
+        output_path=output_path
+    ))]
+    latex_entries = [
+        dict(
+            caption=plot_title,
+            label=filename,
+            data=tc_data,
+            header_key_pairs=[
+                ("", label_key),
+                (ylabel, ykey)
+            ],
+            digits=5,
+            summary_table=True
+        ),
+        dict(caption=plot_title, label=filename)
+    ]
+
+    return figure_jobs, latex_entries
+
+def collect_report_from_sketches(sketches, filename):
+    """
+    Collects the figures and LaTeX entries of this script from quantile sketches of the costs,
+    with box plots rendered from the sketch statistics and estimated quartiles in the summary table.
+
+    :param sketches: A dictionary of test case -> QuantileSketch, e.g. from stream_tc_sketches.
+    :param filename: The base name for figure files and LaTeX labels.
+    :return: A tuple (figure_jobs, latex_entries), see collect_report.
+    """
+    # Order and label the test cases as tc_data_processing does
+    test_cases = sorted(sketches)
+    tc_sketches_net = {short_test_case_label(tc): sketches[tc] for tc in test_cases if tc in [4, 7, 9]}
+    tc_sketches_complete = {short_test_case_label(tc): sketches[tc] for tc in test_cases if tc not in [4, 7, 9]}
+    output_path = os.path.join(diagrams_dir, filename + '.png')
+
+    figure_jobs = [(generate_box_whisker_plots, dict(
+        title=plot_title,
+        data_sets=[tc_sketches_net, tc_sketches_complete],
+        title_postfixes=[" (Multiple TC in One Cycle)", " (Complete Cycle)"],
+        xkey=label_key,
+        xlabel=xlabel,
+        ykey=ykey,
+        ylabel=ylabel,
+        output_path=output_path,
+        sketched=True
+    ))]
+    latex_entries = [
+        dict(
+            caption=plot_title,
+            label=filename,
+            summary=sketch_statistics({short_test_case_label(tc): sketches[tc] for tc in test_cases}, label_key),
+            header_key_pairs=[
+                ("", label_key),
+                (ylabel, ykey)
+            ],
+            digits=5,
+            summary_table=True
+        ),
+        dict(caption=plot_title, label=filename)
+    ]
+
+    return figure_jobs, latex_entries
+
+
+if __name__ == '__main__':
+    # Argument Parsing
+    parser = argparse.ArgumentParser(description='Generates the cost distribution figures and LaTeX entries.')
+    parser.add_argument('data_path', nargs='?', default='../../measurements/merged_measurements_3.csv',
+                        help='Path to the merged measurements CSV file (or Parquet file in streaming mode).')
+    parser.add_argument('--sketch', action='store_true',
+                        help='Summarizes the costs with mergeable quantile sketches instead of all samples. '
+                             'Quartiles are estimated, see utils/sketches.py for the error bound.')
+    parser.add_argument('--sketch-size', type=int, default=DEFAULT_SKETCH_SIZE,
+                        help='Size parameter k of the quantile sketches, larger values give smaller errors.')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='In sketch mode, streams the measurements in chunks of this many rows '
+                             'instead of loading them at once.')
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_PATH, default=None, metavar='TRACE',
+                        help=f"Records wall time, calls, rows and peak memory per stage, writes them as JSON trace "
+                             f"(default: {DEFAULT_TRACE_PATH}) and prints a summary at exit. "
+                             f"Also enabled by the environment variable EVAL_PROFILE.")
+    parser.add_argument('--force-rebuild', action='store_true',
+                        help='Renders all figures and LaTeX entries, even if their inputs are unchanged '
+                             'since the last run. Also enabled by the environment variable EVAL_FORCE_REBUILD.')
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling(args.profile)
+    if args.force_rebuild:
+        configure_artifact_cache(force=True)
+
+    filename = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
+    with stage('collect_report'):
+        if args.sketch and args.chunksize:
+            figure_jobs, latex_entries = collect_report_from_sketches(
+                stream_tc_sketches(args.data_path, args.chunksize, args.sketch_size), filename)
+        elif args.sketch:
+            # Data Loading
+            data = read_csv_to_dataframe(args.data_path)
+            figure_jobs, latex_entries = collect_report_from_sketches(
+                tc_sketches(DatasetGraph(data)['dynamic_tc'], args.sketch_size), filename)
+        else:
+            # Data Loading
+            data = read_csv_to_dataframe(args.data_path)
+            figure_jobs, latex_entries = collect_report(DatasetGraph(data), filename)
+    run_figure_jobs(figure_jobs, workers=1)
+    write_latex_entries(latex_entries)
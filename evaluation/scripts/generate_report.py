@@ -0,0 +1,63 @@
+# Import Statements
+import argparse
+import os
+
+# Custom utility functions
+from utils.utils import read_csv_to_dataframe
+from utils.datasets import DatasetGraph
+from utils.report import run_figure_jobs, write_latex_entries
+from utils.rendering import FIGURE_FORMATS, RENDER_CONFIG, configure_rendering
+from utils.profiling import DEFAULT_TRACE_PATH, enable_profiling, stage
+from utils.artifacts import configure_artifact_cache
+
+# Evaluation scripts, in the order their LaTeX entries are written
+import avg_runtime
+import runtime_distribution
+import cost_distribution
+
+REPORT_SCRIPTS = [avg_runtime, runtime_distribution, cost_distribution]
+
+# Argument Parsing
+parser = argparse.ArgumentParser(
+    description='Generates the figures and LaTeX entries of all evaluation scripts in one run.')
+parser.add_argument('data_path', nargs='?', default='../../measurements/merged_measurements_3.csv',
+                    help='Path to the merged measurements CSV file.')
+parser.add_argument('--workers', type=int, default=None,
+                    help='Number of processes rendering figures. Default: number of CPU cores.')
+parser.add_argument('--dpi', type=int, default=None,
+                    help=f"Resolution of raster figures. Default: {RENDER_CONFIG['dpi']}.")
+parser.add_argument('--format', choices=FIGURE_FORMATS, default=None,
+                    help=f"Output format of figures. Default: {RENDER_CONFIG['format']}.")
+parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_PATH, default=None, metavar='TRACE',
+                    help=f"Records wall time, calls, rows and peak memory per stage, writes them as JSON trace "
+                         f"(default: {DEFAULT_TRACE_PATH}) and prints a summary at exit. "
+                         f"Also enabled by the environment variable EVAL_PROFILE.")
+parser.add_argument('--force-rebuild', action='store_true',
+                    help='Renders all figures and LaTeX entries, even if their inputs are unchanged '
+                         'since the last run. Also enabled by the environment variable EVAL_FORCE_REBUILD.')
+args = parser.parse_args()
+if args.profile:
+    enable_profiling(args.profile)
+if args.force_rebuild:
+    configure_artifact_cache(force=True)
+
+# The report is always rendered headless
+configure_rendering(headless=True, dpi=args.dpi, figure_format=args.format)
+
+# Data Loading, shared by all scripts
+data = read_csv_to_dataframe(args.data_path)
+datasets = DatasetGraph(data)
+
+# Collect figures and LaTeX entries of all scripts
+figure_jobs = []
+latex_entries = []
+for script in REPORT_SCRIPTS:
+    filename = os.path.splitext(os.path.basename(script.__file__))[0]
+    with stage(f"collect_report:{filename}"):
+        script_figure_jobs, script_latex_entries = script.collect_report(datasets, filename)
+    figure_jobs.extend(script_figure_jobs)
+    latex_entries.extend(script_latex_entries)
+
+# Render figures in parallel, LaTeX entries are written sequentially to keep their order
+run_figure_jobs(figure_jobs, workers=args.workers)
+write_latex_entries(latex_entries)
@@ -0,0 +1,81 @@
+# Import Statements
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Custom utility functions
+from utils.utils import read_csv_to_dataframe, short_test_case_label
+from utils.datasets import DatasetGraph
+from utils.labels import map_labels
+from utils.pricing import load_scenarios, price_scenarios
+from utils.profiling import DEFAULT_TRACE_PATH, enable_profiling, stage
+from utils.statistics import grouped_statistics
+
+# Variable Definition
+ykey = 'costs(USD)'
+label_key = 'label'
+scenario_key = 'scenario'
+default_output_path = '../tables/pricing_scenarios.csv'
+
+
+def scenario_summary(datasets, scenarios):
+    """
+    Prices the dynamic test cases in every scenario and summarizes their costs per test case,
+    with the statistics of the cost_distribution.py summary table.
+
+    :param datasets: The DatasetGraph of the measurements.
+    :param scenarios: A list of pricing scenarios, see utils/pricing.py.
+    :return: A tuple (summary, rows). The summary is a pandas DataFrame with one row per scenario and test case,
+             the rows are the dynamic test cases with one row per scenario and entry.
+    """
+    costs = price_scenarios(datasets['flattened_cycles_with_originals'], scenarios)
+    tc_data = datasets['dynamic_tc']
+    tc_data = tc_data.assign(label=map_labels(tc_data, ['test_case'], short_test_case_label))
+    # One row per scenario and entry, scenario by scenario
+    tc_costs = costs.loc[tc_data.index]
+    rows = pd.DataFrame({
+        scenario_key: pd.Categorical(tc_costs.columns.repeat(len(tc_data)), categories=tc_costs.columns),
+        **{column: np.tile(tc_data[column].to_numpy(), len(tc_costs.columns))
+           for column in ['build', 'test_case', 'test_approach', 'test_tool', 'runtime(seconds)', label_key]},
+        ykey: tc_costs.to_numpy().ravel(order='F')
+    })
+    summary = grouped_statistics(rows, [scenario_key, label_key], ykey)
+    return summary.reset_index(), rows
+
+
+if __name__ == '__main__':
+    # Argument Parsing
+    parser = argparse.ArgumentParser(
+        description='Prices all apply-destroy cycles and dynamic test cases in a set of pricing scenarios '
+                    '(regions, discounts, instance substitutions) based on the infracost breakdown.')
+    parser.add_argument('scenarios_path',
+                        help='JSON file with a list of "scenarios" and/or a "grid" of "regions", "discounts" and '
+                             '"substitutions", see utils/pricing.py.')
+    parser.add_argument('data_path', nargs='?', default='../../measurements/merged_measurements_3.csv',
+                        help='Path to the merged measurements CSV file.')
+    parser.add_argument('--output', default=default_output_path,
+                        help=f"CSV file for the cost statistics per scenario and test case. Default: {default_output_path}.")
+    parser.add_argument('--rows', default=None,
+                        help='Optional CSV file for the costs of every dynamic test case entry per scenario.')
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_PATH, default=None, metavar='TRACE',
+                        help=f"Records wall time, calls, rows and peak memory per stage, writes them as JSON trace "
+                             f"(default: {DEFAULT_TRACE_PATH}) and prints a summary at exit. "
+                             f"Also enabled by the environment variable EVAL_PROFILE.")
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling(args.profile)
+
+    # Data Loading
+    scenarios = load_scenarios(args.scenarios_path)
+    data = read_csv_to_dataframe(args.data_path)
+    with stage('scenario_summary'):
+        summary, rows = scenario_summary(DatasetGraph(data), scenarios)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    summary.to_csv(args.output, index=False)
+    print(f"Cost statistics of {len(scenarios)} scenarios written to {args.output}")
+    if args.rows:
+        rows.to_csv(args.rows, index=False)
+        print(f"Costs of {len(rows)} entries written to {args.rows}")
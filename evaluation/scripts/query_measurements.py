@@ -0,0 +1,146 @@
+# Import Statements
+import argparse
+import json
+import shlex
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Custom utility functions
+from utils.query import QUERY_HELP, QueryService, parse_query, timed_query
+from utils.profiling import DEFAULT_TRACE_PATH, enable_profiling
+
+# Variable Definition
+default_host = '127.0.0.1'
+default_port = 8765
+
+
+def format_result(result, matches, milliseconds):
+    """
+    Formats a query result as text for the command line.
+
+    :param result: The pandas DataFrame returned by QueryService.query.
+    :param matches: The number of matching rows.
+    :param milliseconds: The wall time of the query.
+    :return: The result table followed by the number of matches and the wall time.
+    """
+    table = result.to_string(index=False) if len(result) else '(no rows)'
+    return f"{table}\n-- {matches} matching rows, {milliseconds:.1f} ms"
+
+
+def run_repl(service):
+    """
+    Reads queries from the command line until 'quit' or end of input.
+
+    :param service: The QueryService.
+    """
+    print("Type a query, 'scopes', 'help' or 'quit'.")
+    while True:
+        try:
+            line = input('query> ').strip()
+        except EOFError:
+            print()
+            break
+        if not line:
+            continue
+        if line in ('quit', 'exit'):
+            break
+        if line == 'help':
+            print(QUERY_HELP)
+            continue
+        if line == 'scopes':
+            print('\n'.join(service.scope_names()))
+            continue
+        try:
+            print(format_result(*timed_query(service, parse_query(shlex.split(line)))))
+        except (ValueError, KeyError) as e:
+            print(f"Error: {e}")
+
+
+def make_handler(service):
+    """
+    Creates the request handler of the query server:
+      GET /query?<key>=<value>&...   Answers a query, see QUERY_HELP, as JSON.
+      GET /scopes                    Lists the datasets that can be queried.
+
+    :param service: The QueryService.
+    :return: A BaseHTTPRequestHandler subclass.
+    """
+    class QueryHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            content = json.dumps(body, default=str).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == '/scopes':
+                self._send_json(200, {'scopes': service.scope_names()})
+            elif url.path == '/query':
+                try:
+                    query = parse_query(dict(parse_qsl(url.query, keep_blank_values=True)))
+                    result, matches, milliseconds = timed_query(service, query)
+                except (ValueError, KeyError) as e:
+                    self._send_json(400, {'error': str(e)})
+                    return
+                self._send_json(200, {
+                    'matches': matches,
+                    'milliseconds': round(milliseconds, 3),
+                    'columns': list(result.columns),
+                    'rows': json.loads(result.to_json(orient='values'))
+                })
+            else:
+                self._send_json(404, {'error': f"Unknown path '{url.path}', expected /query or /scopes"})
+
+    return QueryHandler
+
+
+if __name__ == '__main__':
+    # Argument Parsing
+    parser = argparse.ArgumentParser(
+        description='Loads the measurements once and answers filter and aggregate queries, '
+                    'interactively, as HTTP server or given as arguments.',
+        epilog=QUERY_HELP, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('data_path', nargs='?', default='../../measurements/merged_measurements_3.csv',
+                        help='Path to the merged measurements CSV file.')
+    parser.add_argument('--query', action='append', default=None, metavar='QUERY',
+                        help="Answers a query, e.g. \"scope=dynamic_tc test_case=9 agg=median\", and exits. "
+                             "Can be given several times.")
+    parser.add_argument('--serve', action='store_true',
+                        help='Answers queries via HTTP (GET /query?scope=dynamic_tc&test_case=9&agg=median) '
+                             'instead of the command line.')
+    parser.add_argument('--host', default=default_host,
+                        help=f"Address the server listens on. Default: {default_host}.")
+    parser.add_argument('--port', type=int, default=default_port,
+                        help=f"Port the server listens on. Default: {default_port}.")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_PATH, default=None, metavar='TRACE',
+                        help=f"Records wall time, calls, rows and peak memory per stage, writes them as JSON trace "
+                             f"(default: {DEFAULT_TRACE_PATH}) and prints a summary at exit. "
+                             f"Also enabled by the environment variable EVAL_PROFILE.")
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling(args.profile)
+
+    # Data Loading, once for all queries
+    service = QueryService(args.data_path)
+
+    if args.query:
+        for query in args.query:
+            try:
+                print(format_result(*timed_query(service, parse_query(shlex.split(query)))))
+            except (ValueError, KeyError) as e:
+                parser.exit(1, f"Error: {e}\n")
+    elif args.serve:
+        # Queries take milliseconds, so they are answered one at a time, without locking the lazily built indexes
+        server = HTTPServer((args.host, args.port), make_handler(service))
+        print(f"Answering queries on http://{args.host}:{args.port}/query, Ctrl+C to stop")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    else:
+        run_repl(service)
@@ -1,18 +1,19 @@
 # Import Statements
 from matplotlib import pyplot as plt
 import pandas as pd
-import sys
+import argparse
 import os
 import seaborn as sns
 
 # Custom utility functions
 from utils.utils import *
-
-# Argument Parsing
-# Check if an argument is provided and use it if available
-data_path = '../../measurements/merged_measurements_3.csv'
-if len(sys.argv) == 2:
-    data_path = sys.argv[1]
+from utils.datasets import DatasetGraph
+from utils.labels import map_labels
+from utils.report import run_figure_jobs, write_latex_entries
+from utils.rendering import save_figure
+from utils.sketches import DEFAULT_SKETCH_SIZE, grouped_sketches, merge_sketches, sketch_statistics
+from utils.profiling import DEFAULT_TRACE_PATH, enable_profiling, stage
+from utils.artifacts import configure_artifact_cache
 
 # Variable Definition
 xkey = 'build'
@@ -29,80 +30,23 @@ tables_dir = '../tables'
 os.makedirs(diagrams_dir, exist_ok=True)
 os.makedirs(tables_dir, exist_ok=True)
 
-def filtering_static_tc(data):
-    test_approaches_to_include = [1, 2, 3, 4]
-    data = data[(data['test_case'] != -1)]
-    # exclude tests prior to refactoring (prior build 140)
-    data = filter_data_sets_by_build(data, min_build_value=140)
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    return data
-
-def filtering_dynamic_combined_tc(data):
-    test_approaches_to_include = [5, 6]
-    data = data[(data['test_case'] != -1)]
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    # Filter out rows where runtime is greater than 60 seconds
-    # to only show raw dynamic test cases without deploy/destroy overhead
-    data = data[data['runtime(seconds)'] <= 60]
-    return data
-
-def filtering_dynamic_standalone_tc(data):
-    test_approaches_to_include = [5, 6]
-    # Filter for data sets including tc14
-    data = without_incomplete_data_sets(data, 14)
-    data = flatten_multi_tc_apply_destroy_cycles(data)
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    # Filter out rows where runtime is less than 60 seconds
-    # to exclude raw dynamic test cases without deploy/destroy overhead
-    data = data[data['runtime(seconds)'] > 60]
-    return data
-
-def filtering_deploy_destroy_phases(data):
-    # Cover the same build range as filtering_dynamic_standalone_tc
-    data = without_incomplete_data_sets(data, 14)
-    data = data[data['test_tool'].isin(['terraform apply', 'terraform destroy'])]
-    return data
-
-def filtering_static_stages(data):
-    test_approaches_to_include = [1, 2, 3, 4]
-    # Filter out rows with 'NA' in 'runtime(seconds)'
-    data = data[(data['runtime(seconds)'].notna())]
-    # exclude tests prior to refactoring (prior build 140)
-    data = filter_data_sets_by_build(data, min_build_value=140)
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    return data
-
-def filtering_dynamic_stages(data):
-    test_approaches_to_include = [5, 6]
-    data = without_incomplete_data_sets(data, 14)
-    data = flatten_multi_tc_apply_destroy_cycles(data)
-    # Filter out rows with 'NA' in 'runtime(seconds)'
-    data = data[(data['runtime(seconds)'].notna())]
-    # Filter for test approaches to include
-    data = data[data['test_approach'].isin(test_approaches_to_include)]
-    return data
-
 def tc_data_processing(data):
     # Sorting the results first by 'test_approach' and then by 'test_case'
-    data.sort_values(by=['test_approach', 'test_case', 'build'], inplace=True)
-    data['label'] = data.apply(lambda row: format_test_case_label(row['test_case'], row['test_approach']), axis=1)
+    data = data.sort_values(by=['test_approach', 'test_case', 'build'])
+    data['label'] = map_labels(data, ['test_case', 'test_approach'], format_test_case_label)
     return data
 
 def deploy_phases_data_processing(data):
     processed_data = data.copy()
     processed_data.sort_values(by=['build'], inplace=True)
-    processed_data['label'] = processed_data.apply(lambda row: format_deploy_phase_label(row['test_tool']), axis=1)
+    processed_data['label'] = map_labels(processed_data, ['test_tool'], format_deploy_phase_label)
     return processed_data
 
 def stage_data_processing(data):
     # Get overall stage runtimes: group by 'build', 'test_tool', and 'test_approach' and sum the runtimes
     data = data.groupby(['build','test_approach', 'test_tool'])['runtime(seconds)'].sum().reset_index()
     # Create a combined label for test tool and test approach
-    data['label'] = data['test_tool'] + " (TA" + data['test_approach'].astype(str) + ")"
+    data['label'] = map_labels(data, ['test_tool', 'test_approach'], format_stage_label)
     return data
 
 def generate_line_plot(data, plot_title, output_path):
@@ -115,21 +59,23 @@ def generate_line_plot(data, plot_title, output_path):
         plt.plot(label_data['build'], label_data['runtime(seconds)'], label=label)
     plt.legend()
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    save_figure(output_path)
 
 def generate_violin_plot(data, plot_title, xlabel, output_path):
     plt.figure(figsize=(12, 6))
-    sns.violinplot(x=legend_key, y=ykey, data=data)
+    ax = sns.violinplot(x=legend_key, y=ykey, data=data)
+    # Rasterize the dense violin bodies to keep vector output small
+    for collection in ax.collections:
+        collection.set_rasterized(True)
     plt.xlabel(xlabel)
     plt.ylabel(ylabel)
     plt.xticks(rotation=45)
     plt.title(plot_title)
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    save_figure(output_path)
 
-def generate_box_whisker_plots(title, data_sets, title_postfixes, xkey, xlabels, ykey, ylabel, output_path):
+def generate_box_whisker_plots(title, data_sets, title_postfixes, xkey, xlabels, ykey, ylabel, output_path,
+                               sketched=False):
     num_plots = len(data_sets)
     # Determine the number of rows and columns for the subplots
     if num_plots == 2:
@@ -142,12 +88,14 @@ def generate_box_whisker_plots(title, data_sets, title_postfixes, xkey, xlabels,
         plt.subplot(rows, cols, index)
         # Select xlabel from list, using the first entry as default if not enough labels are provided
         current_xlabel = xlabels[i] if i < len(xlabels) else xlabels[0]
-        generate_single_box_whisker_plot(data_sets[i], xkey, current_xlabel, ykey, ylabel)        
+        if sketched:
+            generate_single_box_whisker_plot_from_sketches(data_sets[i], current_xlabel, ylabel)
+        else:
+            generate_single_box_whisker_plot(data_sets[i], xkey, current_xlabel, ykey, ylabel)
         postfix = title_postfixes[i] if i < len(title_postfixes) else ""
         plt.title(title + " " + postfix)    
     plt.tight_layout()
-    plt.savefig(output_path, dpi=300, bbox_inches='tight')
-    plt.show()
+    save_figure(output_path)
 
 def generate_single_box_whisker_plot(data, xkey, xlabel, ykey, ylabel):
     unique_keys = data[xkey].unique()
@@ -159,124 +107,200 @@ def generate_single_box_whisker_plot(data, xkey, xlabel, ykey, ylabel):
     plt.xlabel(xlabel)
     plt.xticks(range(1, len(unique_keys) + 1), unique_keys, rotation=45)
 
+def generate_single_box_whisker_plot_from_sketches(sketches, xlabel, ylabel):
+    # Render the boxes from precomputed statistics instead of raw samples
+    plt.gca().bxp([sketch.box_statistics() for sketch in sketches.values()])
+    plt.ylabel(ylabel)
+    plt.xlabel(xlabel)
+    plt.xticks(range(1, len(sketches) + 1), list(sketches), rotation=45)
+
 def create_latex_for_type(plots_info, type_key, plot_title, filename):
+    latex_entries = []
     combined_data = pd.DataFrame()
+    # In sketch mode, the sketches of all data sets are merged instead of the data
+    sketched = all("sketches" in plot_info for plot_info in plots_info)
 
     # Iterate over plots_info to handle both table data combination and figure generation
     for plot_info in plots_info:
         if plot_info["type"] == type_key:
             # Combine data for tables
-            combined_data = pd.concat([combined_data, plot_info["data"]])
+            if not sketched:
+                combined_data = pd.concat([combined_data, plot_info["data"]])
             
             # Create figure for each plot_info
             figure_caption = plot_title + plot_info["caption_suffix"]
             figure_label = plot_info["label_prefix"] + filename
-            write_latex(figure_caption,figure_label)
-            write_latex(figure_caption,figure_label + '_violin')
+            latex_entries.append(dict(caption=figure_caption, label=figure_label))
+            latex_entries.append(dict(caption=figure_caption, label=figure_label + '_violin'))
 
     # Write the LaTeX summary table for the combined data
-    write_latex(
+    table_entry = dict(
         caption=plot_title,
         label=type_key + '_' + filename,
-        data=combined_data,
         header_key_pairs=[
             ("", legend_key),
             (ylabel, ykey)
         ],
         summary_table=True
     )
+    if sketched:
+        table_entry['summary'] = sketch_statistics(merge_sketches(
+            [plot_info["sketches"] for plot_info in plots_info if plot_info["type"] == type_key]), legend_key)
+    else:
+        table_entry['data'] = combined_data
+    latex_entries.append(table_entry)
+    return latex_entries
 
-# Data Loading, Filtering and Processing
-data = read_csv_to_dataframe(data_path)
-static_tc_data = tc_data_processing(filtering_static_tc(data))
-dynamic_combined_tc_data = tc_data_processing(filtering_dynamic_combined_tc(data))
-dynamic_standalone_tc_data = tc_data_processing(filtering_dynamic_standalone_tc(data))
-deploy_destroy_phases_data = deploy_phases_data_processing(filtering_deploy_destroy_phases(data))
-dynamic_standalone_tc_and_phases_data = pd.concat([dynamic_standalone_tc_data, deploy_destroy_phases_data])
-static_stages_data = stage_data_processing(filtering_static_stages(data))
-dynamic_stages_data = stage_data_processing(filtering_dynamic_stages(data))
+def collect_report(datasets, filename, sketch_size=None):
+    """
+    Processes the data sets and collects all figures and LaTeX entries of this script.
 
-plots_info = [
-    {
-        "data": static_tc_data,
-        "label_prefix": 'static_tc_',
-        "caption_suffix": ' (Static)',
-        "violin_xlabel": "Test Case and Approach",
-        "type": "tc"
-    },
-    {
-        "data": dynamic_combined_tc_data,
-        "label_prefix": 'dynamic_combined_tc_',
-        "caption_suffix": ' (Dynamic, Net TC Runtime)',
-        "violin_xlabel": "Test Case and Approach",
-        "type": "tc"
-    },
-    {
-        "data": dynamic_standalone_tc_and_phases_data,
-        "label_prefix": 'dynamic_standalone_tc_',
-        "caption_suffix": ' (Dynamic, Including Deploy/Destroy Phases)',
-        "violin_xlabel": "Test Case and Approach",
-        "type": "tc"
-    },
-    {
-        "data": static_stages_data,
-        "label_prefix": 'static_stage_',
-        "caption_suffix": ' (Static)',
-        "violin_xlabel": "Test Tool and Approach",
-        "type": "stage"
-    },
-    {
-        "data": dynamic_stages_data,
-        "label_prefix": 'dynamic_stage_',
-        "caption_suffix": ' (Dynamic)',
-        "violin_xlabel": "Test Tool and Approach",
-        "type": "stage"
-    }
-]
+    In sketch mode, the summary tables and box plots are calculated from mergeable quantile sketches
+    per label instead of all samples, with estimated quartiles (see utils/sketches.py for the error bound).
+    Line and violin plots are still drawn from the data.
 
-filename = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
+    :param datasets: The DatasetGraph of the measurements.
+    :param filename: The base name for figure files and LaTeX labels.
+    :param sketch_size: Optional; if set, enables sketch mode with this sketch size parameter k.
+    :return: A tuple (figure_jobs, latex_entries). Figure jobs are (function, kwargs) tuples,
+             LaTeX entries are kwargs for write_latex, both in the order of the original script.
+    """
+    # Data Filtering and Processing
+    static_tc_data = tc_data_processing(datasets['static_tc'])
+    dynamic_combined_tc_data = tc_data_processing(datasets['dynamic_combined_tc'])
+    dynamic_standalone_tc_data = tc_data_processing(datasets['dynamic_standalone_tc'])
+    deploy_destroy_phases_data = deploy_phases_data_processing(datasets['deploy_destroy_phases'])
+    dynamic_standalone_tc_and_phases_data = pd.concat([dynamic_standalone_tc_data, deploy_destroy_phases_data])
+    static_stages_data = stage_data_processing(datasets['static_stages'])
+    dynamic_stages_data = stage_data_processing(datasets['dynamic_stages'])
 
-# Iterate over the data structure and generate plots
-for plot_info in plots_info:
-    plot_title = plot_title_tc if plot_info["type"] == "tc" else plot_title_stage
-    generate_line_plot(
-        plot_info["data"],
-        plot_title + plot_info["caption_suffix"],
-        os.path.join(diagrams_dir, plot_info["label_prefix"] + filename + '.png')
-    )
-    generate_violin_plot(
-        plot_info["data"],
-        plot_title + plot_info["caption_suffix"],
-        plot_info["violin_xlabel"],
-        os.path.join(diagrams_dir, plot_info["label_prefix"] + filename + '_violin.png')
-    )
+    plots_info = [
+        {
+            "data": static_tc_data,
+            "label_prefix": 'static_tc_',
+            "caption_suffix": ' (Static)',
+            "violin_xlabel": "Test Case and Approach",
+            "type": "tc"
+        },
+        {
+            "data": dynamic_combined_tc_data,
+            "label_prefix": 'dynamic_combined_tc_',
+            "caption_suffix": ' (Dynamic, Net TC Runtime)',
+            "violin_xlabel": "Test Case and Approach",
+            "type": "tc"
+        },
+        {
+            "data": dynamic_standalone_tc_and_phases_data,
+            "label_prefix": 'dynamic_standalone_tc_',
+            "caption_suffix": ' (Dynamic, Including Deploy/Destroy Phases)',
+            "violin_xlabel": "Test Case and Approach",
+            "type": "tc"
+        },
+        {
+            "data": static_stages_data,
+            "label_prefix": 'static_stage_',
+            "caption_suffix": ' (Static)',
+            "violin_xlabel": "Test Tool and Approach",
+            "type": "stage"
+        },
+        {
+            "data": dynamic_stages_data,
+            "label_prefix": 'dynamic_stage_',
+            "caption_suffix": ' (Dynamic)',
+            "violin_xlabel": "Test Tool and Approach",
+            "type": "stage"
+        }
+    ]
+
+    if sketch_size:
+        for plot_info in plots_info:
+            plot_info["sketches"] = grouped_sketches(plot_info["data"], legend_key, ykey, sketch_size)
+
+    figure_jobs = []
 
-generate_box_whisker_plots(
-    title="Runtime Distribution",
-    data_sets=[
+    # Iterate over the data structure and collect plots
+    for plot_info in plots_info:
+        plot_title = plot_title_tc if plot_info["type"] == "tc" else plot_title_stage
+        figure_jobs.append((generate_line_plot, dict(
+            data=plot_info["data"],
+            plot_title=plot_title + plot_info["caption_suffix"],
+            output_path=os.path.join(diagrams_dir, plot_info["label_prefix"] + filename + '.png')
+        )))
+        figure_jobs.append((generate_violin_plot, dict(
+            data=plot_info["data"],
+            plot_title=plot_title + plot_info["caption_suffix"],
+            xlabel=plot_info["violin_xlabel"],
+            output_path=os.path.join(diagrams_dir, plot_info["label_prefix"] + filename + '_violin.png')
+        )))
+
+    box_plot_data_sets = [
         static_stages_data,
-        static_tc_data, 
+        static_tc_data,
         dynamic_standalone_tc_and_phases_data,
         dynamic_combined_tc_data
-    ],
-    title_postfixes=[
-        " Static Stages",
-        " Static Test Cases",
-        " Dynamic Standalone TC",
-        " Dynamic Combined TC"
-    ],    
-    xkey=legend_key,
-    xlabels=[
-        "Test Tool and Approach",
-        "Test Case and Approach",
-        "Test Case and Approach",
-        "Test Case and Approach"
-    ],
-    ykey=ykey,
-    ylabel=ylabel,
-    output_path=os.path.join(diagrams_dir, filename + '.png')
-)
+    ]
+    if sketch_size:
+        # Reuse the sketches of the summary tables, data sets and sketches are in plots_info
+        sketches_by_prefix = {plot_info["label_prefix"]: plot_info["sketches"] for plot_info in plots_info}
+        box_plot_data_sets = [sketches_by_prefix[prefix] for prefix in
+                              ['static_stage_', 'static_tc_', 'dynamic_standalone_tc_', 'dynamic_combined_tc_']]
+    figure_jobs.append((generate_box_whisker_plots, dict(
+        title="Runtime Distribution",
+        data_sets=box_plot_data_sets,
+        title_postfixes=[
+            " Static Stages",
+            " Static Test Cases",
+            " Dynamic Standalone TC",
+            " Dynamic Combined TC"
+        ],    
+        xkey=legend_key,
+        xlabels=[
+            "Test Tool and Approach",
+            "Test Case and Approach",
+            "Test Case and Approach",
+            "Test Case and Approach"
+        ],
+        ykey=ykey,
+        ylabel=ylabel,
+        output_path=os.path.join(diagrams_dir, filename + '.png'),
+        sketched=bool(sketch_size)
+    )))
+
+    # Create LaTeX tables for each type
+    latex_entries = (create_latex_for_type(plots_info, "tc", plot_title_tc, filename)
+                     + create_latex_for_type(plots_info, "stage", plot_title_stage, filename))
+
+    return figure_jobs, latex_entries
+
+
+if __name__ == '__main__':
+    # Argument Parsing
+    parser = argparse.ArgumentParser(description='Generates the runtime distribution figures and LaTeX entries.')
+    parser.add_argument('data_path', nargs='?', default='../../measurements/merged_measurements_3.csv',
+                        help='Path to the merged measurements CSV file.')
+    parser.add_argument('--sketch', action='store_true',
+                        help='Calculates summary tables and box plots from mergeable quantile sketches '
+                             'instead of all samples. Quartiles are estimated, see utils/sketches.py for the error bound.')
+    parser.add_argument('--sketch-size', type=int, default=DEFAULT_SKETCH_SIZE,
+                        help='Size parameter k of the quantile sketches, larger values give smaller errors.')
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_PATH, default=None, metavar='TRACE',
+                        help=f"Records wall time, calls, rows and peak memory per stage, writes them as JSON trace "
+                             f"(default: {DEFAULT_TRACE_PATH}) and prints a summary at exit. "
+                             f"Also enabled by the environment variable EVAL_PROFILE.")
+    parser.add_argument('--force-rebuild', action='store_true',
+                        help='Renders all figures and LaTeX entries, even if their inputs are unchanged '
+                             'since the last run. Also enabled by the environment variable EVAL_FORCE_REBUILD.')
+    args = parser.parse_args()
+    if args.profile:
+        enable_profiling(args.profile)
+    if args.force_rebuild:
+        configure_artifact_cache(force=True)
 
-# Create LaTeX tables for each type
-create_latex_for_type(plots_info, "tc", plot_title_tc, filename)
-create_latex_for_type(plots_info, "stage", plot_title_stage, filename)
\ No newline at end of file
+    # Data Loading
+    data = read_csv_to_dataframe(args.data_path)
+    filename = os.path.splitext(os.path.basename(os.path.abspath(__file__)))[0]
+    with stage('collect_report'):
+        figure_jobs, latex_entries = collect_report(DatasetGraph(data), filename,
+                                                    sketch_size=args.sketch_size if args.sketch else None)
+    run_figure_jobs(figure_jobs, workers=1)
+    write_latex_entries(latex_entries)
@@ -0,0 +1,336 @@
+import hashlib
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import PYARROW_AVAILABLE
+from .datasets import DatasetGraph
+from .utils import MEASUREMENT_COLUMN_TYPES, normalize_measurement_types
+
+# Key columns of all aggregates, keys not used by an aggregate are set to a placeholder
+KEY_COLUMNS = ['test_case', 'test_approach', 'test_tool']
+KEY_PLACEHOLDERS = {'test_case': -1, 'test_approach': -1, 'test_tool': ''}
+# Statistics kept per build and key, and in total per key
+STAT_COLUMNS = ['count', 'sum', 'sumsq', 'min', 'max']
+PARTIAL_COLUMNS = ['aggregate', 'build'] + KEY_COLUMNS + STAT_COLUMNS
+TOTAL_INDEX = ['aggregate'] + KEY_COLUMNS
+COLUMN_DTYPES = {'aggregate': 'object', 'build': 'int64', 'test_case': 'int64', 'test_approach': 'int64',
+                 'test_tool': 'object', 'count': 'int64', 'sum': 'float64', 'sumsq': 'float64',
+                 'min': 'float64', 'max': 'float64'}
+
+# Extension of the store directory, placed next to the measurements file
+STORE_EXTENSION = '.aggregates'
+# Version 2: test cases of apply-destroy cycles are flagged bitmasks, see MULTI_TEST_CASE_FLAG
+STORE_VERSION = 2
+# Number of bytes before the processed offset of the source file used to detect rewrites
+TAIL_SIZE = 4096
+
+
+def get_store_path(data_path):
+    """
+    Returns the path of the aggregate store directory of a measurements file.
+
+    :param data_path: Path to the merged measurements CSV file.
+    :return: The path of the store directory, located next to the file.
+    """
+    return os.path.splitext(data_path)[0] + STORE_EXTENSION
+
+
+def empty_statistics(columns):
+    """
+    Returns an empty statistics frame with the given columns of PARTIAL_COLUMNS.
+    """
+    return pd.DataFrame({column: pd.Series(dtype=COLUMN_DTYPES[column]) for column in columns})
+
+
+def partial_statistics(data, keys, value_key):
+    """
+    Calculates count, sum, sum of squares, min and max of a value column per build and group.
+    NaN values are skipped.
+
+    :param data: A pandas DataFrame with a 'build' column, the key columns and the value column.
+    :param keys: The key columns of the groups, a subset of KEY_COLUMNS.
+    :param value_key: The column to summarize.
+    :return: A pandas DataFrame with the columns 'build', KEY_COLUMNS and STAT_COLUMNS.
+    """
+    values = data[value_key].astype(float)
+    frame = data[['build'] + list(keys)].assign(value=values, square=values ** 2)
+    grouped = frame.groupby(['build'] + list(keys))
+    stats = grouped['value'].agg(['count', 'sum', 'min', 'max'])
+    stats['sumsq'] = grouped['square'].sum()
+    stats = stats.reset_index()
+    for key in KEY_COLUMNS:
+        if key not in keys:
+            stats[key] = KEY_PLACEHOLDERS[key]
+    return stats[['build'] + KEY_COLUMNS + STAT_COLUMNS]
+
+
+def combine_statistics(stats, by):
+    """
+    Combines statistics of several builds or aggregates per group.
+
+    :param stats: A pandas DataFrame with the columns STAT_COLUMNS and the group columns.
+    :param by: The group columns.
+    :return: A pandas DataFrame indexed by the group columns with the columns STAT_COLUMNS.
+    """
+    return stats.groupby(by).agg(
+        count=('count', 'sum'),
+        sum=('sum', 'sum'),
+        sumsq=('sumsq', 'sum'),
+        min=('min', 'min'),
+        max=('max', 'max')
+    )
+
+
+class AggregateStore:
+    """
+    Persisted count, sum, sum of squares, min and max of runtime and cost columns per aggregate and key,
+    maintained incrementally as builds are merged.
+
+    Each aggregate is defined by a function selecting its rows from the DatasetGraph of new builds,
+    its key columns and its value column:
+
+        {'static_tc': {'dataset': lambda datasets: datasets['static_tc'],
+                       'keys': ['test_case', 'test_approach'], 'value': 'runtime(seconds)'}}
+
+    Besides the totals per key, the statistics of every build are kept, so builds can be removed again,
+    e.g. when a build cut-off changes. As all datasets are derived per build, adding new builds only
+    processes their rows. The partial statistics are stored in append-only segments, so saving after
+    adding builds writes the new segment and the totals only.
+    """
+
+    def __init__(self, aggregates, path=None):
+        """
+        :param aggregates: Dictionary of aggregate name -> definition, see above.
+        :param path: Optional; the store directory used by save.
+        """
+        self.aggregates = aggregates
+        self.path = path
+        self.builds = set()
+        self.totals = empty_statistics(TOTAL_INDEX + STAT_COLUMNS).set_index(TOTAL_INDEX)
+        self.source = None
+        self._segments = []
+        self._new_partials = []
+        self._rewrite = False
+
+    @classmethod
+    def load(cls, path, aggregates):
+        """
+        Loads a store from its directory, or returns an empty store if there is no valid one.
+
+        :param path: The store directory, see get_store_path.
+        :param aggregates: The aggregate definitions, see AggregateStore.
+        :return: The AggregateStore.
+        """
+        store = cls(aggregates, path)
+        if not PYARROW_AVAILABLE:
+            return store
+        try:
+            with open(os.path.join(path, 'meta.json'), 'r') as file:
+                meta = json.load(file)
+            if meta.get('version') != STORE_VERSION or meta.get('aggregates') != sorted(aggregates):
+                return store
+            totals = pd.read_feather(os.path.join(path, 'totals.feather'))
+        except (OSError, ValueError):
+            return store
+        store.builds = set(meta['builds'])
+        store.totals = totals.set_index(TOTAL_INDEX)
+        store.source = meta['source']
+        store._segments = meta['segments']
+        return store
+
+    def _read_partials(self):
+        partials = [pd.read_feather(os.path.join(self.path, segment)) for segment in self._segments]
+        return pd.concat(partials + self._new_partials, ignore_index=True) if partials or self._new_partials \
+            else empty_statistics(PARTIAL_COLUMNS)
+
+    def reset(self):
+        """
+        Removes all builds from the store.
+        """
+        self.builds = set()
+        self.totals = self.totals.iloc[0:0]
+        self.source = None
+        self._new_partials = []
+        self._rewrite = True
+
+    def add(self, data, aggregates=None):
+        """
+        Adds the measurements of builds not contained in the store yet.
+        Rows of builds which are already contained are ignored, so a build has to be added completely.
+
+        If aggregates are given, the builds are added to these aggregates only, whether they are
+        contained or not. This re-adds builds removed from single aggregates, see remove_builds.
+
+        :param data: A pandas DataFrame with the measurements of complete builds.
+        :param aggregates: Optional; the names of the aggregates to add the builds to. Default: all.
+        :return: The number of added builds.
+        """
+        if aggregates is None:
+            data = data[~data['build'].isin(self.builds)]
+        if data.empty:
+            return 0
+        datasets = DatasetGraph(data)
+        partials = []
+        for name in aggregates if aggregates is not None else self.aggregates:
+            aggregate = self.aggregates[name]
+            aggregate_data = aggregate['dataset'](datasets)
+            if not aggregate_data.empty:
+                partials.append(partial_statistics(aggregate_data, aggregate['keys'], aggregate['value'])
+                                .assign(aggregate=name)[PARTIAL_COLUMNS])
+        if partials:
+            partials = pd.concat(partials, ignore_index=True)
+            self._new_partials.append(partials)
+            totals = [self.totals.reset_index()] if not self.totals.empty else []
+            self.totals = combine_statistics(pd.concat(totals + [partials], ignore_index=True), TOTAL_INDEX)
+        new_builds = data['build'].unique()
+        self.builds.update(int(build) for build in new_builds)
+        return len(new_builds)
+
+    def remove_builds(self, builds, aggregates=None):
+        """
+        Removes the statistics of builds, e.g. builds before a new cut-off.
+
+        If only some aggregates are given, the builds stay contained in the store and are re-added
+        with add(data, aggregates). E.g. after lowering the build-140 cut-off of the static datasets,
+        remove the builds from the static aggregates and add them to these aggregates again.
+
+        :param builds: The build numbers to remove.
+        :param aggregates: Optional; the names of the aggregates to remove them from. Default: all.
+        """
+        builds = {int(build) for build in builds}
+        partials = self._read_partials()
+        removed = partials['build'].isin(builds)
+        if aggregates is not None:
+            removed &= partials['aggregate'].isin(aggregates)
+        if removed.any():
+            remaining = partials[~removed]
+            removed_totals = combine_statistics(partials[removed], TOTAL_INDEX)
+            # Counts and sums are subtracted, min and max are recalculated for the affected keys only
+            totals = self.totals.copy()
+            for column in ['count', 'sum', 'sumsq']:
+                totals[column] = totals[column].sub(removed_totals[column], fill_value=0)
+            totals['count'] = totals['count'].astype('int64')
+            affected = remaining.set_index(TOTAL_INDEX).index.isin(removed_totals.index)
+            extremes = remaining[affected].groupby(TOTAL_INDEX).agg(min=('min', 'min'), max=('max', 'max'))
+            totals.loc[removed_totals.index, ['min', 'max']] = np.nan
+            totals.update(extremes)
+            # Drop keys without any remaining build
+            remaining_keys = remaining.set_index(TOTAL_INDEX).index.unique()
+            self.totals = totals[totals.index.isin(remaining_keys)]
+            self._new_partials = [remaining.reset_index(drop=True)]
+            self._rewrite = True
+        if aggregates is None:
+            self.builds -= builds
+
+    def refresh(self, data_path):
+        """
+        Adds the builds appended to a merged measurements CSV file since the last refresh.
+
+        Only the bytes after the processed offset are parsed. If the file was rewritten
+        (changed header or content before the offset), the store is rebuilt from the whole file.
+
+        :param data_path: Path to the merged measurements CSV file.
+        :return: The number of added builds.
+        """
+        with open(data_path, 'rb') as file:
+            header = file.readline()
+            if not self._source_unchanged(file, data_path, header):
+                self.reset()
+                offset = len(header)
+            else:
+                offset = self.source['offset']
+            file.seek(offset)
+            content = file.read()
+            # Only complete lines are processed
+            content = content[:content.rfind(b'\n') + 1]
+            added = 0
+            if content:
+                data = pd.read_csv(io.BytesIO(header + content), dtype=MEASUREMENT_COLUMN_TYPES)
+                added = self.add(normalize_measurement_types(data))
+            offset += len(content)
+            self.source = {
+                'path': os.path.abspath(data_path),
+                'header': header.decode(),
+                'offset': offset,
+                'tail_sha256': self._tail_hash(file, offset)
+            }
+        return added
+
+    def _source_unchanged(self, file, data_path, header):
+        source = self.source
+        return (source is not None
+                and source['path'] == os.path.abspath(data_path)
+                and source['header'] == header.decode()
+                and os.fstat(file.fileno()).st_size >= source['offset']
+                and self._tail_hash(file, source['offset']) == source['tail_sha256'])
+
+    @staticmethod
+    def _tail_hash(file, offset):
+        start = max(offset - TAIL_SIZE, 0)
+        file.seek(start)
+        return hashlib.sha256(file.read(offset - start)).hexdigest()
+
+    def summary(self, names):
+        """
+        Returns count, sum, sum of squares, min, max, mean and standard deviation per key,
+        combined over one or several aggregates with the same key columns.
+
+        :param names: The names of the aggregates to combine.
+        :return: A pandas DataFrame with the key columns of the aggregates and the columns STAT_COLUMNS,
+                 'mean' and 'std' (sample standard deviation), sorted by the key columns.
+        """
+        keys = self.aggregates[names[0]]['keys']
+        totals = self.totals.reset_index()
+        totals = totals[totals['aggregate'].isin(names)]
+        summary = combine_statistics(totals, keys) if not totals.empty \
+            else empty_statistics(keys + STAT_COLUMNS).set_index(keys)
+        count = summary['count'].astype(float)
+        summary['mean'] = summary['sum'] / count.where(count > 0)
+        variance = (summary['sumsq'] - summary['sum'] ** 2 / count.where(count > 0)) / (count - 1).where(count > 1)
+        summary['std'] = np.sqrt(variance.clip(lower=0))
+        return summary.sort_index().reset_index()
+
+    def save(self):
+        """
+        Saves the store to its directory. Only new partial statistics are written,
+        unless builds were removed. Without pyarrow, the store is not persisted.
+        """
+        if not PYARROW_AVAILABLE or self.path is None:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        # Invalidate the stored state first, so an interrupted save never leaves a mismatched store
+        meta_path = os.path.join(self.path, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        if self._rewrite:
+            for segment in self._segments:
+                try:
+                    os.remove(os.path.join(self.path, segment))
+                except FileNotFoundError:
+                    pass
+            self._segments = []
+        for partials in self._new_partials:
+            number = max([int(segment.split('-')[1].split('.')[0]) for segment in self._segments], default=0) + 1
+            segment = f"partials-{number:06d}.feather"
+            partials.reset_index(drop=True).to_feather(os.path.join(self.path, segment))
+            self._segments.append(segment)
+        self._new_partials = []
+        self._rewrite = False
+        self.totals.reset_index().to_feather(os.path.join(self.path, 'totals.feather'))
+
+        meta = {
+            'version': STORE_VERSION,
+            'aggregates': sorted(self.aggregates),
+            'builds': sorted(self.builds),
+            'source': self.source,
+            'segments': self._segments
+        }
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, meta_path)
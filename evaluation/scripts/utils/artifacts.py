@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Artifact cache configuration, initialized from environment variables:
+#   EVAL_ARTIFACT_CACHE=0    Always render figures and generate LaTeX entries.
+#   EVAL_FORCE_REBUILD=1     Render and generate everything once, updating the cache.
+ARTIFACT_CACHE_CONFIG = {
+    'enabled': os.environ.get('EVAL_ARTIFACT_CACHE', '1').lower() not in ('0', 'false', 'no'),
+    'force': os.environ.get('EVAL_FORCE_REBUILD', '').lower() in ('1', 'true', 'yes'),
+    'manifest_path': '../.artifact_cache.json'
+}
+# Increase to invalidate all cached artifacts, e.g. after changing the key format
+ARTIFACT_CACHE_VERSION = 1
+
+_code_version = None
+
+
+def configure_artifact_cache(enabled=None, force=None):
+    """
+    Updates the artifact cache configuration. Arguments that are None keep their current value.
+
+    :param enabled: Optional; whether unchanged figures and LaTeX entries are reused.
+    :param force: Optional; whether all figures and LaTeX entries are rebuilt, updating the cache.
+    """
+    if enabled is not None:
+        ARTIFACT_CACHE_CONFIG['enabled'] = bool(enabled)
+    if force is not None:
+        ARTIFACT_CACHE_CONFIG['force'] = bool(force)
+
+
+def code_version():
+    """
+    Returns a hash of the utils package sources, so changes of shared rendering or table code invalidate all artifacts.
+    """
+    global _code_version
+    if _code_version is None:
+        sha256 = hashlib.sha256()
+        utils_dir = os.path.dirname(os.path.abspath(__file__))
+        for file_name in sorted(os.listdir(utils_dir)):
+            if file_name.endswith('.py'):
+                with open(os.path.join(utils_dir, file_name), 'rb') as file:
+                    sha256.update(file.read())
+        _code_version = sha256.hexdigest()
+    return _code_version
+
+
+def _update_hash(sha256, value):
+    # Hashes values by content, values of unknown types by their representation
+    if isinstance(value, pd.DataFrame):
+        sha256.update(repr((list(value.columns), [str(dtype) for dtype in value.dtypes], value.shape)).encode())
+        sha256.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        sha256.update(repr((value.name, str(value.dtype), len(value))).encode())
+        sha256.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        sha256.update(repr((str(value.dtype), value.shape)).encode())
+        sha256.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        sha256.update(b'{')
+        for key, item in value.items():
+            _update_hash(sha256, key)
+            _update_hash(sha256, item)
+        sha256.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        sha256.update(b'[')
+        for item in value:
+            _update_hash(sha256, item)
+        sha256.update(b']')
+    elif hasattr(value, 'to_dict') and not isinstance(value, type):
+        # E.g. quantile sketches
+        _update_hash(sha256, value.to_dict())
+    elif callable(value):
+        sha256.update(f"{value.__module__}.{value.__qualname__}".encode())
+    else:
+        sha256.update(repr(value).encode())
+    sha256.update(b';')
+
+
+def artifact_key(func, kwargs, settings=None):
+    """
+    Returns the content hash of an artifact: the function and the source of its module,
+    its arguments (DataFrames by content), the settings (e.g. dpi and format) and the utils sources.
+
+    :param func: The function creating the artifact.
+    :param kwargs: The keyword arguments of the function.
+    :param settings: Optional; further values the artifact depends on.
+    :return: The hex digest of the key.
+    """
+    sha256 = hashlib.sha256()
+    _update_hash(sha256, [ARTIFACT_CACHE_VERSION, code_version(), f"{func.__module__}.{func.__qualname__}"])
+    module_path = getattr(sys.modules.get(func.__module__), '__file__', None)
+    if module_path is not None:
+        with open(module_path, 'rb') as file:
+            sha256.update(file.read())
+    _update_hash(sha256, settings)
+    _update_hash(sha256, dict(sorted(kwargs.items())))
+    return sha256.hexdigest()
+
+
+def _file_state(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ArtifactManifest:
+    """
+    Keys of the rendered figures and generated LaTeX entries, with the state of their output files.
+
+    An artifact is current if its key is unchanged and its outputs exist unmodified since they were recorded,
+    so it can be reused instead of rendered again. Figures are identified by their function and output path,
+    LaTeX entries by their output file and label.
+    """
+
+    def __init__(self, path=None):
+        """
+        :param path: Optional; path of the JSON manifest (default is the configured manifest path).
+        """
+        self.path = os.path.abspath(path or ARTIFACT_CACHE_CONFIG['manifest_path'])
+        self.modified = False
+        try:
+            with open(self.path, 'r') as file:
+                manifest = json.load(file)
+            self.artifacts = manifest['artifacts'] if manifest.get('version') == ARTIFACT_CACHE_VERSION else {}
+        except (FileNotFoundError, ValueError, KeyError):
+            self.artifacts = {}
+
+    def is_current(self, artifact_id, key, content_hash=None):
+        """
+        Returns whether an artifact is current.
+
+        :param artifact_id: The identifier of the artifact, e.g. function and output path of a figure.
+        :param key: The key of the artifact, see artifact_key.
+        :param content_hash: Optional; hash of content kept elsewhere, e.g. of a LaTeX entry in the output file.
+        """
+        if ARTIFACT_CACHE_CONFIG['force']:
+            return False
+        artifact = self.artifacts.get(artifact_id)
+        if artifact is None or artifact['key'] != key or artifact.get('content_hash') != content_hash:
+            return False
+        for path, state in artifact['outputs'].items():
+            if not os.path.exists(path) or _file_state(path) != state:
+                return False
+        return True
+
+    def record(self, artifact_id, key, outputs=(), content_hash=None):
+        """
+        Records an artifact with the current state of its output files.
+
+        :param artifact_id: The identifier of the artifact.
+        :param key: The key of the artifact, see artifact_key.
+        :param outputs: Optional; paths of the files written for the artifact.
+        :param content_hash: Optional; hash of content kept elsewhere.
+        """
+        self.artifacts[artifact_id] = {
+            'key': key,
+            'outputs': {os.path.abspath(path): _file_state(path) for path in outputs if os.path.exists(path)},
+            'content_hash': content_hash
+        }
+        self.modified = True
+
+    def save(self):
+        """
+        Writes the manifest, if modified, with a single atomic write.
+        """
+        if not self.modified:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump({'version': ARTIFACT_CACHE_VERSION, 'artifacts': self.artifacts}, file)
+        os.replace(tmp_path, self.path)
+        self.modified = False
+
+
+def content_hash(content):
+    """
+    Returns the SHA-256 hash of a string, e.g. of a LaTeX entry.
+    """
+    return hashlib.sha256(content.encode()).hexdigest()
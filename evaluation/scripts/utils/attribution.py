@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+from .costs import COST_BREAKDOWN_FILE_PATH, load_cost_components
+from .pricing import billed_runtimes
+from .profiling import profiled
+
+# Columns identifying an entry in the stored attribution
+ENTRY_COLUMNS = ['build', 'test_case', 'test_approach', 'test_tool']
+# Levels of the cost components the attribution can be rolled up to
+ATTRIBUTION_LEVELS = ['resource', 'resource_type', 'component']
+
+
+@profiled
+def attribute_costs(data, breakdown_path=COST_BREAKDOWN_FILE_PATH):
+    """
+    Breaks the costs of every entry down per cost component of the breakdown, billing as calculate_costs.
+    Test cases sharing an apply-destroy cycle share the costs of the whole cycle, see billed_runtimes.
+    Components without hourly cost (usage based, e.g. flow log ingestion) are not covered by the breakdown.
+
+    Only entries billed for the infrastructure are attributed, see billed_entries: no static test stages
+    and no 'terraform apply' or 'terraform destroy' entries, whose runtime the test cases of their cycle share.
+    The result is a sparse entries x components matrix in coordinate format:
+    only billed entries and components with costs are stored.
+
+    :param data: A pandas DataFrame with time series data, including the 'terraform apply' and
+                 'terraform destroy' entries of the cycles, e.g. the flattened cycles with originals.
+    :param breakdown_path: Path to the infracost breakdown JSON file.
+    :return: A pandas DataFrame with the columns 'entry' (position in data), 'component'
+             (position in load_cost_components) and 'costs(USD)', sorted by entry and component.
+    """
+    components = load_cost_components(breakdown_path)
+    billed, shares = billed_runtimes(data.reset_index(drop=True))
+    # Only billed entries with runtime are priced, before building the entries x components matrix
+    entries = np.flatnonzero(np.nan_to_num(billed) > 0)
+    billed, shares = billed[entries], shares[entries]
+    # Billed hours per entry for components billed per second and per started hour
+    per_second_hours = billed / 3600 / shares
+    per_hour_hours = np.ceil(billed / 3600) / shares
+    per_second = (components['billing'] == 'second').to_numpy()
+    hours = np.where(per_second[None, :], per_second_hours[:, None], per_hour_hours[:, None])
+    costs = hours * components['hourly_cost'].to_numpy()[None, :]
+    rows, columns = np.nonzero(costs)
+    return pd.DataFrame({
+        'entry': entries[rows],
+        'component': columns,
+        'costs(USD)': costs[rows, columns]
+    })
+
+
+def attribution_table(data, attribution, breakdown_path=COST_BREAKDOWN_FILE_PATH):
+    """
+    Labels the attributed costs with their entries and cost components, e.g. to store them.
+    Repeated values are stored as categories, so the table stays about as compact as the matrix.
+
+    :param data: The pandas DataFrame passed to attribute_costs.
+    :param attribution: The pandas DataFrame returned by attribute_costs.
+    :return: A pandas DataFrame with the columns ENTRY_COLUMNS, ATTRIBUTION_LEVELS and 'costs(USD)'.
+    """
+    entries = data.iloc[attribution['entry'].to_numpy()]
+    components = load_cost_components(breakdown_path).iloc[attribution['component'].to_numpy()]
+    table = pd.DataFrame({column: entries[column].to_numpy() for column in ENTRY_COLUMNS})
+    table['test_tool'] = pd.Categorical(table['test_tool'])
+    for level in ATTRIBUTION_LEVELS:
+        table[level] = pd.Categorical(components[level].to_numpy())
+    table['costs(USD)'] = attribution['costs(USD)'].to_numpy()
+    return table
+
+
+def rollup_attribution(data, attribution, group_keys=('test_case', 'test_approach'), level='resource',
+                       breakdown_path=COST_BREAKDOWN_FILE_PATH):
+    """
+    Rolls the attributed costs up to average costs per group of entries and resource (or component).
+
+    :param data: The pandas DataFrame passed to attribute_costs.
+    :param attribution: The pandas DataFrame returned by attribute_costs,
+                        or its rows of a subset of entries, e.g. the dynamic test cases.
+    :param group_keys: Optional; columns of the data to group the entries by (default is test case and approach).
+    :param level: Optional; one of ATTRIBUTION_LEVELS (default is 'resource').
+    :return: A pandas DataFrame indexed by the groups, with the average costs per entry of every resource
+             (columns sorted by total costs, highest first) and their sum in the column 'total'.
+    """
+    if level not in ATTRIBUTION_LEVELS:
+        raise ValueError(f"Unknown attribution level '{level}', expected one of {ATTRIBUTION_LEVELS}")
+    group_keys = list(group_keys)
+    entries = data.iloc[attribution['entry'].to_numpy()]
+    components = load_cost_components(breakdown_path)
+    costs = pd.DataFrame({
+        **{key: entries[key].to_numpy() for key in group_keys},
+        level: components[level].to_numpy()[attribution['component'].to_numpy()],
+        'entry': attribution['entry'].to_numpy(),
+        'costs(USD)': attribution['costs(USD)'].to_numpy()
+    })
+    # Average over the entries of a group, not over its non-zero matrix cells
+    entry_counts = costs.groupby(group_keys, sort=True)['entry'].nunique()
+    totals = costs.pivot_table(index=group_keys, columns=level, values='costs(USD)', aggfunc='sum', fill_value=0)
+    rollup = totals.div(entry_counts, axis=0)
+    rollup = rollup[rollup.sum().sort_values(ascending=False, kind='stable').index]
+    rollup.columns.name = level
+    rollup['total'] = rollup.sum(axis=1)
+    return rollup
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from .utils import MAX_CYCLE_TEST_CASE, test_case_masks
+
+
+class BuildIndex:
+    """
+    Measurements sorted by build, with the row range and facts of every build.
+
+    The rows of a build are contiguous, so build range filters return slices of the measurements
+    instead of copies, and per-build facts (test cases and test approaches present, row count)
+    are calculated once instead of scanning all rows for every filter.
+    Returned frames share memory with the measurements and must not be modified in place.
+
+    'data' holds the measurements sorted by build (stable, keeping the order within a build).
+    'builds' is a DataFrame indexed by build, with the row range of the build in 'data' ('start', 'stop'),
+    its number of 'rows' and the bitmasks of the 'test_cases' and 'test_approaches' present (bit n for id n).
+    """
+
+    def __init__(self, data):
+        """
+        :param data: The pandas DataFrame with the measurements, not modified.
+                     Already sorted measurements with numeric builds, as read by read_csv_to_dataframe, are not copied.
+        """
+        if not pd.api.types.is_numeric_dtype(data['build']):
+            data = data.assign(build=pd.to_numeric(data['build'], errors='coerce'))
+        if not data['build'].is_monotonic_increasing:
+            data = data.sort_values('build', kind='stable')
+        self.data = data
+        self.builds = self._build_facts(data)
+
+    @staticmethod
+    def _build_facts(data):
+        build_values = data['build'].to_numpy()
+        # A build starts at every row whose build differs from the previous row
+        changes = np.ones(len(build_values), dtype=bool)
+        changes[1:] = build_values[1:] != build_values[:-1]
+        starts = np.flatnonzero(changes)
+        stops = np.append(starts[1:], len(build_values))
+        if len(starts):
+            test_cases = np.bitwise_or.reduceat(test_case_masks(data['test_case']), starts)
+            test_approaches = np.bitwise_or.reduceat(
+                np.left_shift(1, data['test_approach'].to_numpy().astype(np.int64)), starts)
+        else:
+            test_cases = test_approaches = np.empty(0, np.int64)
+        return pd.DataFrame({
+            'start': starts,
+            'stop': stops,
+            'rows': stops - starts,
+            'test_cases': test_cases,
+            'test_approaches': test_approaches
+        }, index=pd.Index(build_values[starts], name='build'))
+
+    def __len__(self):
+        return len(self.data)
+
+    def build_range(self, min_build_value=None, max_build_value=None):
+        """
+        Returns the measurements of a range of builds as slice, see filter_data_sets_by_build.
+
+        :param min_build_value: Optional; builds above this value are included.
+        :param max_build_value: Optional; builds up to and including this value are included.
+        :return: A pandas DataFrame slice of the measurements.
+        """
+        build_values = self.data['build'].to_numpy()
+        start = 0 if min_build_value is None else np.searchsorted(build_values, min_build_value, side='right')
+        stop = len(build_values)
+        if max_build_value is not None:
+            stop = np.searchsorted(build_values, max_build_value, side='right')
+        return self.data.iloc[start:max(start, stop)]
+
+    def builds_with_test_case(self, test_case_value):
+        """
+        Returns the builds containing a test case.
+
+        :param test_case_value: The test case id.
+        :return: A numpy array of builds, in ascending order.
+        """
+        if 0 <= test_case_value <= MAX_CYCLE_TEST_CASE:
+            present = (self.builds['test_cases'].to_numpy() & (1 << int(test_case_value))) != 0
+        else:
+            # Test cases beyond the bitmask are counted per build
+            matches = (self.data['test_case'].to_numpy() == test_case_value).astype(np.int64)
+            present = np.add.reduceat(matches, self.builds['start'].to_numpy()) > 0 if len(matches) else matches
+        return self.builds.index.to_numpy()[present]
+
+    def complete_data_sets(self, test_case_value=14):
+        """
+        Returns the measurements of the builds containing a test case, see without_incomplete_data_sets.
+        A slice is returned if these builds are contiguous, otherwise only their rows are copied.
+
+        :param test_case_value: The test_case value to filter data sets by (default is 14).
+        :return: A pandas DataFrame with the rows of these builds, with the index of the measurements.
+        """
+        builds = self.builds.loc[self.builds_with_test_case(test_case_value)]
+        starts = builds['start'].to_numpy()
+        stops = builds['stop'].to_numpy()
+        if len(builds) == 0:
+            return self.data.iloc[:0]
+        if (starts[1:] == stops[:-1]).all():
+            return self.data.iloc[starts[0]:stops[-1]]
+        # Row positions of all ranges, without a Python loop over the builds
+        lengths = stops - starts
+        positions = np.arange(lengths.sum()) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.data.iloc[positions]
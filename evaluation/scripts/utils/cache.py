@@ -0,0 +1,150 @@
+import hashlib
+import importlib.util
+import json
+import os
+
+import pandas as pd
+
+# Feather files are written with pyarrow. Without it, caching is disabled.
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Version of the cache metadata format. Increase to invalidate all cached frames.
+CACHE_VERSION = 1
+
+# File extensions of the cached frame and its metadata, placed next to the source file
+CACHE_EXTENSION = '.feather'
+CACHE_META_EXTENSION = '.feather.json'
+
+
+def get_cache_paths(source_path):
+    """
+    Returns the paths of the cached frame and its metadata for a source file.
+
+    :param source_path: Path to the source file, e.g. a measurements CSV.
+    :return: A tuple (cache_path, meta_path), both located next to the source file.
+    """
+    base = os.path.splitext(source_path)[0]
+    return base + CACHE_EXTENSION, base + CACHE_META_EXTENSION
+
+
+def hash_file(file_path, chunk_size=1 << 20):
+    """
+    Calculates the SHA-256 hash of a file's content.
+
+    :param file_path: Path to the file.
+    :param chunk_size: Number of bytes to read at once (default is 1 MiB).
+    :return: The hex digest of the file's content.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def file_fingerprint(file_path, content_hash=None):
+    """
+    Returns the fingerprint of a file, consisting of its size, mtime and content hash.
+
+    :param file_path: Path to the file.
+    :param content_hash: Optional; an already calculated content hash, otherwise it is calculated.
+    :return: A dictionary with the keys 'size', 'mtime_ns' and 'sha256'.
+    """
+    stat = os.stat(file_path)
+    return {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': content_hash if content_hash is not None else hash_file(file_path)
+    }
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, 'r') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, meta_path)
+
+
+def _normalized_schema(schema):
+    # The schema as read back from JSON, e.g. tuples as lists
+    return json.loads(json.dumps(schema))
+
+
+def _cache_meta(fingerprint, schema):
+    return {**fingerprint, 'version': CACHE_VERSION, 'schema': _normalized_schema(schema)}
+
+
+def load_cached_frame(source_path, schema=None):
+    """
+    Loads the cached frame of a source file if it is still valid.
+
+    The cache is valid if it was stored with the same cache version and schema, and size and mtime
+    of the source file match the stored fingerprint. If only the mtime changed (e.g. after a checkout),
+    the content hash decides and the stored fingerprint is refreshed on a match.
+
+    :param source_path: Path to the source file.
+    :param schema: Optional; JSON serializable description of how the frame was parsed, e.g. a parser
+                   version and the column types. Frames stored with a different schema are not loaded.
+    :return: The cached pandas DataFrame, or None if there is no valid cache.
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+    cache_path, meta_path = get_cache_paths(source_path)
+    meta = _read_meta(meta_path)
+    if meta is None or not os.path.exists(cache_path) or not os.path.exists(source_path):
+        return None
+    if meta.get('version') != CACHE_VERSION or meta.get('schema') != _normalized_schema(schema):
+        return None
+
+    stat = os.stat(source_path)
+    if stat.st_size != meta.get('size'):
+        return None
+    if stat.st_mtime_ns != meta.get('mtime_ns'):
+        content_hash = hash_file(source_path)
+        if content_hash != meta.get('sha256'):
+            return None
+        try:
+            _write_meta(meta_path, _cache_meta(file_fingerprint(source_path, content_hash), schema))
+        except OSError:
+            pass
+
+    try:
+        return pd.read_feather(cache_path)
+    except Exception as e:
+        print(f"Error while reading the cache file: {e}")
+        return None
+
+
+def store_cached_frame(source_path, df, fingerprint=None, schema=None):
+    """
+    Stores a frame as Feather file next to its source file, together with the source's fingerprint
+    and the schema it was parsed with. Failures to write the cache are reported but not raised.
+
+    :param source_path: Path to the source file the frame was parsed from.
+    :param df: The pandas DataFrame to cache.
+    :param fingerprint: Optional; the source's fingerprint taken before parsing it.
+                        Otherwise the current fingerprint of the source file is used.
+    :param schema: Optional; JSON serializable description of how the frame was parsed, see load_cached_frame.
+    """
+    if not PYARROW_AVAILABLE:
+        return
+    cache_path, meta_path = get_cache_paths(source_path)
+    try:
+        # Invalidate the old cache first and write to a temporary file,
+        # so an interrupted run never leaves a corrupt or mismatched cache
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        tmp_path = cache_path + '.tmp'
+        df.reset_index(drop=True).to_feather(tmp_path)
+        os.replace(tmp_path, cache_path)
+        _write_meta(meta_path, _cache_meta(fingerprint or file_fingerprint(source_path), schema))
+    except Exception as e:
+        print(f"Error while writing the cache file: {e}")
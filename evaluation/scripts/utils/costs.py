@@ -0,0 +1,102 @@
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .profiling import profiled
+
+# Constant for the cost breakdown file path
+COST_BREAKDOWN_FILE_PATH = '../../measurements/infracost_build_1.json'
+
+# Resource types billed per second of runtime. All other resource types
+# (e.g. VPC endpoints, KMS keys) are billed per started hour.
+PER_SECOND_RESOURCE_TYPES = {
+    'aws_db_instance',
+    'aws_eks_cluster',
+    'aws_eks_node_group',
+}
+
+
+def _flatten_resources(resources, parent_type=None):
+    """
+    Recursively yields (resource name, resource type, cost component) tuples for all
+    resources and subresources of an infracost breakdown.
+    """
+    for resource in resources or []:
+        resource_type = resource.get('resourceType') or parent_type
+        for component in resource.get('costComponents') or []:
+            yield resource['name'], resource_type, component
+        yield from _flatten_resources(resource.get('subresources'), resource_type)
+
+
+@lru_cache(maxsize=None)
+def load_cost_components(breakdown_path=COST_BREAKDOWN_FILE_PATH):
+    """
+    Parses an infracost breakdown JSON file into a DataFrame of hourly priced cost components.
+    The result is cached per path, so the breakdown is read only once per process.
+
+    Components without an hourly cost (usage based, e.g. requests or data ingested) are skipped,
+    as they are not covered by the runtime based cost calculation.
+
+    :param breakdown_path: Path to the infracost breakdown JSON file.
+    :return: A pandas DataFrame with the columns 'resource', 'resource_type', 'component', 'unit',
+             'hourly_cost' and 'billing' ('second' or 'hour').
+    """
+    with open(breakdown_path, 'r') as file:
+        breakdown = json.load(file)
+
+    rows = []
+    for project in breakdown.get('projects', []):
+        resources = project.get('breakdown', {}).get('resources')
+        for resource_name, resource_type, component in _flatten_resources(resources):
+            if component.get('hourlyCost') is None:
+                continue
+            rows.append({
+                'resource': resource_name,
+                'resource_type': resource_type,
+                'component': component['name'],
+                'unit': component.get('unit'),
+                'hourly_cost': float(component['hourlyCost']),
+                'billing': 'second' if resource_type in PER_SECOND_RESOURCE_TYPES else 'hour'
+            })
+
+    return pd.DataFrame(rows, columns=['resource', 'resource_type', 'component', 'unit',
+                                       'hourly_cost', 'billing'])
+
+
+@lru_cache(maxsize=None)
+def load_hourly_rates(breakdown_path=COST_BREAKDOWN_FILE_PATH):
+    """
+    Returns the summed hourly rates of an infracost breakdown, split by billing modality.
+
+    :param breakdown_path: Path to the infracost breakdown JSON file.
+    :return: A tuple (per_second_hourly_rate, per_hour_hourly_rate) in USD per hour.
+    """
+    components = load_cost_components(breakdown_path)
+    per_second_rate = components.loc[components['billing'] == 'second', 'hourly_cost'].sum()
+    per_hour_rate = components.loc[components['billing'] == 'hour', 'hourly_cost'].sum()
+    return float(per_second_rate), float(per_hour_rate)
+
+
+@profiled
+def calculate_costs(runtimes, breakdown_path=COST_BREAKDOWN_FILE_PATH, split_by=1, digits=5):
+    """
+    Calculates the cloud provider costs for one or many runtimes in a single call.
+
+    Resources billed per second are charged for the exact runtime, resources billed per hour
+    are charged for every started hour. The result is divided by split_by and rounded to the
+    given number of digits, matching terraform/scripts/calculate_costs.py.
+
+    :param runtimes: A runtime in seconds or an array-like of runtimes in seconds.
+    :param breakdown_path: Path to the infracost breakdown JSON file.
+    :param split_by: Number of test cases sharing the costs (default is 1).
+    :param digits: Number of digits to round the costs to (default is 5). None disables rounding.
+    :return: The costs in USD, as float for a scalar input or as numpy array otherwise.
+    """
+    per_second_rate, per_hour_rate = load_hourly_rates(breakdown_path)
+    seconds = np.asarray(runtimes, dtype=float)
+    costs = (per_second_rate * seconds / 3600 + per_hour_rate * np.ceil(seconds / 3600)) / split_by
+    if digits is not None:
+        costs = np.round(costs, digits)
+    return float(costs) if costs.ndim == 0 else costs
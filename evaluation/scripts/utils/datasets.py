@@ -0,0 +1,172 @@
+from .builds import BuildIndex
+from .profiling import stage
+from .utils import flatten_multi_tc_apply_destroy_cycles
+
+# Name of the input node of the graph, i.e. the measurements as read by read_csv_to_dataframe
+MEASUREMENTS = 'measurements'
+
+# Registry of derived datasets: name -> (function, names of the datasets it depends on)
+DERIVED_DATASETS = {}
+
+
+def derived_dataset(name, depends_on=(MEASUREMENTS,)):
+    """
+    Decorator registering a function as derived dataset.
+    The function is called with the datasets it depends on, in the given order.
+
+    :param name: The unique name of the derived dataset.
+    :param depends_on: Names of the datasets the function depends on (default is the measurements).
+    :return: The decorator, returning the function unchanged.
+    """
+    def decorator(func):
+        if name in DERIVED_DATASETS or name == MEASUREMENTS:
+            raise ValueError(f"Dataset '{name}' is already registered")
+        DERIVED_DATASETS[name] = (func, tuple(depends_on))
+        return func
+    return decorator
+
+
+class DatasetGraph:
+    """
+    Lazily computes and memoizes derived datasets for one version of the measurements.
+    Each dataset is computed at most once per input version, shared dependencies
+    (e.g. the flattened apply-destroy cycles) are computed only once for all datasets.
+
+    Datasets are shared between callers and must not be modified in place.
+    """
+
+    def __init__(self, data):
+        self._cache = {}
+        self._in_progress = set()
+        self.version = 0
+        self.set_input(data)
+
+    def set_input(self, data):
+        """
+        Replaces the measurements and invalidates all derived datasets.
+
+        :param data: The pandas DataFrame with the measurements.
+        """
+        self._cache.clear()
+        self._cache[MEASUREMENTS] = data
+        self.version += 1
+
+    def get(self, name):
+        """
+        Returns a dataset, computing it and its dependencies if not yet done for the current input.
+
+        :param name: The name of the dataset.
+        :return: The pandas DataFrame of the dataset.
+        """
+        if name in self._cache:
+            return self._cache[name]
+        if name not in DERIVED_DATASETS:
+            raise KeyError(f"Unknown dataset '{name}'")
+        if name in self._in_progress:
+            raise ValueError(f"Cyclic dependency detected for dataset '{name}'")
+
+        func, depends_on = DERIVED_DATASETS[name]
+        self._in_progress.add(name)
+        try:
+            inputs = [self.get(dependency) for dependency in depends_on]
+            with stage('dataset:' + name, rows_in=len(inputs[0]) if inputs else None) as record:
+                result = func(*inputs)
+                record['rows_out'] = len(result)
+        finally:
+            self._in_progress.discard(name)
+        self._cache[name] = result
+        return result
+
+    __getitem__ = get
+
+
+
+# Shared intermediate datasets
+
+@derived_dataset('build_index')
+def indexing_builds(data):
+    # Measurements sorted by build with the row range of every build, for filters without copies
+    return BuildIndex(data)
+
+@derived_dataset('complete_data_sets', depends_on=['build_index'])
+def filtering_complete_data_sets(index):
+    # Filter for data sets including tc14
+    return index.complete_data_sets(14)
+
+@derived_dataset('flattened_cycles', depends_on=['complete_data_sets'])
+def filtering_flattened_cycles(data):
+    return flatten_multi_tc_apply_destroy_cycles(data)
+
+@derived_dataset('flattened_cycles_with_originals', depends_on=['complete_data_sets'])
+def filtering_flattened_cycles_with_originals(data):
+    return flatten_multi_tc_apply_destroy_cycles(data, delete_originals=False)
+
+
+
+# Datasets used by the evaluation scripts
+
+@derived_dataset('static_tc', depends_on=['build_index'])
+def filtering_static_tc(index):
+    test_approaches_to_include = [1, 2, 3, 4]
+    # exclude tests prior to refactoring (prior build 140)
+    data = index.build_range(min_build_value=140)
+    data = data[(data['test_case'] != -1)]
+    # Filter for test approaches to include
+    data = data[data['test_approach'].isin(test_approaches_to_include)]
+    return data
+
+@derived_dataset('dynamic_combined_tc', depends_on=['build_index'])
+def filtering_dynamic_combined_tc(index):
+    test_approaches_to_include = [5, 6]
+    data = index.data[(index.data['test_case'] != -1)]
+    # Filter for test approaches to include
+    data = data[data['test_approach'].isin(test_approaches_to_include)]
+    # Filter out rows where runtime is greater than 60 seconds
+    # to only show raw dynamic test cases without deploy/destroy overhead
+    data = data[data['runtime(seconds)'] <= 60]
+    return data
+
+@derived_dataset('dynamic_standalone_tc', depends_on=['flattened_cycles'])
+def filtering_dynamic_standalone_tc(data):
+    test_approaches_to_include = [5, 6]
+    # Filter for test approaches to include
+    data = data[data['test_approach'].isin(test_approaches_to_include)]
+    # Filter out rows where runtime is less than 60 seconds
+    # to exclude raw dynamic test cases without deploy/destroy overhead
+    data = data[data['runtime(seconds)'] > 60]
+    return data
+
+@derived_dataset('deploy_destroy_phases', depends_on=['complete_data_sets'])
+def filtering_deploy_destroy_phases(data):
+    # Cover the same build range as filtering_dynamic_standalone_tc
+    data = data[data['test_tool'].isin(['terraform apply', 'terraform destroy'])]
+    return data
+
+@derived_dataset('static_stages', depends_on=['build_index'])
+def filtering_static_stages(index):
+    test_approaches_to_include = [1, 2, 3, 4]
+    # exclude tests prior to refactoring (prior build 140)
+    data = index.build_range(min_build_value=140)
+    # Filter out rows with 'NA' in 'runtime(seconds)'
+    data = data[(data['runtime(seconds)'].notna())]
+    # Filter for test approaches to include
+    data = data[data['test_approach'].isin(test_approaches_to_include)]
+    return data
+
+@derived_dataset('dynamic_stages', depends_on=['flattened_cycles'])
+def filtering_dynamic_stages(data):
+    test_approaches_to_include = [5, 6]
+    # Filter out rows with 'NA' in 'runtime(seconds)'
+    data = data[(data['runtime(seconds)'].notna())]
+    # Filter for test approaches to include
+    data = data[data['test_approach'].isin(test_approaches_to_include)]
+    return data
+
+@derived_dataset('dynamic_tc', depends_on=['flattened_cycles_with_originals'])
+def filtering_dynamic_tc(data):
+    test_approaches_to_include = [5, 6]
+    # Filter for test approaches to include
+    data = data[data['test_approach'].isin(test_approaches_to_include)]
+    # Filter out deploy/destroy entries
+    data = data[(data['test_case'] != -1)]
+    return data
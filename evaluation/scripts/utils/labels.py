@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+# Labels of the key combinations seen so far, per label function and key columns
+_dimensions = {}
+
+
+def _labels_of(label_func, keys, combinations):
+    # Labels every key combination once, later calls only label new combinations
+    dimension = _dimensions.setdefault((label_func, tuple(keys)), {})
+    for combination in combinations:
+        if combination not in dimension:
+            dimension[combination] = label_func(*combination)
+    return [dimension[combination] for combination in combinations]
+
+
+def map_labels(data, keys, label_func):
+    """
+    Labels every row by its key combination. The label function is called once per distinct
+    combination and the labels are mapped to the rows by their factorized codes,
+    instead of calling the label function per row.
+
+        data['label'] = map_labels(data, ['test_case', 'test_approach'], format_test_case_label)
+
+    :param data: Pandas DataFrame containing the key columns.
+    :param keys: List of key columns, passed in this order to the label function.
+    :param label_func: Function returning the label of one key combination.
+    :return: A pandas Series of labels with the index of the data.
+    """
+    if len(keys) == 1:
+        codes, uniques = pd.factorize(data[keys[0]], use_na_sentinel=False)
+        combinations = [(value,) for value in uniques]
+    else:
+        codes, uniques = pd.factorize(pd.MultiIndex.from_frame(data[keys]), use_na_sentinel=False)
+        combinations = list(uniques)
+    labels = np.array(_labels_of(label_func, keys, combinations), dtype=object)
+    return pd.Series(labels[codes], index=data.index, name='label')
@@ -0,0 +1,115 @@
+import os
+import re
+
+from .profiling import profiled
+
+# Matches a complete LaTeX table or figure environment
+BLOCK_PATTERN = re.compile(r'\\begin\{(table|figure)\}.*?\\end\{\1\}', re.DOTALL)
+# Matches the label of a table or figure, e.g. \label{tab:tc_avg_runtime}
+LABEL_PATTERN = re.compile(r'\\label\{(?:tab|fig):([^}]*)\}')
+
+
+def _block_key(content):
+    """
+    Returns the index key (block type, label) of a LaTeX table or figure,
+    or None if the content is not a labeled table or figure.
+    """
+    block = BLOCK_PATTERN.search(content)
+    if block is None:
+        return None
+    label = LABEL_PATTERN.search(block.group(0))
+    return (block.group(1), label.group(1)) if label else None
+
+
+class LatexWriter:
+    """
+    Writer session for a LaTeX output file.
+
+    The file is parsed once into text segments and a (block type, label) -> segment index.
+    Tables and figures are replaced or appended in memory and written back with a single
+    atomic write on flush. Use it as context manager to flush on exit:
+
+        with LatexWriter('../output.tex') as writer:
+            writer.write(label, content)
+    """
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.segments = []
+        self.index = {}
+        self.exists = os.path.exists(output_file)
+        self.modified = False
+        if self.exists:
+            with open(output_file, 'r') as file:
+                self._parse(file.read())
+
+    def _parse(self, text):
+        position = 0
+        for block in BLOCK_PATTERN.finditer(text):
+            if block.start() > position:
+                self.segments.append(text[position:block.start()])
+            self._add_block(block.group(0))
+            position = block.end()
+        if position < len(text):
+            self.segments.append(text[position:])
+
+    def _add_block(self, content):
+        key = _block_key(content)
+        # Keep the first block for duplicate labels, as it is the one to be replaced
+        if key is not None and key not in self.index:
+            self.index[key] = len(self.segments)
+        self.segments.append(content)
+
+    def write(self, label, content):
+        """
+        Replaces the table or figure with the same label, or appends the content if there is none.
+        Content that is neither a table nor a figure is appended as is.
+
+        :param label: The label of the table or figure, without 'tab:' or 'fig:' prefix.
+        :param content: The LaTeX code to append or replace.
+        """
+        self.modified = True
+        key = _block_key(content)
+        if key is None:
+            self.segments.append(content)
+            return
+        key = (key[0], label)
+        if key in self.index:
+            # The newline following the block is kept in the surrounding text
+            self.segments[self.index[key]] = content[:-1] if content.endswith('\n') else content
+            return
+        if self.exists or self.segments:
+            self.segments.append('\n')
+        self.index[key] = len(self.segments)
+        self.segments.append(content)
+
+    def get(self, block_type, label):
+        """
+        Returns the current content of a table or figure without trailing newline, None if there is none.
+
+        :param block_type: 'table' or 'figure'.
+        :param label: The label of the table or figure, without 'tab:' or 'fig:' prefix.
+        """
+        position = self.index.get((block_type, label))
+        return None if position is None else self.segments[position].rstrip('\n')
+
+    @profiled
+    def flush(self):
+        """
+        Writes the content to the output file, if modified, with a single atomic write.
+        """
+        if not self.modified:
+            return
+        tmp_path = self.output_file + '.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write(''.join(self.segments))
+        os.replace(tmp_path, self.output_file)
+        self.exists = True
+        self.modified = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,190 @@
+import glob
+import io
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Default pattern of the merged measurement files of all header generations
+MEASUREMENTS_PATTERN = '../../measurements/merged_measurements*.csv'
+
+# Columns of the merged measurement files per header generation
+GENERATION_COLUMNS = {
+    1: ['build', 'test_level', '#tc', 'runtime(millis)', 'revision', 'build_start',
+        'build_duration(hh:mm:ss)'],
+    2: ['build', 'defect_category', 'test_case', 'test_approach', 'test_tool', 'runtime(millis)',
+        'revision', 'build_start', 'build_duration(hh:mm:ss)'],
+    3: ['build', 'defect_category', 'test_case', 'test_approach', 'test_tool', 'runtime(seconds)',
+        'costs(USD)', 'revision', 'build_start', 'build_duration(hh:mm:ss)']
+}
+
+# Generation 2 runtimes are in seconds despite the '(millis)' header, except for these test tools
+# and for runtimes beyond MAX_RUNTIME_SECONDS, which are only plausible in milliseconds
+MILLIS_TEST_TOOLS = ['terratest']
+MAX_RUNTIME_SECONDS = 24 * 60 * 60
+# Plausible median runtimes in seconds of the deploy and destroy phases, to detect unit mix-ups
+PHASE_RUNTIME_RANGE = {'terraform apply': (60, 3600), 'terraform destroy': (60, 3600)}
+
+# Columns and dtypes of the normalized measurement frame
+NORMALIZED_DTYPES = {
+    'generation': 'int8',
+    'build': 'int32',
+    'defect_category': 'int8',
+    'test_case': 'int16',
+    'test_approach': 'int8',
+    'test_tool': 'category',
+    'runtime(seconds)': 'float64',
+    'costs(USD)': 'float64',
+    'revision': 'category',
+    'build_start': 'datetime64[ns]',
+    'build_duration': 'timedelta64[ns]'
+}
+
+
+def detect_generation(columns):
+    """
+    Detects the header generation of merged measurements from their columns.
+
+    :param columns: The column names of the file.
+    :return: The generation number (1, 2 or 3).
+    """
+    for generation, generation_columns in GENERATION_COLUMNS.items():
+        if list(columns) == generation_columns:
+            return generation
+    raise ValueError(f"Unknown measurements header: {list(columns)}")
+
+
+def normalize_measurements(df, generation=None):
+    """
+    Converts a merged measurements frame of any header generation to the normalized schema.
+
+    Runtimes are converted to seconds according to the unit in the header. Generation 2 runtimes were
+    mostly recorded in seconds despite the '(millis)' header, so only the MILLIS_TEST_TOOLS and runtimes
+    beyond MAX_RUNTIME_SECONDS are converted from milliseconds.
+    Generation 1 files have no test approach or defect category,
+    their 'test_level' is mapped to 'test_tool' and '#tc' to 'test_case'. Missing ids are set to -1,
+    missing costs to NaN. Small ids are stored as int8/int16, 'test_tool' and 'revision' as categoricals,
+    'build_start' as datetime and 'build_duration(hh:mm:ss)' as timedelta column 'build_duration'.
+
+    :param df: A pandas DataFrame with the columns of the generation, as strings with NaN for 'NA'.
+    :param generation: Optional; the header generation, detected from the columns if not given.
+    :return: A pandas DataFrame with the columns and dtypes of NORMALIZED_DTYPES.
+    """
+    if generation is None:
+        generation = detect_generation(df.columns)
+
+    if generation == 1:
+        df = df.rename(columns={'test_level': 'test_tool', '#tc': 'test_case'})
+        df['defect_category'] = -1
+        df['test_approach'] = -1
+    if 'runtime(millis)' in df.columns:
+        runtimes = pd.to_numeric(df.pop('runtime(millis)'), errors='coerce')
+        if generation == 2:
+            millis = df['test_tool'].isin(MILLIS_TEST_TOOLS) | (runtimes > MAX_RUNTIME_SECONDS)
+            df['runtime(seconds)'] = runtimes.where(~millis, runtimes / 1000)
+        else:
+            df['runtime(seconds)'] = runtimes / 1000
+    if 'costs(USD)' not in df.columns:
+        df['costs(USD)'] = np.nan
+
+    normalized = pd.DataFrame({
+        'generation': generation,
+        'build': pd.to_numeric(df['build']),
+        'defect_category': pd.to_numeric(df['defect_category'], errors='coerce').fillna(-1),
+        'test_case': pd.to_numeric(df['test_case'], errors='coerce').fillna(-1),
+        'test_approach': pd.to_numeric(df['test_approach'], errors='coerce').fillna(-1),
+        'test_tool': df['test_tool'].astype(str),
+        'runtime(seconds)': pd.to_numeric(df['runtime(seconds)'], errors='coerce'),
+        'costs(USD)': pd.to_numeric(df['costs(USD)'], errors='coerce'),
+        'revision': df['revision'].astype(str),
+        'build_start': pd.to_datetime(df['build_start'].astype(str), format='%Y%m%d%H%M%S', errors='coerce'),
+        'build_duration': pd.to_timedelta(df['build_duration(hh:mm:ss)'], errors='coerce')
+    })
+    return normalized.astype(NORMALIZED_DTYPES)
+
+
+def check_runtime_units(normalized):
+    """
+    Checks that the median runtimes of the deploy and destroy phases of every generation are in
+    PHASE_RUNTIME_RANGE, i.e. that the runtimes were converted to seconds with the right unit.
+
+    :param normalized: A pandas DataFrame with the columns of NORMALIZED_DTYPES.
+    :return: A list of messages, one per generation and phase outside of its range.
+    """
+    problems = []
+    phases = normalized[normalized['test_tool'].isin(list(PHASE_RUNTIME_RANGE))]
+    medians = phases.groupby(['generation', phases['test_tool'].astype(str)])['runtime(seconds)'].median()
+    for (generation, test_tool), median in medians.items():
+        low, high = PHASE_RUNTIME_RANGE[test_tool]
+        if not low <= median <= high:
+            problems.append(f"Median runtime of '{test_tool}' in generation {generation} is {median:g} seconds, "
+                            f"expected between {low} and {high} seconds")
+    return problems
+
+
+def read_measurements_file(data_path):
+    """
+    Reads a merged measurements file of any header generation into a normalized frame.
+
+    The generation is detected per row from its number of fields, as older files also contain
+    rows of the following generation that were merged below the old header.
+
+    :param data_path: Path to the CSV file.
+    :return: A pandas DataFrame with the columns and dtypes of NORMALIZED_DTYPES.
+    """
+    with open(data_path, 'r') as file:
+        lines = file.read().splitlines()[1:]
+    lines = [line for line in lines if line]
+    # The files contain no quoted fields, so the number of fields is given by the separators
+    field_counts = pd.Series([line.count(',') + 1 for line in lines])
+    max_fields = max(len(columns) for columns in GENERATION_COLUMNS.values())
+    raw = pd.read_csv(io.StringIO('\n'.join(lines)), header=None, names=range(max_fields),
+                      dtype=str, keep_default_na=False) if lines else pd.DataFrame(columns=range(max_fields))
+
+    frames = []
+    for generation, columns in GENERATION_COLUMNS.items():
+        rows = raw[field_counts == len(columns)]
+        if len(rows) > 0:
+            rows = rows.iloc[:, :len(columns)].set_axis(columns, axis=1).replace('NA', np.nan)
+            frames.append(normalize_measurements(rows, generation))
+    unknown = (~field_counts.isin([len(columns) for columns in GENERATION_COLUMNS.values()])).sum()
+    if unknown:
+        print(f"Skipped {unknown} rows with unknown number of fields in {data_path}")
+    measurements = _concat_measurements(frames)
+    for problem in check_runtime_units(measurements):
+        print(f"Warning: {problem} in {data_path}")
+    return measurements
+
+
+def _concat_measurements(frames):
+    """
+    Concatenates normalized frames, keeping categorical columns categorical.
+    """
+    if not frames:
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in NORMALIZED_DTYPES.items()})
+    for column in ['test_tool', 'revision']:
+        categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+        for frame in frames:
+            frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_measurement_history(data_paths=None):
+    """
+    Reads the merged measurement files of all header generations into one normalized frame.
+
+    :param data_paths: Optional; list of CSV file paths. By default all files matching
+                       MEASUREMENTS_PATTERN, ordered by their generation suffix.
+    :return: A pandas DataFrame with the columns and dtypes of NORMALIZED_DTYPES,
+             with categories shared across all files.
+    """
+    if data_paths is None:
+        def generation_suffix(path):
+            match = re.search(r'_(\d+)\.csv$', os.path.basename(path))
+            return int(match.group(1)) if match else 0
+        data_paths = sorted(glob.glob(MEASUREMENTS_PATTERN), key=generation_suffix)
+    if not data_paths:
+        raise ValueError("No measurement files found")
+
+    return _concat_measurements([read_measurements_file(path) for path in data_paths])
@@ -0,0 +1,170 @@
+import itertools
+import json
+
+import numpy as np
+import pandas as pd
+
+from .costs import COST_BREAKDOWN_FILE_PATH, load_cost_components
+from .profiling import profiled
+from .utils import assign_apply_destroy_cycles
+
+# Pricing scenario applied to the cost components of the infracost breakdown:
+#   'region_factor'  Price level of the region relative to the breakdown's region (default 1.0).
+#   'discounts'      Pattern -> fraction off, e.g. {'aws_eks_node_group': 0.7} for spot instances.
+#   'substitutions'  Pattern -> hourly cost in the breakdown's region replacing the matched components,
+#                    e.g. {'db.t3.micro': 0.082} for a db.t3.small instead.
+# Patterns match a resource type exactly or a part of the cost component name, e.g. an instance type.
+# Substitutions are applied first, then discounts and the region factor.
+BASELINE_SCENARIO = {'name': 'baseline', 'region_factor': 1.0, 'discounts': {}, 'substitutions': {}}
+# Entries billed for the infrastructure: dynamic test cases, without the deploy and destroy phases,
+# whose runtime is billed to the test cases of their apply-destroy cycle
+BILLED_TEST_APPROACHES = [5, 6]
+UNBILLED_TEST_TOOLS = ['terraform apply', 'terraform destroy']
+
+
+def scenario_grid(regions=None, discounts=None, substitutions=None):
+    """
+    Creates the scenarios of all combinations of regions, discounts and substitutions.
+
+    :param regions: Optional; dictionary of region name -> region factor (default is the breakdown's region).
+    :param discounts: Optional; dictionary of discount name -> discounts (default is on-demand prices).
+    :param substitutions: Optional; dictionary of substitution name -> substitutions (default is none).
+    :return: A list of scenarios named 'region/discount/substitution', e.g. 'eu-central-1/spot/db.t3.small'.
+    """
+    regions = regions or {'breakdown': 1.0}
+    discounts = discounts or {'on-demand': {}}
+    substitutions = substitutions or {'none': {}}
+    return [{'name': f"{region}/{discount}/{substitution}",
+             'region_factor': regions[region],
+             'discounts': discounts[discount],
+             'substitutions': substitutions[substitution]}
+            for region, discount, substitution in itertools.product(regions, discounts, substitutions)]
+
+
+def load_scenarios(scenarios_path):
+    """
+    Loads pricing scenarios from a JSON file with a list of 'scenarios' and/or a 'grid'
+    with the keys 'regions', 'discounts' and 'substitutions', see scenario_grid:
+
+        {"grid": {"regions": {"us-east-1": 1.0, "eu-central-1": 1.16},
+                  "discounts": {"on-demand": {}, "spot": {"aws_eks_node_group": 0.7}}}}
+
+    :param scenarios_path: Path to the JSON file.
+    :return: A list of scenarios, the explicit scenarios first.
+    """
+    with open(scenarios_path, 'r') as file:
+        definition = json.load(file)
+    scenarios = [{**BASELINE_SCENARIO, **scenario} for scenario in definition.get('scenarios', [])]
+    if 'grid' in definition:
+        scenarios += scenario_grid(**definition['grid'])
+    names = [scenario['name'] for scenario in scenarios]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Scenario names in {scenarios_path} must be unique")
+    return scenarios
+
+
+def _matches(components, pattern, masks):
+    # Components matched by a pattern are looked up once for all scenarios
+    if pattern not in masks:
+        masks[pattern] = ((components['resource_type'] == pattern)
+                          | components['component'].str.contains(pattern, regex=False)).to_numpy()
+    return masks[pattern]
+
+
+def rate_matrix(scenarios, breakdown_path=COST_BREAKDOWN_FILE_PATH):
+    """
+    Calculates the hourly rate of every cost component of the breakdown in every scenario.
+
+    :param scenarios: A list of scenarios, see BASELINE_SCENARIO.
+    :param breakdown_path: Path to the infracost breakdown JSON file.
+    :return: A pandas DataFrame with one row per cost component (indexed as load_cost_components)
+             and one column of hourly rates in USD per scenario.
+    """
+    components = load_cost_components(breakdown_path)
+    hourly_costs = components['hourly_cost'].to_numpy()
+    rates = np.empty((len(components), len(scenarios)))
+    masks = {}
+    for column, scenario in enumerate(scenarios):
+        region_factor = scenario.get('region_factor', 1.0)
+        if region_factor <= 0:
+            raise ValueError(f"Region factor of scenario '{scenario['name']}' must be positive")
+        scenario_rates = hourly_costs.copy()
+        for pattern, hourly_cost in scenario.get('substitutions', {}).items():
+            mask = _matches(components, pattern, masks)
+            if not mask.any():
+                raise ValueError(f"Substitution '{pattern}' of scenario '{scenario['name']}' matches no component")
+            scenario_rates[mask] = hourly_cost
+        for pattern, discount in scenario.get('discounts', {}).items():
+            if not 0 <= discount < 1:
+                raise ValueError(f"Discount '{pattern}' of scenario '{scenario['name']}' must be between 0 and 1")
+            scenario_rates[_matches(components, pattern, masks)] *= 1 - discount
+        rates[:, column] = scenario_rates * region_factor
+    return pd.DataFrame(rates, index=components.index, columns=[scenario['name'] for scenario in scenarios])
+
+
+def billed_entries(data):
+    """
+    Returns which entries are billed for the infrastructure, see BILLED_TEST_APPROACHES.
+    Static test stages run without deployed infrastructure and carry no infrastructure costs.
+
+    :param data: A pandas DataFrame with time series data.
+    :return: A numpy boolean array.
+    """
+    return (data['test_approach'].isin(BILLED_TEST_APPROACHES).to_numpy()
+            & ~data['test_tool'].isin(UNBILLED_TEST_TOOLS).to_numpy())
+
+
+def billed_runtimes(data):
+    """
+    Returns the runtime each entry is billed for and the number of entries sharing these costs.
+    Test cases of an apply-destroy cycle share the runtime of the whole cycle, including the
+    'terraform apply' and 'terraform destroy' entries, other billed entries are billed for their own runtime.
+    Entries not billed for the infrastructure (see billed_entries), e.g. static test stages and
+    the 'terraform apply' and 'terraform destroy' entries themselves, have no billed runtime.
+
+    :param data: A pandas DataFrame with time series data, e.g. the flattened cycles with originals.
+    :return: A tuple of numpy arrays (billed runtime in seconds, NaN if not billed,
+             number of test cases sharing it) per entry.
+    """
+    cycle_ids = assign_apply_destroy_cycles(data)
+    runtimes = data['runtime(seconds)'].to_numpy(dtype=float)
+    members = cycle_ids >= 0
+    billed = runtimes.copy()
+    shares = np.ones(len(data))
+    if members.any():
+        cycle_runtimes = np.bincount(cycle_ids[members], weights=runtimes[members])
+        # Test cases of a cycle, without the 'terraform apply' and 'terraform destroy' entries
+        cycle_test_cases = np.maximum(np.bincount(cycle_ids[members]) - 2, 1)
+        billed[members] = cycle_runtimes[cycle_ids[members]]
+        shares[members] = cycle_test_cases[cycle_ids[members]]
+    billed[~billed_entries(data)] = np.nan
+    return billed, shares
+
+
+@profiled
+def price_scenarios(data, scenarios, breakdown_path=COST_BREAKDOWN_FILE_PATH, digits=5):
+    """
+    Calculates the costs of every entry in every pricing scenario with a single matrix product,
+    billing as calculate_costs: per second or per started hour depending on the resource type.
+    The baseline scenario reproduces the measured costs (up to rounding).
+    Entries not billed for the infrastructure, see billed_entries, have no costs (NaN), as in the measurements.
+
+    :param data: A pandas DataFrame with time series data, including the 'terraform apply' and
+                 'terraform destroy' entries of the cycles, e.g. the flattened cycles with originals.
+    :param scenarios: A list of scenarios, see BASELINE_SCENARIO.
+    :param breakdown_path: Path to the infracost breakdown JSON file.
+    :param digits: Number of digits to round the costs to (default is 5). None disables rounding.
+    :return: A pandas DataFrame with the index of the data and one column of costs in USD per scenario.
+    """
+    rates = rate_matrix(scenarios, breakdown_path)
+    billing = load_cost_components(breakdown_path)['billing']
+    # Hourly rates per billing modality and scenario (2 x scenarios)
+    billing_rates = np.stack([rates[billing == 'second'].sum().to_numpy(), rates[billing == 'hour'].sum().to_numpy()])
+    # Billed hours per entry and billing modality (entries x 2)
+    billed, shares = billed_runtimes(data.reset_index(drop=True))
+    hours = np.column_stack([billed / 3600, np.ceil(billed / 3600)]) / shares[:, None]
+    costs = hours @ billing_rates
+    if digits is not None:
+        costs = np.round(costs, digits)
+    return pd.DataFrame(costs, index=data.index, columns=rates.columns)
+
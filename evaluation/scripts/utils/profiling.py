@@ -0,0 +1,217 @@
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Profiling configuration, initialized from an environment variable:
+#   EVAL_PROFILE=1       Record stages and write the trace to the default path at exit.
+#   EVAL_PROFILE=<path>  Record stages and write the trace to the given path at exit.
+DEFAULT_TRACE_PATH = '../profile.json'
+PROFILE_CONFIG = {
+    'enabled': False,
+    'trace_path': None,
+    'write_at_exit': False
+}
+
+# Recorded stages in Chrome trace event format, viewable e.g. in chrome://tracing or Perfetto
+_events = []
+_stack = []
+_start_time = time.perf_counter()
+_exit_handler_registered = False
+
+
+def _max_rss_mb():
+    """
+    Returns the peak resident set size of the process so far in MB, None if unavailable.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is given in kilobytes on Linux and in bytes on macOS
+    return max_rss / 2 ** 20 if sys.platform == 'darwin' else max_rss / 2 ** 10
+
+
+def _rows(value):
+    """
+    Returns the number of rows of a DataFrame, Series or array, None for other values.
+    """
+    if hasattr(value, 'shape') and len(getattr(value, 'shape')) > 0:
+        return int(value.shape[0])
+    return None
+
+
+def enable_profiling(trace_path=DEFAULT_TRACE_PATH, write_at_exit=True):
+    """
+    Enables the recording of stages. At exit, the trace is written as JSON file
+    and a summary table is printed.
+
+    :param trace_path: Optional; path of the JSON trace file.
+    :param write_at_exit: Optional; whether to write the trace at exit, disabled in figure worker processes
+                          whose stages are sent to the main process instead.
+    """
+    global _exit_handler_registered
+    PROFILE_CONFIG['enabled'] = True
+    # Resolved now, as the working directory may change until exit
+    PROFILE_CONFIG['trace_path'] = os.path.abspath(trace_path)
+    PROFILE_CONFIG['write_at_exit'] = write_at_exit
+    if write_at_exit and not _exit_handler_registered:
+        atexit.register(_write_at_exit)
+        _exit_handler_registered = True
+
+
+def profiling_enabled():
+    return PROFILE_CONFIG['enabled']
+
+
+@contextmanager
+def stage(name, rows_in=None):
+    """
+    Context manager recording wall time, rows in and out and peak RSS of a stage, if profiling is enabled.
+    Set 'rows_out' of the yielded dictionary to record the rows produced by the stage.
+
+        with stage('collect_report') as record:
+            ...
+            record['rows_out'] = len(result)
+
+    :param name: The name of the stage, stages of the same name are summarized.
+    :param rows_in: Optional; the number of rows processed by the stage.
+    """
+    record = {'rows_in': rows_in, 'rows_out': None}
+    if not PROFILE_CONFIG['enabled']:
+        yield record
+        return
+    _stack.append(name)
+    max_rss_before = _max_rss_mb()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        end = time.perf_counter()
+        _stack.pop()
+        max_rss = _max_rss_mb()
+        _events.append({
+            'name': name,
+            'ph': 'X',
+            'ts': round((start - _start_time) * 1e6),
+            'dur': round((end - start) * 1e6),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': {
+                'parent': _stack[-1] if _stack else None,
+                'rows_in': record['rows_in'],
+                'rows_out': record['rows_out'],
+                'max_rss_mb': max_rss,
+                # Growth of the peak RSS shows the stages raising the memory peak
+                'max_rss_growth_mb': max_rss - max_rss_before if max_rss is not None else None
+            }
+        })
+
+
+def profiled(func=None, name=None):
+    """
+    Decorator recording every call of a function as stage, if profiling is enabled.
+    Rows in are taken from the first argument, rows out from the result.
+
+    :param func: The function to decorate.
+    :param name: Optional; the name of the stage (default is the qualified function name).
+    :return: The decorated function.
+    """
+    if func is None:
+        return functools.partial(profiled, name=name)
+    stage_name = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not PROFILE_CONFIG['enabled']:
+            return func(*args, **kwargs)
+        with stage(stage_name, rows_in=_rows(args[0]) if args else None) as record:
+            result = func(*args, **kwargs)
+            record['rows_out'] = _rows(result)
+        return result
+    return wrapper
+
+
+def take_events():
+    """
+    Returns and removes the recorded stages, e.g. to send them from a worker to the main process.
+    """
+    events = list(_events)
+    _events.clear()
+    return events
+
+
+def add_events(events):
+    """
+    Adds stages recorded in another process.
+    """
+    _events.extend(events)
+
+
+def summarize_events(events):
+    """
+    Summarizes stages by name.
+
+    :param events: Recorded stages, e.g. from take_events.
+    :return: A pandas DataFrame with calls, total and mean wall time, rows in and out and peak RSS per stage,
+             sorted by total wall time.
+    """
+    import pandas as pd
+    columns = ['stage', 'calls', 'total_s', 'mean_s', 'rows_in', 'rows_out', 'max_rss_mb']
+    if not events:
+        return pd.DataFrame(columns=columns)
+    frame = pd.DataFrame({
+        'stage': [event['name'] for event in events],
+        'seconds': [event['dur'] / 1e6 for event in events],
+        'rows_in': pd.to_numeric(pd.Series([event['args']['rows_in'] for event in events], dtype=object)),
+        'rows_out': pd.to_numeric(pd.Series([event['args']['rows_out'] for event in events], dtype=object)),
+        'max_rss_mb': pd.to_numeric(pd.Series([event['args']['max_rss_mb'] for event in events], dtype=object))
+    })
+    summary = frame.groupby('stage', sort=False).agg(
+        calls=('seconds', 'size'),
+        total_s=('seconds', 'sum'),
+        mean_s=('seconds', 'mean'),
+        rows_in=('rows_in', lambda rows: rows.sum(min_count=1)),
+        rows_out=('rows_out', lambda rows: rows.sum(min_count=1)),
+        max_rss_mb=('max_rss_mb', 'max')
+    ).reset_index()
+    return summary.sort_values('total_s', ascending=False, kind='stable')[columns]
+
+
+def write_trace(trace_path, events=None):
+    """
+    Writes stages as JSON trace in Chrome trace event format, with the summary per stage.
+
+    :param trace_path: Path of the JSON trace file.
+    :param events: Optional; the stages to write (default is all recorded stages).
+    :return: The summary, see summarize_events.
+    """
+    events = list(_events) if events is None else events
+    summary = summarize_events(events)
+    trace = {
+        'traceEvents': events,
+        'displayTimeUnit': 'ms',
+        'summary': json.loads(summary.to_json(orient='records'))
+    }
+    with open(trace_path, 'w') as file:
+        json.dump(trace, file)
+    return summary
+
+
+def _write_at_exit():
+    if not PROFILE_CONFIG['write_at_exit'] or not _events:
+        return
+    summary = write_trace(PROFILE_CONFIG['trace_path'])
+    print(f"\nProfile ({PROFILE_CONFIG['trace_path']}):")
+    print(summary.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+
+
+# Enable profiling from the environment
+_profile_env = os.environ.get('EVAL_PROFILE', '')
+if _profile_env and _profile_env.lower() not in ('0', 'false', 'no'):
+    enable_profiling(DEFAULT_TRACE_PATH if _profile_env.lower() in ('1', 'true', 'yes') else _profile_env)
@@ -0,0 +1,317 @@
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from .datasets import DERIVED_DATASETS, MEASUREMENTS, DatasetGraph
+from .labels import map_labels
+from .profiling import stage
+from .utils import (MAX_CYCLE_TEST_CASE, format_test_case_label, read_csv_to_dataframe, short_test_case_label,
+                    test_case_masks)
+
+# Columns with an index, filtered by value ('a,b' for several values) or inclusive range ('lo..hi', 'lo..', '..hi')
+INDEX_COLUMNS = ['build', 'revision', 'test_case', 'test_approach', 'test_tool']
+# Filter on the test case bitmasks: entries covering a test case, including the flattened apply-destroy cycles
+COVERS_KEY = 'covers'
+# Columns that can be aggregated
+VALUE_COLUMNS = ['runtime(seconds)', 'costs(USD)']
+# Aggregates besides quantiles given as 'p<percent>', e.g. 'p90'
+AGGREGATES = ['count', 'sum', 'mean', 'median', 'min', 'max', 'std']
+# Maximum number of rows returned by queries without aggregate
+DEFAULT_LIMIT = 50
+# Keys of a query besides the filters
+QUERY_KEYS = ['scope', 'value', 'agg', 'by', 'limit']
+QUERY_HELP = f"""Queries are 'key=value' pairs, e.g.
+  test_tool='terraform destroy' revision=2a3433a agg=median
+  scope=dynamic_tc test_case=9 build=300.. value=costs(USD) agg=sum,mean by=test_approach
+Keys:
+  scope    Dataset to query, see 'scopes' (default: {MEASUREMENTS}). The datasets apply the filters of the
+           evaluation scripts, e.g. static_tc excludes builds before 140, complete_data_sets builds without TC14.
+  {', '.join(INDEX_COLUMNS)}
+           Filter by value ('5,6' for several values) or inclusive range ('300..400', '300..', '..400').
+  {COVERS_KEY}   Entries covering a test case, including flattened apply-destroy cycles.
+  value    Column to aggregate, one of {', '.join(VALUE_COLUMNS)} (default: {VALUE_COLUMNS[0]}).
+  agg      Aggregates, e.g. 'median' or 'mean,p90', of: {', '.join(AGGREGATES)}, p<percent>.
+           Without aggregate, the matching rows are listed.
+  by       Columns to group the aggregates by, e.g. 'test_case,test_approach'.
+  limit    Maximum number of rows listed without aggregate (default: {DEFAULT_LIMIT})."""
+
+_range_pattern = re.compile(r'^(?P<low>[^.]*)\.\.(?P<high>[^.]*)$')
+_quantile_pattern = re.compile(r'^p(?P<percent>\d+(\.\d+)?)$')
+
+
+class ColumnIndex:
+    """
+    Positions of the rows of a column, sorted by value, to look values and ranges up by binary search
+    instead of comparing all rows. Columns that are not numeric (e.g. revision) are indexed by the codes
+    of their values, so they support lookups by value but not by range.
+    """
+
+    def __init__(self, values):
+        """
+        :param values: A pandas Series with the values of the column.
+        """
+        self.numeric = pd.api.types.is_numeric_dtype(values)
+        if self.numeric:
+            keys = values.to_numpy()
+            self.codes = None
+        else:
+            keys, uniques = pd.factorize(values)
+            self.codes = {value: code for code, value in enumerate(uniques)}
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def _key(self, value):
+        if self.numeric:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Expected a number, got '{value}'") from None
+        return self.codes.get(value, -2)
+
+    def lookup(self, values):
+        """
+        Returns the positions of the rows with one of several values.
+
+        :param values: A list of values, numeric columns accept numbers or numeric strings.
+        :return: A sorted numpy array of row positions.
+        """
+        positions = []
+        for value in values:
+            key = self._key(value)
+            start = np.searchsorted(self.sorted_keys, key, side='left')
+            stop = np.searchsorted(self.sorted_keys, key, side='right')
+            positions.append(self.order[start:stop])
+        return np.unique(np.concatenate(positions)) if positions else np.empty(0, np.int64)
+
+    def range(self, low=None, high=None):
+        """
+        Returns the positions of the rows with values in an inclusive range.
+
+        :param low: Optional; the lowest value included.
+        :param high: Optional; the highest value included.
+        :return: A sorted numpy array of row positions.
+        """
+        if not self.numeric:
+            raise ValueError('Ranges are only supported for numeric columns')
+        start = 0 if low is None else np.searchsorted(self.sorted_keys, self._key(low), side='left')
+        stop = len(self.sorted_keys) if high is None else np.searchsorted(self.sorted_keys, self._key(high), side='right')
+        return np.sort(self.order[start:max(start, stop)])
+
+
+class ScopeIndex:
+    """
+    A dataset of the measurements with an index per column in INDEX_COLUMNS.
+    The cycle bitmasks of the test cases are calculated once for 'covers' filters.
+    """
+
+    def __init__(self, data):
+        """
+        :param data: The pandas DataFrame of the dataset, not modified.
+        """
+        self.data = data
+        self.columns = {column: ColumnIndex(data[column]) for column in INDEX_COLUMNS if column in data}
+        self.test_case_masks = test_case_masks(data['test_case'])
+
+    def __len__(self):
+        return len(self.data)
+
+    def select(self, filters):
+        """
+        Returns the positions of the rows matching all filters, see parse_query.
+
+        :param filters: A dictionary of column -> ('values', list) or ('range', (low, high)).
+        :return: A sorted numpy array of row positions.
+        """
+        positions = None
+        # The most selective filters are not known upfront, so the filters are intersected in the given order
+        for column, (kind, argument) in filters.items():
+            if column == COVERS_KEY:
+                if kind == 'range':
+                    raise ValueError(f"'{COVERS_KEY}' expects test cases, not a range")
+                mask = 0
+                for test_case in argument:
+                    if not 0 <= int(test_case) <= MAX_CYCLE_TEST_CASE:
+                        raise ValueError(f"'{COVERS_KEY}' supports test cases from 0 to {MAX_CYCLE_TEST_CASE}")
+                    mask |= 1 << int(test_case)
+                matches = np.flatnonzero(self.test_case_masks & mask)
+            elif column not in self.columns:
+                raise ValueError(f"Column '{column}' is not indexed in this scope")
+            elif kind == 'range':
+                matches = self.columns[column].range(*argument)
+            else:
+                matches = self.columns[column].lookup(argument)
+            positions = matches if positions is None else np.intersect1d(positions, matches, assume_unique=True)
+            if len(positions) == 0:
+                break
+        return np.arange(len(self.data)) if positions is None else positions
+
+
+def _parse_filter(value):
+    match = _range_pattern.match(value)
+    if match:
+        return 'range', (match.group('low') or None, match.group('high') or None)
+    return 'values', value.split(',')
+
+
+def parse_query(pairs):
+    """
+    Parses a query given as 'key=value' strings or as dictionary, see QUERY_HELP.
+
+    :param pairs: A list of 'key=value' strings (e.g. split by shlex) or a dictionary of key -> value.
+    :return: A dictionary with the keys 'scope', 'filters', 'value', 'agg', 'by' and 'limit'.
+    """
+    if not isinstance(pairs, dict):
+        items = {}
+        for pair in pairs:
+            key, separator, value = pair.partition('=')
+            if not separator:
+                raise ValueError(f"Expected 'key=value', got '{pair}'")
+            items[key.strip()] = value.strip()
+        pairs = items
+
+    query = {'scope': MEASUREMENTS, 'filters': {}, 'value': VALUE_COLUMNS[0], 'agg': [], 'by': [],
+             'limit': DEFAULT_LIMIT}
+    for key, value in pairs.items():
+        if key in INDEX_COLUMNS or key == COVERS_KEY:
+            query['filters'][key] = _parse_filter(value)
+        elif key in ('scope', 'value'):
+            query[key] = value
+        elif key in ('agg', 'by'):
+            query[key] = [item.strip() for item in value.split(',') if item.strip()]
+        elif key == 'limit':
+            query[key] = int(value)
+        else:
+            raise ValueError(f"Unknown key '{key}', expected one of {INDEX_COLUMNS + [COVERS_KEY] + QUERY_KEYS}")
+
+    if query['value'] not in VALUE_COLUMNS:
+        raise ValueError(f"Unknown value '{query['value']}', expected one of {VALUE_COLUMNS}")
+    for aggregate in query['agg']:
+        if aggregate not in AGGREGATES and not _quantile_pattern.match(aggregate):
+            raise ValueError(f"Unknown aggregate '{aggregate}', expected one of {AGGREGATES} or p<percent>")
+    if query['by'] and not query['agg']:
+        raise ValueError("Grouping with 'by' requires an aggregate")
+    return query
+
+
+def _label_test_cases(result):
+    # Test cases are output as labels, e.g. 'TC4,7,9 (TA5)' instead of the bitmask of a cycle
+    if 'test_case' not in result.columns:
+        return result
+    if 'test_approach' in result.columns:
+        labels = map_labels(result, ['test_case', 'test_approach'], format_test_case_label)
+    else:
+        labels = map_labels(result, ['test_case'], short_test_case_label)
+    result = result.drop(columns='test_case')
+    result.insert(0, 'label', labels.to_numpy())
+    return result
+
+
+def _aggregate(values, aggregate):
+    match = _quantile_pattern.match(aggregate)
+    if match:
+        return values.quantile(float(match.group('percent')) / 100)
+    return values.agg(aggregate)
+
+
+class QueryService:
+    """
+    Answers filter and aggregate queries over the measurements, loaded once.
+
+    The datasets of the evaluation scripts are the scopes of the queries, so queries apply the same filters,
+    e.g. the build 140 cut-off of the static test cases or the TC14 rule of complete data sets.
+    Scopes are indexed on their first query. The measurements are reloaded if the CSV file changed.
+    """
+
+    def __init__(self, data_path):
+        """
+        :param data_path: Path to the merged measurements CSV file.
+        """
+        self.data_path = data_path
+        self.datasets = None
+        self.file_state = None
+        self._scopes = {}
+        self.refresh()
+
+    def refresh(self):
+        """
+        Reloads the measurements and drops all indexes if the CSV file changed since it was loaded.
+
+        :return: Whether the measurements were reloaded.
+        """
+        stat = os.stat(self.data_path)
+        file_state = (stat.st_size, stat.st_mtime_ns)
+        if file_state == self.file_state:
+            return False
+        data = read_csv_to_dataframe(self.data_path)
+        if data is None:
+            raise ValueError(f"Measurements could not be read from {self.data_path}")
+        if self.datasets is None:
+            self.datasets = DatasetGraph(data)
+        else:
+            self.datasets.set_input(data)
+        self.file_state = file_state
+        self._scopes.clear()
+        return True
+
+    @staticmethod
+    def scope_names():
+        """
+        Returns the names of the datasets that can be queried.
+        """
+        return [MEASUREMENTS] + [name for name in DERIVED_DATASETS if name != 'build_index']
+
+    def scope(self, name):
+        """
+        Returns the index of a dataset, computing the dataset and its index if not yet done.
+
+        :param name: The name of the dataset, see scope_names.
+        :return: The ScopeIndex of the dataset.
+        """
+        if name not in self._scopes:
+            if name not in self.scope_names():
+                raise ValueError(f"Unknown scope '{name}', expected one of {self.scope_names()}")
+            with stage('query_index:' + name):
+                # The measurements are indexed sorted by build, as all datasets derived from them
+                data = self.datasets['build_index'].data if name == MEASUREMENTS else self.datasets[name]
+                self._scopes[name] = ScopeIndex(data)
+        return self._scopes[name]
+
+    def query(self, query):
+        """
+        Answers a query.
+
+        :param query: A query as returned by parse_query, or its 'key=value' pairs.
+        :return: A tuple (result, matches): the aggregates per group (or the matching rows, up to the limit)
+                 as pandas DataFrame and the number of matching rows. Test cases are replaced by their labels
+                 in the column 'label', with the test approach if it is a column of the result.
+        """
+        if not isinstance(query, dict) or 'filters' not in query:
+            query = parse_query(query)
+        self.refresh()
+        scope = self.scope(query['scope'])
+        with stage('query', rows_in=len(scope)):
+            positions = scope.select(query['filters'])
+            rows = scope.data.iloc[positions]
+            if not query['agg']:
+                return _label_test_cases(rows.head(query['limit']).reset_index(drop=True)), len(rows)
+
+            values = rows.groupby(query['by'], sort=True)[query['value']] if query['by'] else rows[query['value']]
+            result = pd.DataFrame({aggregate: _aggregate(values, aggregate) for aggregate in query['agg']},
+                                  index=None if query['by'] else [0])
+            return _label_test_cases(result.reset_index()) if query['by'] else result, len(rows)
+
+
+def timed_query(service, query):
+    """
+    Answers a query and measures its wall time, e.g. for the query server.
+
+    :param service: The QueryService.
+    :param query: A query, see QueryService.query.
+    :return: A tuple (result, matches, milliseconds).
+    """
+    start = time.perf_counter()
+    result, matches = service.query(query)
+    return result, matches, (time.perf_counter() - start) * 1000
@@ -0,0 +1,88 @@
+import os
+
+import matplotlib
+
+from .profiling import stage
+
+# Supported output formats for figures
+FIGURE_FORMATS = ('png', 'svg', 'pdf')
+
+# Render configuration, initialized from environment variables:
+#   EVAL_HEADLESS=1      Use a non-interactive backend and never show figures.
+#   EVAL_FIGURE_DPI      Resolution of raster output (default: 300).
+#   EVAL_FIGURE_FORMAT   Output format, one of png, svg, pdf (default: png).
+RENDER_CONFIG = {
+    'headless': os.environ.get('EVAL_HEADLESS', '').lower() in ('1', 'true', 'yes'),
+    'dpi': int(os.environ.get('EVAL_FIGURE_DPI', 300)),
+    'format': os.environ.get('EVAL_FIGURE_FORMAT', 'png').lower()
+}
+
+# Paths of the figures saved since the last call of take_saved_paths
+_saved_paths = []
+
+
+def configure_rendering(headless=None, dpi=None, figure_format=None):
+    """
+    Updates the render configuration. Arguments that are None keep their current value.
+    Headless mode switches matplotlib to the non-interactive Agg backend.
+
+    :param headless: Optional; whether figures are only saved and never shown.
+    :param dpi: Optional; resolution of raster output.
+    :param figure_format: Optional; output format, one of FIGURE_FORMATS.
+    :return: A copy of the resulting render configuration.
+    """
+    if figure_format is not None:
+        figure_format = figure_format.lower()
+        if figure_format not in FIGURE_FORMATS:
+            raise ValueError(f"Unsupported figure format '{figure_format}', expected one of {FIGURE_FORMATS}")
+        RENDER_CONFIG['format'] = figure_format
+    if dpi is not None:
+        RENDER_CONFIG['dpi'] = int(dpi)
+    if headless is not None:
+        RENDER_CONFIG['headless'] = bool(headless)
+    if RENDER_CONFIG['headless']:
+        matplotlib.use('Agg')
+    return dict(RENDER_CONFIG)
+
+
+def figure_extension():
+    """
+    Returns the file extension of figures in the configured format, e.g. '.png'.
+    """
+    return '.' + RENDER_CONFIG['format']
+
+
+def save_figure(output_path, fig=None):
+    """
+    Saves a figure in the configured format and resolution.
+    In headless mode the figure is closed afterwards to release its memory,
+    otherwise it is shown.
+
+    :param output_path: Path of the output file. Its extension is replaced by the configured format.
+    :param fig: Optional; the figure to save (default is the current figure).
+    :return: The path of the saved file.
+    """
+    from matplotlib import pyplot as plt
+    fig = fig or plt.gcf()
+    output_path = os.path.splitext(output_path)[0] + figure_extension()
+    with stage('savefig'):
+        fig.savefig(output_path, dpi=RENDER_CONFIG['dpi'], bbox_inches='tight', format=RENDER_CONFIG['format'])
+    _saved_paths.append(output_path)
+    if RENDER_CONFIG['headless']:
+        plt.close(fig)
+    else:
+        plt.show()
+    return output_path
+
+
+def take_saved_paths():
+    """
+    Returns and clears the paths of the figures saved since the last call, e.g. to record the outputs of a figure job.
+    """
+    paths = list(_saved_paths)
+    _saved_paths.clear()
+    return paths
+
+
+# Apply the backend of the initial configuration
+configure_rendering()
@@ -0,0 +1,117 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .artifacts import ARTIFACT_CACHE_CONFIG, ArtifactManifest, artifact_key, content_hash
+from .rendering import RENDER_CONFIG, configure_rendering, take_saved_paths
+from .latex import LatexWriter
+from .profiling import PROFILE_CONFIG, add_events, enable_profiling, profiled, stage, take_events
+from .utils import write_latex
+
+
+def _init_figure_worker(render_config, profile_config):
+    """
+    Initializes a worker process for rendering figures without a display.
+    """
+    configure_rendering(headless=True, dpi=render_config['dpi'], figure_format=render_config['format'])
+    if profile_config['enabled']:
+        # Stages are sent to the main process, stages inherited from it are dropped
+        enable_profiling(profile_config['trace_path'], write_at_exit=False)
+        take_events()
+
+
+def _render_figure(func, kwargs):
+    """
+    Renders a single figure in a worker process and releases it afterwards.
+
+    :return: A tuple (paths of the saved figures, stages recorded while rendering if profiling is enabled).
+    """
+    from matplotlib import pyplot as plt
+    take_saved_paths()
+    try:
+        with stage('figure:' + func.__name__):
+            func(**kwargs)
+    finally:
+        plt.close('all')
+    return take_saved_paths(), take_events()
+
+
+def _figure_id(func, kwargs):
+    return f"figure:{func.__module__}.{func.__qualname__}:{os.path.abspath(kwargs.get('output_path', ''))}"
+
+
+def run_figure_jobs(figure_jobs, workers=None):
+    """
+    Renders figures, either one after another in the current process or in parallel in a process pool.
+    Worker processes always render headless, using the current dpi and format configuration.
+    Figures whose inputs, settings and code are unchanged since they were saved are not rendered again,
+    see utils/artifacts.py.
+
+    :param figure_jobs: List of (function, kwargs) tuples. Each function renders and saves one figure.
+                        Functions must be defined at module level to be sent to worker processes.
+    :param workers: Optional; number of worker processes. 1 renders in the current process,
+                    None uses one worker per CPU core (default is None).
+    """
+    manifest = ArtifactManifest() if ARTIFACT_CACHE_CONFIG['enabled'] else None
+    keys = []
+    if manifest is not None:
+        settings = {'dpi': RENDER_CONFIG['dpi'], 'format': RENDER_CONFIG['format']}
+        keys = [artifact_key(func, kwargs, settings) for func, kwargs in figure_jobs]
+        jobs = [(func, kwargs, key) for (func, kwargs), key in zip(figure_jobs, keys)
+                if not manifest.is_current(_figure_id(func, kwargs), key)]
+    else:
+        jobs = [(func, kwargs, None) for func, kwargs in figure_jobs]
+
+    try:
+        if workers == 1 or len(jobs) <= 1:
+            for func, kwargs, key in jobs:
+                take_saved_paths()
+                with stage('figure:' + func.__name__):
+                    func(**kwargs)
+                if manifest is not None:
+                    manifest.record(_figure_id(func, kwargs), key, take_saved_paths())
+            return
+
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_figure_worker,
+                                 initargs=(dict(RENDER_CONFIG), dict(PROFILE_CONFIG))) as executor:
+            futures = [executor.submit(_render_figure, func, kwargs) for func, kwargs, _ in jobs]
+            # Raise the first error, if any, after all jobs are submitted
+            for (func, kwargs, key), future in zip(jobs, futures):
+                saved_paths, events = future.result()
+                add_events(events)
+                if manifest is not None:
+                    manifest.record(_figure_id(func, kwargs), key, saved_paths)
+    finally:
+        # Figures rendered before an error are kept in the cache
+        if manifest is not None:
+            manifest.save()
+
+
+@profiled
+def write_latex_entries(latex_entries, output_file='../output.tex'):
+    """
+    Writes LaTeX tables and figure boilerplate in the given order.
+    The output file is read once and written once for all entries.
+    Entries whose inputs and code are unchanged since they were written are kept as they are,
+    the file is not written if all entries are unchanged.
+
+    :param latex_entries: List of kwargs for write_latex.
+    :param output_file: The file path for the output LaTeX file.
+    """
+    manifest = ArtifactManifest() if ARTIFACT_CACHE_CONFIG['enabled'] else None
+    with LatexWriter(output_file) as writer:
+        for entry in latex_entries:
+            if manifest is None:
+                write_latex(writer=writer, **entry)
+                continue
+            block_type = 'figure' if entry.get('data') is None and entry.get('summary') is None else 'table'
+            entry_id = f"latex:{os.path.abspath(output_file)}:{block_type}:{entry['label']}"
+            # Figure entries refer to the file extension of the configured format
+            key = artifact_key(write_latex, entry, {'format': RENDER_CONFIG['format']})
+            content = writer.get(block_type, entry['label'])
+            if content is not None and manifest.is_current(entry_id, key, content_hash(content)):
+                continue
+            write_latex(writer=writer, **entry)
+            manifest.record(entry_id, key, content_hash=content_hash(writer.get(block_type, entry['label'])))
+    if manifest is not None:
+        manifest.save()
@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+
+from .statistics import STATISTICS
+
+# Default size parameter k of the quantile sketches
+DEFAULT_SKETCH_SIZE = 200
+# Capacity decay from one compactor level to the next lower one, as proposed for KLL sketches
+CAPACITY_DECAY = 2 / 3
+
+
+def rank_error_bound(k=DEFAULT_SKETCH_SIZE):
+    """
+    Returns the normalized rank error of quantiles estimated by a sketch of size k,
+    which holds with a probability of 99% (empirical fit of the Apache DataSketches KLL sketch,
+    whose compaction scheme QuantileSketch follows). E.g. about 1.33% for k=200:
+    the true rank of an estimated median lies between 48.67% and 51.33% of the values.
+
+    :param k: The sketch size parameter.
+    :return: The normalized rank error as fraction of the number of values.
+    """
+    return 2.296 / k ** 0.9723
+
+
+class QuantileSketch:
+    """
+    Mergeable KLL quantile sketch of a stream of values.
+
+    Values are kept in compactor levels, each item of level h representing 2^h values.
+    A full level is sorted and every other item (random offset) is promoted to the next level.
+    Memory is bounded by about 3k items, independent of the number of values.
+
+    While no compaction took place (at most k values), quantiles are exact and interpolated
+    linearly as by pandas. Afterwards, the rank of an estimated quantile deviates from the
+    requested rank by at most rank_error_bound(k) of the number of values with 99% probability.
+    Count, mean, standard deviation, min and max are always exact (up to floating point error).
+
+    Sketches are mergeable: merging the sketches of several builds or shards gives a sketch of
+    all their values with the same error bound. Use to_dict and from_dict to store or send them.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_SIZE, seed=0):
+        """
+        :param k: Optional; the size parameter, larger values give smaller errors (default is 200).
+        :param seed: Optional; seed of the random compaction offsets, for reproducible results.
+        """
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def exact(self):
+        """
+        True while the sketch holds all values, i.e. no compaction took place.
+        """
+        return len(self.levels) == 1
+
+    def update(self, values):
+        """
+        Adds values to the sketch. NaN values are skipped.
+
+        :param values: An array-like of numbers.
+        :return: The sketch.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self._add_moments(len(values), values.mean(), ((values - values.mean()) ** 2).sum(),
+                          values.min(), values.max())
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Merges another sketch into this one.
+
+        :param other: A QuantileSketch, not modified.
+        :return: The sketch.
+        """
+        if other.count == 0:
+            return self
+        self._add_moments(other.count, other.mean, other.m2, other.min, other.max)
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self._compress()
+        return self
+
+    def _add_moments(self, count, mean, m2, minimum, maximum):
+        # Combine count, mean and sum of squared deviations of two sets (Chan et al.)
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.min = np.fmin(self.min, minimum)
+        self.max = np.fmax(self.max, maximum)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * CAPACITY_DECAY ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item stays on its level, every other of the remaining items is promoted
+                odd = len(items) % 2
+                offset = self._rng.integers(2)
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate((self.levels[level + 1], items[odd + offset::2]))
+            level += 1
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level_items), 2 ** level)
+                                  for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        """
+        Estimates quantiles of the values.
+
+        :param q: A quantile or an array-like of quantiles between 0 and 1.
+        :return: The estimated quantile(s), NaN for an empty sketch.
+        """
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        if self.exact:
+            return np.quantile(self.levels[0], q)
+        items, weights = self._weighted_items()
+        # The item whose cumulative weight covers the requested 0-based rank
+        ranks = np.asarray(q, dtype=float) * (self.count - 1)
+        result = items[np.minimum(np.searchsorted(np.cumsum(weights), ranks, side='right'), len(items) - 1)]
+        result = np.clip(result, self.min, self.max)
+        return result if np.ndim(q) else float(result)
+
+    def std(self):
+        """
+        Returns the sample standard deviation of the values, NaN for less than two values.
+        """
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def box_statistics(self, whis=1.5):
+        """
+        Calculates box plot statistics in the format of matplotlib.cbook.boxplot_stats, for Axes.bxp.
+
+        Whiskers extend to the most extreme retained item within whis times the IQR from the box.
+        Retained items outside the whiskers, including the exact min and max, are shown as fliers,
+        so fliers are a sample of the outliers once the sketch is compacted.
+        While the sketch is exact, the statistics equal those of plt.boxplot.
+
+        :param whis: Optional; the whisker length as multiple of the IQR (default is 1.5).
+        :return: A dictionary with the keys 'mean', 'med', 'q1', 'q3', 'iqr', 'cilo', 'cihi',
+                 'whislo', 'whishi' and 'fliers'.
+        """
+        if self.count == 0:
+            return {**dict.fromkeys(['mean', 'med', 'q1', 'q3', 'iqr', 'cilo', 'cihi', 'whislo', 'whishi'], np.nan),
+                    'fliers': np.empty(0)}
+        q1, med, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        items = np.unique(np.concatenate(self.levels + [np.array([self.min, self.max])]))
+        # Same rules as matplotlib, the whiskers never end inside the box
+        below = items[items <= q3 + whis * iqr]
+        above = items[items >= q1 - whis * iqr]
+        whishi = below.max() if len(below) and below.max() >= q3 else q3
+        whislo = above.min() if len(above) and above.min() <= q1 else q1
+        # Fliers with their multiplicity and in order of insertion while the sketch is exact
+        values = self.levels[0] if self.exact else items
+        notch = 1.57 * iqr / np.sqrt(self.count)
+        return {
+            'mean': self.mean,
+            'med': med,
+            'q1': q1,
+            'q3': q3,
+            'iqr': iqr,
+            'cilo': med - notch,
+            'cihi': med + notch,
+            'whislo': whislo,
+            'whishi': whishi,
+            'fliers': values[(values < whislo) | (values > whishi)]
+        }
+
+    def to_dict(self):
+        """
+        Returns the state of the sketch as JSON serializable dictionary, see from_dict.
+        """
+        return {
+            'k': self.k,
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': None if np.isnan(self.min) else float(self.min),
+            'max': None if np.isnan(self.max) else float(self.max),
+            'levels': [items.tolist() for items in self.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, state, seed=0):
+        """
+        Restores a sketch from the dictionary returned by to_dict.
+        """
+        sketch = cls(state['k'], seed)
+        sketch.count = state['count']
+        sketch.mean = state['mean']
+        sketch.m2 = state['m2']
+        sketch.min = np.nan if state['min'] is None else state['min']
+        sketch.max = np.nan if state['max'] is None else state['max']
+        sketch.levels = [np.asarray(items, dtype=float) for items in state['levels']]
+        return sketch
+
+
+def grouped_sketches(data, group_key, value_key, k=DEFAULT_SKETCH_SIZE, sketches=None):
+    """
+    Adds the values of every group to a quantile sketch per group.
+
+    :param data: Pandas DataFrame containing the data to be summarized.
+    :param group_key: Column name to group by, e.g. the label column.
+    :param value_key: Column name of the values to summarize.
+    :param k: Optional; the size parameter of new sketches.
+    :param sketches: Optional; a dictionary of group -> QuantileSketch to update, e.g. of previous chunks.
+    :return: The dictionary of group -> QuantileSketch, new groups in order of first appearance.
+    """
+    sketches = {} if sketches is None else sketches
+    for group, values in data.groupby(group_key, sort=False)[value_key]:
+        sketches.setdefault(group, QuantileSketch(k)).update(values.to_numpy())
+    return sketches
+
+
+def merge_sketches(sketch_dicts):
+    """
+    Merges dictionaries of group -> QuantileSketch, e.g. of several builds or shards.
+
+    :param sketch_dicts: An iterable of dictionaries of group -> QuantileSketch, not modified.
+    :return: A dictionary of group -> merged QuantileSketch, groups in order of first appearance.
+    """
+    merged = {}
+    for sketches in sketch_dicts:
+        for group, sketch in sketches.items():
+            merged.setdefault(group, QuantileSketch(sketch.k)).merge(sketch)
+    return merged
+
+
+def sketch_statistics(sketches, group_key=None):
+    """
+    Calculates the statistics of the summary tables from quantile sketches, in the format of
+    grouped_statistics. Median, Q1, Q3 and IQR are estimated, see QuantileSketch for the error bound.
+
+    :param sketches: A dictionary of group -> QuantileSketch.
+    :param group_key: Optional; the name of the index.
+    :return: A pandas DataFrame with one row per group, in the order of the dictionary,
+             indexed by the groups and with one column per statistic in STATISTICS.
+    """
+    rows = []
+    for sketch in sketches.values():
+        q1, median, q3 = sketch.quantile([0.25, 0.5, 0.75])
+        rows.append({
+            'Mean': sketch.mean if sketch.count else np.nan,
+            'Median': median,
+            'Q1': q1,
+            'Q3': q3,
+            'IQR': q3 - q1,
+            'Min': sketch.min,
+            'Max': sketch.max,
+            'Std Dev': sketch.std()
+        })
+    result = pd.DataFrame(rows, index=pd.Index(list(sketches), name=group_key), columns=STATISTICS)
+    return result
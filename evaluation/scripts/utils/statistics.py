@@ -0,0 +1,36 @@
+import pandas as pd
+
+from .profiling import profiled
+
+# Statistics of the summary tables, in table column order
+STATISTICS = ['Mean', 'Median', 'Q1', 'Q3', 'IQR', 'Min', 'Max', 'Std Dev']
+
+
+@profiled
+def grouped_statistics(data, group_key, value_key):
+    """
+    Calculates Mean, Median, Q1, Q3, IQR, Min, Max and Std Dev of a column for every group
+    in a single groupby pass and a single quantile pass.
+
+    :param data: Pandas DataFrame containing the data to be summarized.
+    :param group_key: Column name to group by, e.g. the label column, or a list of column names.
+    :param value_key: Column name of the values to summarize.
+    :return: A tidy pandas DataFrame with one row per group, in order of first appearance,
+             indexed by the group values and with one column per statistic in STATISTICS.
+    """
+    grouped = data.groupby(group_key, sort=False)[value_key]
+    statistics = grouped.agg(['mean', 'min', 'max', 'std'])
+    quantiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+
+    result = pd.DataFrame({
+        'Mean': statistics['mean'],
+        'Median': quantiles[0.5],
+        'Q1': quantiles[0.25],
+        'Q3': quantiles[0.75],
+        'IQR': quantiles[0.75] - quantiles[0.25],
+        'Min': statistics['min'],
+        'Max': statistics['max'],
+        'Std Dev': statistics['std']
+    }, index=statistics.index)
+    result.index.names = group_key if isinstance(group_key, list) else [group_key]
+    return result[STATISTICS]
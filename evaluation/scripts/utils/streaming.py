@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import PYARROW_AVAILABLE
+from .utils import MEASUREMENT_COLUMN_TYPES, normalize_measurement_types
+
+# Default number of rows read per chunk in streaming mode
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+def read_measurement_chunks(data_path, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Reads a merged measurements CSV or Parquet file in chunks, with the same column types
+    as read_csv_to_dataframe.
+
+    :param data_path: Path to the CSV or Parquet (.parquet) file.
+    :param chunksize: Number of rows per chunk.
+    :return: A generator of pandas DataFrames.
+    """
+    if os.path.splitext(data_path)[1] == '.parquet':
+        if not PYARROW_AVAILABLE:
+            raise ImportError("Reading Parquet files requires pyarrow")
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(data_path).iter_batches(batch_size=chunksize):
+            yield normalize_measurement_types(batch.to_pandas())
+    else:
+        with pd.read_csv(data_path, dtype=MEASUREMENT_COLUMN_TYPES, chunksize=chunksize) as reader:
+            for chunk in reader:
+                yield normalize_measurement_types(chunk)
+
+
+def iter_build_chunks(chunks):
+    """
+    Realigns chunks of measurements to build boundaries, so every build is contained in exactly one chunk.
+    The rows of the last build of a chunk are carried over to the next chunk, as they may continue there.
+    Apply-destroy cycles and per build aggregations therefore never span a chunk boundary.
+
+    The rows of a build have to be contiguous, as written by collect_data.
+
+    :param chunks: An iterable of pandas DataFrames, e.g. from read_measurement_chunks.
+    :return: A generator of pandas DataFrames, each containing complete builds only.
+    :raises ValueError: If the rows of a build are not contiguous.
+    """
+    # Bitmap of the builds seen so far, grows with the highest build number
+    seen = np.zeros(0, dtype=bool)
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            carry = None
+            continue
+
+        builds = chunk['build'].to_numpy()
+        run_starts = np.concatenate(([0], np.flatnonzero(builds[1:] != builds[:-1]) + 1))
+        complete, carry = chunk.iloc[:run_starts[-1]], chunk.iloc[run_starts[-1]:]
+
+        # Every completed build has to appear in a single run of rows
+        run_builds = builds[run_starts[:-1]]
+        if len(run_builds):
+            if run_builds.max() >= len(seen):
+                seen = np.concatenate((seen, np.zeros(run_builds.max() + 1 - len(seen), dtype=bool)))
+            if seen[run_builds].any() or len(np.unique(run_builds)) != len(run_builds):
+                raise ValueError("The rows of a build are not contiguous, cannot stream the measurements")
+            seen[run_builds] = True
+            yield complete.reset_index(drop=True)
+
+    if carry is not None and not carry.empty:
+        last_build = carry['build'].iloc[0]
+        if last_build < len(seen) and seen[last_build]:
+            raise ValueError("The rows of a build are not contiguous, cannot stream the measurements")
+        yield carry.reset_index(drop=True)
+
+
+class RunningMean:
+    """
+    Mean of value columns per group, accumulated chunk by chunk from sums and counts.
+    Memory is bounded by the number of groups, independent of the number of rows added.
+    """
+
+    def __init__(self, group_keys, value_keys):
+        self.group_keys = list(group_keys)
+        self.value_keys = list(value_keys)
+        self.sums = None
+        self.counts = None
+
+    def add(self, data):
+        """
+        Adds the rows of a chunk. NaN values are skipped, as by pandas' mean.
+
+        :param data: A pandas DataFrame with the group and value columns.
+        """
+        if data.empty:
+            return
+        grouped = data.groupby(self.group_keys)[self.value_keys]
+        sums, counts = grouped.sum(), grouped.count()
+        if self.sums is None:
+            self.sums, self.counts = sums, counts
+        else:
+            self.sums = self.sums.add(sums, fill_value=0)
+            self.counts = self.counts.add(counts, fill_value=0)
+
+    def result(self):
+        """
+        Returns the means, in the format of data.groupby(group_keys)[value_keys].mean().reset_index().
+
+        :return: A pandas DataFrame with the group columns and the mean of each value column.
+        """
+        if self.sums is None:
+            return pd.DataFrame(columns=self.group_keys + self.value_keys)
+        means = (self.sums / self.counts).sort_index()
+        return means.reset_index()
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+# Columns of merged_measurements_3.csv
+MEASUREMENT_COLUMNS = ['build', 'defect_category', 'test_case', 'test_approach', 'test_tool', 'runtime(seconds)',
+                       'costs(USD)', 'revision', 'build_start', 'build_duration(hh:mm:ss)']
+
+# Placeholder for the test approach of dynamic rows, replaced by 5 or 6 per build
+DYNAMIC = 0
+# Rows of a build as (defect_category, test_case, test_approach, test_tool, mean runtime in seconds),
+# modeled after merged_measurements_3.csv. NaN marks 'NA'.
+STATIC_STAGES = [
+    (8, np.nan, 1, 'terraform fmt', 0.3),
+    (8, np.nan, 2, 'terraform validate', 2.5),
+    (6, np.nan, 3, 'tfsec', 1.5),
+    (2, 6, 4, 'pytest', 1.3),
+    (4, 10, 4, 'pytest', 1.3),
+    (6, 13, 4, 'pytest', 1.3),
+    (3, 8, 4, 'pytest', 1.5),
+    (1, 2, 4, 'terraform test', 2.4),
+    (1, 1, 4, 'terraform test', 5.4),
+    (2, 5, 4, 'terraform test', 1.5),
+]
+# Several test cases sharing one apply -> test cases -> destroy cycle, followed by standalone test cases
+DYNAMIC_CYCLE = [
+    (np.nan, np.nan, DYNAMIC, 'terraform apply', 900),
+    (3, 9, DYNAMIC, 'terraform test', 4),
+    (1, 4, DYNAMIC, 'terraform test', 3.5),
+    (2, 7, DYNAMIC, 'terraform test', 3.5),
+    (np.nan, np.nan, DYNAMIC, 'terraform destroy', 600),
+    (1, 3, DYNAMIC, 'terraform test', 1700),
+    (5, 11, DYNAMIC, 'terratest', 1550),
+]
+# Test case 14 marks complete data sets, see without_incomplete_data_sets
+DYNAMIC_TC14 = [(6, 14, DYNAMIC, 'terratest', 1450)]
+
+# Build kinds: static stages only, with dynamic cycle, with dynamic cycle and test case 14
+BUILD_TEMPLATES = [
+    STATIC_STAGES,
+    STATIC_STAGES + DYNAMIC_CYCLE,
+    STATIC_STAGES + DYNAMIC_CYCLE + DYNAMIC_TC14,
+]
+# Share of the build kinds, about as in merged_measurements_3.csv
+BUILD_KIND_SHARES = [0.81, 0.09, 0.10]
+# Share of dynamic builds using test approach 6 instead of 5
+TA6_SHARE = 0.25
+# Relative standard deviation of the runtimes
+RUNTIME_DEVIATION = 0.1
+# Costs of dynamic test cases as fixed part plus part per second of runtime, in USD
+COSTS_BASE = 0.0568
+COSTS_PER_SECOND = 7.2e-5
+# Overhead of a build in seconds besides the measured runtimes
+BUILD_OVERHEAD = 60
+# Number of builds per revision, on average
+BUILDS_PER_REVISION = 8
+# First build of merged_measurements_3.csv, the static data sets start after build 140
+FIRST_BUILD = 110
+
+
+def generate_measurements(rows, seed=0, first_build=FIRST_BUILD):
+    """
+    Generates synthetic measurements in the format of merged_measurements_3.csv.
+
+    Every build contains the static stages of test approaches 1-4. About every fifth build
+    also contains a dynamic apply -> test cases -> destroy cycle of test approach 5 or 6
+    followed by standalone dynamic test cases, about half of these including test case 14.
+    Runtimes are integer seconds around the means of the real measurements.
+    Only complete builds are generated, so the number of rows is at least the requested one
+    and exceeds it by less than the rows of one build.
+
+    :param rows: The number of rows to generate, e.g. 1_000 to 10_000_000.
+    :param seed: Optional; the random seed, the same seed gives the same measurements.
+    :param first_build: Optional; the number of the first build (default is 110, as in the real data).
+    :return: A pandas DataFrame with the columns MEASUREMENT_COLUMNS, NaN for 'NA'.
+    """
+    rng = np.random.default_rng(seed)
+    templates = pd.DataFrame([row for template in BUILD_TEMPLATES for row in template],
+                             columns=['defect_category', 'test_case', 'test_approach', 'test_tool', 'runtime'])
+    template_sizes = np.array([len(template) for template in BUILD_TEMPLATES])
+    template_offsets = np.concatenate(([0], np.cumsum(template_sizes)[:-1]))
+
+    # Draw enough builds, then cut after the build reaching the requested number of rows
+    n_builds = int(rows / (template_sizes * BUILD_KIND_SHARES).sum() * 1.1) + 10
+    kinds = rng.choice(len(BUILD_TEMPLATES), size=n_builds, p=BUILD_KIND_SHARES)
+    counts = template_sizes[kinds]
+    n_builds = min(int(np.searchsorted(np.cumsum(counts), rows)) + 1, n_builds)
+    kinds, counts = kinds[:n_builds], counts[:n_builds]
+    n_rows = int(counts.sum())
+
+    # Row i of a build is row i of its template
+    build_index = np.repeat(np.arange(n_builds), counts)
+    row_in_build = np.arange(n_rows) - np.repeat(np.cumsum(counts) - counts, counts)
+    template_rows = templates.iloc[template_offsets[kinds][build_index] + row_in_build].reset_index(drop=True)
+
+    approaches = template_rows['test_approach'].to_numpy().copy()
+    dynamic = approaches == DYNAMIC
+    build_approaches = np.where(rng.random(n_builds) < TA6_SHARE, 6, 5)
+    approaches[dynamic] = build_approaches[build_index[dynamic]]
+
+    means = template_rows['runtime'].to_numpy()
+    runtimes = np.maximum(np.rint(rng.normal(means, means * RUNTIME_DEVIATION)), 0).astype(np.int64)
+    has_costs = dynamic & template_rows['test_case'].notna().to_numpy()
+    costs = np.where(has_costs, np.round(COSTS_BASE + COSTS_PER_SECOND * runtimes, 5), np.nan)
+
+    # Build information: revisions change every few builds, builds start after the previous one ended
+    durations = np.bincount(build_index, weights=runtimes, minlength=n_builds).astype(np.int64) + BUILD_OVERHEAD
+    revision_ids = np.cumsum(rng.random(n_builds) < 1 / BUILDS_PER_REVISION)
+    revisions = np.char.mod('%07x', rng.integers(0, 16 ** 7, size=revision_ids.max() + 1))[revision_ids]
+    pauses = rng.integers(600, 6 * 3600, size=n_builds)
+    starts = pd.DatetimeIndex(pd.Timestamp('2023-11-01 08:00:00')
+                              + pd.to_timedelta(np.cumsum(durations + pauses) - durations - pauses, unit='s'))
+    # Timestamps as YYYYmmddHHMMSS and durations as hh:mm:ss, as written by collect_data
+    components = [starts.year, starts.month, starts.day, starts.hour, starts.minute, starts.second]
+    build_starts = sum(np.asarray(component, dtype=np.int64) * 10 ** exponent
+                       for component, exponent in zip(components, [10, 8, 6, 4, 2, 0]))
+    build_durations = (pd.Series(durations // 3600).astype(str).str.zfill(2)
+                       + ':' + pd.Series(durations // 60 % 60).astype(str).str.zfill(2)
+                       + ':' + pd.Series(durations % 60).astype(str).str.zfill(2)).to_numpy()
+
+    data = pd.DataFrame({
+        'build': first_build + build_index,
+        'defect_category': template_rows['defect_category'].astype('Int64'),
+        'test_case': template_rows['test_case'].astype('Int64'),
+        'test_approach': approaches,
+        'test_tool': template_rows['test_tool'],
+        'runtime(seconds)': runtimes,
+        'costs(USD)': costs,
+        'revision': revisions[build_index],
+        'build_start': build_starts[build_index],
+        'build_duration(hh:mm:ss)': build_durations[build_index]
+    })
+    return data[MEASUREMENT_COLUMNS]
+
+
+def write_measurements(output_path, rows, seed=0):
+    """
+    Writes synthetic measurements as CSV file in the format of merged_measurements_3.csv.
+
+    :param output_path: Path of the CSV file to write.
+    :param rows: The number of rows to generate, see generate_measurements.
+    :param seed: Optional; the random seed.
+    :return: The number of rows written.
+    """
+    data = generate_measurements(rows, seed)
+    data.to_csv(output_path, index=False, na_rep='NA')
+    return len(data)
@@ -1,40 +1,85 @@
 import pandas as pd
+import numpy as np
 import os
-import subprocess
 
-# Constants for script for cost calculation and cost breakdown file paths
-CALCULATE_COSTS_SCRIPT_PATH = '../../terraform/scripts/calculate_costs.py'
-COST_BREAKDOWN_FILE_PATH = '../../measurements/infracost_build_1.json'
+from .cache import PYARROW_AVAILABLE, file_fingerprint, load_cached_frame, store_cached_frame
+from .costs import COST_BREAKDOWN_FILE_PATH, calculate_costs
+from .latex import LatexWriter
+from .measurements import read_measurement_history
+from .profiling import profiled
+from .rendering import figure_extension
+from .statistics import STATISTICS, grouped_statistics
+
+# Column data types of the merged measurements
+MEASUREMENT_COLUMN_TYPES = {
+    'build': int,
+    'defect_category': float, # parse NA as NaN
+    'test_case':  float, # parse NA as NaN
+    'test_approach': int,
+    'test_tool': str,
+    'runtime(seconds)': float,
+    'costs(USD)': float,
+    'revision': str,
+    'build_start': int,
+    'build_duration(hh:mm:ss)': str
+}
+
+# Version of the parsing by read_csv_to_dataframe, stored with the cached frames together with the column types.
+# Increase after changing how the measurements are parsed or normalized, e.g. normalize_measurement_types.
+MEASUREMENTS_PARSER_VERSION = 1
+MEASUREMENTS_CACHE_SCHEMA = {
+    'parser_version': MEASUREMENTS_PARSER_VERSION,
+    'column_types': {column: column_type.__name__ for column, column_type in MEASUREMENT_COLUMN_TYPES.items()}
+}
+
+# The test case of a flattened apply-destroy cycle is this flag combined with the bitmask of its test cases,
+# e.g. MULTI_TEST_CASE_FLAG | 2**4 | 2**7 | 2**9 for TC4, TC7 and TC9. Cycles sort after single test cases.
+MULTI_TEST_CASE_FLAG = 1 << 62
+# Highest test case id representable in a cycle bitmask. Cycle test cases are kept in the int64 test_case
+# column instead of a multi-word representation, so cycles with higher ids are rejected instead of truncated.
+MAX_CYCLE_TEST_CASE = 61
+
+
+def normalize_measurement_types(df):
+    """
+    Converts 'defect_category' and 'test_case' of freshly parsed measurements to int,
+    replacing NaNs with a placeholder (-1).
+
+    :param df: A pandas DataFrame parsed with MEASUREMENT_COLUMN_TYPES.
+    :return: The DataFrame, modified in place.
+    """
+    df['defect_category'] = df['defect_category'].fillna(-1).astype(int)
+    df['test_case'] = df['test_case'].fillna(-1).astype(int)
+    return df
 
 
-def read_csv_to_dataframe(data_path):
+@profiled
+def read_csv_to_dataframe(data_path, use_cache=True):
     """
     Reads a CSV file into a pandas DataFrame with specified data types for each column.
+    The parsed frame is cached as Feather file next to the CSV file and reused as long as
+    the CSV file's size, mtime and content hash and the MEASUREMENTS_CACHE_SCHEMA are unchanged.
 
     :param data_path: The path to the CSV file to be read.
+    :param use_cache: Optional; whether to use and update the Feather cache (default is True).
     :return: A pandas DataFrame containing the parsed data.
     """
-    # Define column data types
-    column_types = {
-        'build': int,
-        'defect_category': float, # parse NA as NaN
-        'test_case':  float, # parse NA as NaN
-        'test_approach': int,
-        'test_tool': str,
-        'runtime(seconds)': float,
-        'costs(USD)': float,
-        'revision': str,
-        'build_start': int,
-        'build_duration(hh:mm:ss)': str
-    }
+    if use_cache:
+        df = load_cached_frame(data_path, MEASUREMENTS_CACHE_SCHEMA)
+        if df is not None:
+            return df
 
     try:
+        # Take the fingerprint before parsing, so a concurrent change invalidates the cache
+        fingerprint = file_fingerprint(data_path) if use_cache and PYARROW_AVAILABLE else None
+
         # Read the CSV file with specified data types
-        df = pd.read_csv(data_path, dtype=column_types)
+        df = pd.read_csv(data_path, dtype=MEASUREMENT_COLUMN_TYPES)
 
-        # Convert 'defect_category' and 'test_case' to int, replacing NaNs with a placeholder (e.g., -1)
-        df['defect_category'] = df['defect_category'].fillna(-1).astype(int)
-        df['test_case'] = df['test_case'].fillna(-1).astype(int)
+        df = normalize_measurement_types(df)
+
+        if use_cache:
+            store_cached_frame(data_path, df, fingerprint, MEASUREMENTS_CACHE_SCHEMA)
 
         return df
     except Exception as e:
@@ -43,136 +88,166 @@ def read_csv_to_dataframe(data_path):
     
 
 
+@profiled
 def without_incomplete_data_sets(original_data, test_case_value=14):
     """
     Filters out data sets from the DataFrame that do not contain a specified test_case value.
     By default, it filters out data sets that do not contain test_case=14.
+    The original DataFrame is not modified. For repeated filters, see BuildIndex.complete_data_sets.
 
     :param original_data: The original pandas DataFrame with time series data.
     :param test_case_value: The test_case value to filter data sets by (default is 14).
     :return: A pandas DataFrame containing only the data sets with the specified test_case value.
     """
-    # Convert 'test_case' column to numeric for proper filtering
-    original_data['test_case'] = pd.to_numeric(original_data['test_case'], errors='coerce')
+    # Convert 'test_case' column to numeric for proper filtering, without modifying the original DataFrame
+    test_cases = original_data['test_case']
+    converted = not pd.api.types.is_numeric_dtype(test_cases)
+    if converted:
+        test_cases = pd.to_numeric(test_cases, errors='coerce')
 
     # Identify unique 'build' values where 'test_case' matches the specified value
-    builds_with_test_case = original_data[original_data['test_case'] == test_case_value]['build'].unique()
+    builds_with_test_case = original_data['build'][test_cases == test_case_value].unique()
 
     # Filter the DataFrame to include only rows where 'build' is in the identified list
-    filtered_data = original_data[original_data['build'].isin(builds_with_test_case)]
+    mask = original_data['build'].isin(builds_with_test_case)
+    filtered_data = original_data[mask]
+    if converted:
+        filtered_data = filtered_data.assign(test_case=test_cases[mask].to_numpy())
 
     # Reset index to maintain continuity
-    filtered_data.reset_index(drop=True, inplace=True)
+    return filtered_data.reset_index(drop=True)
 
-    return filtered_data
 
 
+def assign_apply_destroy_cycles(data):
+    """
+    Assigns each row of the DataFrame to its 'terraform apply'/'terraform destroy' cycle.
+    A cycle starts with a 'terraform apply' entry and ends with the first 'terraform destroy' entry
+    of the same build. Rows of other builds in between are not part of the cycle.
+
+    :param data: A pandas DataFrame with time series data.
+    :return: A numpy array with the cycle id for each row, -1 for rows outside of a complete cycle.
+    """
+    n = len(data)
+    positions = np.arange(n)
+    builds = data['build'].to_numpy()
+    test_tools = data['test_tool'].to_numpy()
+    is_apply = test_tools == 'terraform apply'
+    is_destroy = test_tools == 'terraform destroy'
+
+    # Every 'terraform apply' opens a new cycle, rows are assigned to the latest opened cycle
+    cycle_ids = np.cumsum(is_apply) - 1
+    apply_positions = positions[is_apply]
+    opened = cycle_ids >= 0
+    in_build = np.zeros(n, dtype=bool)
+    in_build[opened] = builds[opened] == builds[apply_positions[cycle_ids[opened]]]
+
+    # A cycle is closed by its first 'terraform destroy' entry of the same build
+    close_positions = np.full(len(apply_positions), n)
+    closing = in_build & is_destroy
+    np.minimum.at(close_positions, cycle_ids[closing], positions[closing])
+
+    # Rows after the closing entry and rows of unclosed cycles are not part of a cycle
+    members = in_build.copy()
+    close = close_positions[cycle_ids[in_build]]
+    members[in_build] = (positions[in_build] <= close) & (close < n)
+
+    return np.where(members, cycle_ids, -1)
 
+
+
+@profiled
 def flatten_multi_tc_apply_destroy_cycles(original_data, delete_originals=True):
     """
     Flattens test cases between 'terraform apply' and 'terraform destroy' stages by summarizing runtimes and costs.
-    This function iterates through the DataFrame, summarizing runtimes and costs between the 'terraform apply'
-    and 'terraform destroy' entries. It aggregates test cases and handles varying defect categories within 
-    a build, marking 'NA' if categories differ. The resulting DataFrame represents each apply-destroy cycle as a single entry.
+    Each row is assigned to its apply-destroy cycle, and all cycles are summarized in one groupby pass:
+    runtimes are summed, test cases are aggregated and varying defect categories within a cycle are marked
+    as -1. The costs of all cycles are calculated with a single call to the cost engine.
+    The resulting DataFrame represents each apply-destroy cycle as a single entry.
     
     :param original_data: The original pandas DataFrame with time series data.
     :param delete_originals: Boolean indicating whether to delete the original entries after aggregation.
-    :return: A pandas DataFrame with aggregated apply-destroy cycle data.
-    """
-    # Create a copy of the input DataFrame
-    data = original_data.copy()
-
-    # Initialize variables
-    in_sequence = False
-    runtime_sum = 0
-    cost_sum = 0
-    start_build = None
-    test_cases_list = []
-    defect_category = None
-    revision = None
-    build_start = None
-    build_duration = None
-    start_index = None
-
-    for index, row in data.iterrows():
-        if row['test_tool'] == 'terraform apply':
-            # Start a new sequence
-            in_sequence = True
-            start_build = row['build']
-            start_index = index
-            runtime_sum = row['runtime(seconds)']
-            revision = row['revision']
-            build_start = row['build_start']
-            build_duration = row['build_duration(hh:mm:ss)']
-            continue
-
-        if in_sequence and row['build'] == start_build:
-            # Accumulate data for the sequence
-            runtime_sum += row['runtime(seconds)']
-
-            if row['test_tool'] != 'terraform destroy':
-                # Process non-destroy test tools
-                test_cases_list.append(int(row['test_case']) if row['test_case'] != -1 else -1)
-                if defect_category is None:
-                    defect_category = row['defect_category']
-                elif defect_category != row['defect_category']:
-                    defect_category = -1  # Mark as -1 if defect categories differ
-
-            if row['test_tool'] == 'terraform destroy':
-                # End of sequence, call external script for cost calculation
-                subprocess_result = subprocess.run(
-                    [
-                        'python3', CALCULATE_COSTS_SCRIPT_PATH, 
-                        '--infracost-json', COST_BREAKDOWN_FILE_PATH, 
-                        '--runtime', str(int(runtime_sum)),
-                        '--split-by', '1'
-                    ],
-                    capture_output=True, text=True
-                )
-                cost_sum = round(float(subprocess_result.stdout.strip()), 5)
-                test_cases_list.sort()
-                sorted_test_cases = int(''.join(map(str, test_cases_list)))
-                new_entry = {
-                    'build': start_build,
-                    'defect_category': defect_category,
-                    'test_case': sorted_test_cases,
-                    'test_approach': 5,
-                    'test_tool': 'terraform test',
-                    'runtime(seconds)': runtime_sum,
-                    'costs(USD)': cost_sum,
-                    'revision': revision,
-                    'build_start': build_start,
-                    'build_duration(hh:mm:ss)': build_duration
-                }
-
-                if delete_originals:
-                    # Replace the 'terraform apply' entry with the new entry
-                    data.loc[start_index] = pd.Series(new_entry)
-                    # Delete subsequent entries in the sequence
-                    data.drop(data.loc[start_index + 1:index].index, inplace=True)
-                else:
-                    # Create a new DataFrame for the new entry
-                    new_entry_df = pd.DataFrame([new_entry])
-                    # Concatenate the new DataFrame to the main DataFrame
-                    data = pd.concat([data.iloc[:index + 1], new_entry_df, data.iloc[index + 1:]]).reset_index(drop=True)
-
-                # Reset variables for next sequence
-                in_sequence = False
-                runtime_sum = 0
-                cost_sum = 0
-                test_cases_list = []
-                defect_category = None
-                revision = None
-                build_start = None
-                build_duration = None
-                start_index = None
-
-    # Reset index to maintain continuity
-    data.reset_index(drop=True, inplace=True)
+                             If False, the new entry is inserted right after the 'terraform destroy' entry.
+    :return: A pandas DataFrame with aggregated apply-destroy cycle data, with an int64 'test_case' column.
+    """
+    data = original_data.reset_index(drop=True)
+    if data['test_case'].dtype.kind == 'f':
+        # The cycle bitmasks exceed the float precision, missing test cases are set to -1 as on reading
+        data['test_case'] = np.nan_to_num(data['test_case'].to_numpy(), nan=-1).astype(np.int64)
+    cycle_ids = assign_apply_destroy_cycles(data)
+    members = cycle_ids >= 0
+    if not members.any():
+        return data.copy()
+
+    # Summarize runtimes, start and end positions of all cycles
+    cycles = pd.DataFrame({
+        'cycle': cycle_ids[members],
+        'position': np.flatnonzero(members),
+        'runtime': data['runtime(seconds)'].to_numpy()[members]
+    }).groupby('cycle').agg(
+        start=('position', 'min'),
+        end=('position', 'max'),
+        runtime=('runtime', 'sum')
+    )
+    starts = cycles['start'].to_numpy()
+
+    # Entries between 'terraform apply' and 'terraform destroy' are the test cases of a cycle
+    is_test = members.copy()
+    is_test[starts] = False
+    is_test[cycles['end'].to_numpy()] = False
+
+    # Summarize test cases and defect categories
+    # The test cases of a cycle are combined to a bitmask, see MULTI_TEST_CASE_FLAG
+    # Entries without test case (-1 or NaN) are part of the cycle but not of its bitmask
+    test_cases = data['test_case'].to_numpy()[is_test].astype(np.int64)
+    if (test_cases > MAX_CYCLE_TEST_CASE).any():
+        raise ValueError(f"Test cases of apply-destroy cycles must not exceed {MAX_CYCLE_TEST_CASE}")
+    test_rows = pd.DataFrame({
+        'cycle': cycle_ids[is_test],
+        'member': np.where(test_cases >= 0, np.left_shift(1, np.maximum(test_cases, 0)), 0),
+        'defect_category': data['defect_category'].to_numpy()[is_test]
+    })
+    tests = test_rows.groupby('cycle').agg(
+        defect_min=('defect_category', 'min'),
+        defect_max=('defect_category', 'max')
+    )
+    # Rows of a cycle are consecutive, so the bitmasks are reduced per run of equal cycle ids
+    cycle_starts = np.flatnonzero(np.diff(test_rows['cycle'].to_numpy(), prepend=-1) != 0)
+    masks = (np.bitwise_or.reduceat(test_rows['member'].to_numpy(), cycle_starts)
+             if len(test_rows) else np.empty(0, np.int64))
+    tests['test_case'] = np.where(masks != 0, MULTI_TEST_CASE_FLAG | masks, -1)
+    tests['defect_category'] = tests['defect_min'].where(tests['defect_min'] == tests['defect_max'], -1)
+    # Cycles without test cases get -1. The bitmasks exceed the float precision,
+    # so they are filled as int64 instead of joined with NaN for the missing cycles.
+    tests = tests[['test_case', 'defect_category']].astype(np.int64).reindex(cycles.index, fill_value=-1)
+    cycles = cycles.join(tests)
+
+    # Build the new entries, using build information of the 'terraform apply' entry
+    new_entries = data.iloc[starts].reset_index(drop=True)
+    new_entries['defect_category'] = cycles['defect_category'].to_numpy()
+    new_entries['test_case'] = cycles['test_case'].to_numpy()
+    new_entries['test_tool'] = 'terraform test'
+    new_entries['runtime(seconds)'] = cycles['runtime'].to_numpy()
+    new_entries['costs(USD)'] = calculate_costs(cycles['runtime'].to_numpy().astype(int),
+                                                COST_BREAKDOWN_FILE_PATH)
+
+    if delete_originals:
+        # Replace the 'terraform apply' entries with the new entries and delete the other cycle entries
+        keep = ~members
+        keep[starts] = True
+        order = np.arange(len(data))
+        order[starts] = len(data) + np.arange(len(new_entries))
+        order = order[keep]
+    else:
+        # Insert the new entries right after the 'terraform destroy' entries
+        order = np.insert(np.arange(len(data)), cycles['end'].to_numpy() + 1,
+                          len(data) + np.arange(len(new_entries)))
 
-    return data
+    combined = pd.concat([data, new_entries], ignore_index=True)
+    return combined.iloc[order].reset_index(drop=True)
 
 
+@profiled
 def filter_data_sets_by_build(original_data, min_build_value=None, max_build_value=None):
     """
     Filters data sets in the DataFrame to include only those within a specified range of 'build' values.
@@ -184,65 +259,115 @@ def filter_data_sets_by_build(original_data, min_build_value=None, max_build_val
     :return: A pandas DataFrame containing only the data sets within the specified 'build' range.
     """
 
-    # Create a copy of the DataFrame to avoid SettingWithCopyWarning
-    data_copy = original_data.copy()
-
-    # Convert 'build' column to numeric for proper filtering
-    data_copy['build'] = pd.to_numeric(data_copy['build'], errors='coerce')
+    # Convert 'build' column to numeric for proper filtering, without copying the whole DataFrame
+    builds = original_data['build']
+    converted = not pd.api.types.is_numeric_dtype(builds)
+    if converted:
+        builds = pd.to_numeric(builds, errors='coerce')
 
     # Applying filter based on the provided values
     if min_build_value is not None and max_build_value is not None:
-        filtered_data = data_copy[(data_copy['build'] > min_build_value) & 
-                                  (data_copy['build'] <= max_build_value)]
+        mask = (builds > min_build_value) & (builds <= max_build_value)
     elif min_build_value is not None:
-        filtered_data = data_copy[data_copy['build'] > min_build_value]
+        mask = builds > min_build_value
     elif max_build_value is not None:
-        filtered_data = data_copy[data_copy['build'] <= max_build_value]
+        mask = builds <= max_build_value
     else:
         raise ValueError("At least one of min_build_value or max_build_value must be provided")
 
+    filtered_data = original_data[mask]
+    if converted:
+        filtered_data = filtered_data.assign(build=builds[mask])
     return filtered_data
 
 
 
+def test_case_masks(test_cases):
+    """
+    Returns the bitmasks of the test cases covered by each entry: bit n is set for test case n.
+    Single test cases cover themselves, flattened apply-destroy cycles all of their test cases,
+    entries without test case (-1 or NaN) and test cases above MAX_CYCLE_TEST_CASE none.
+
+    :param test_cases: A pandas Series or array-like of test cases, e.g. data['test_case'].
+    :return: A numpy int64 array of bitmasks.
+    """
+    test_cases = np.asarray(test_cases)
+    if test_cases.dtype.kind == 'f':
+        # Cycle bitmasks exceed the float precision, so only floats with NaN for missing test cases are converted
+        test_cases = np.nan_to_num(test_cases, nan=-1)
+    test_cases = test_cases.astype(np.int64)
+    single = (test_cases >= 0) & (test_cases <= MAX_CYCLE_TEST_CASE)
+    cycle = (test_cases > 0) & (test_cases & MULTI_TEST_CASE_FLAG != 0)
+    masks = np.where(cycle, test_cases & ~MULTI_TEST_CASE_FLAG, 0)
+    masks[single] = np.left_shift(1, test_cases[single])
+    return masks
+
+def contains_test_case(test_cases, test_case):
+    """
+    Returns which entries cover a test case, either as single test case or as part of an apply-destroy cycle.
+
+    :param test_cases: A pandas Series or array-like of test cases, e.g. data['test_case'].
+    :param test_case: The test case id, e.g. 9.
+    :return: A numpy boolean array.
+    """
+    return (test_case_masks(test_cases) & (1 << int(test_case))) != 0
+
+def intersects_test_cases(test_cases, test_case_ids):
+    """
+    Returns which entries cover at least one of several test cases.
+
+    :param test_cases: A pandas Series or array-like of test cases, e.g. data['test_case'].
+    :param test_case_ids: A list of test case ids, e.g. [4, 7, 9].
+    :return: A numpy boolean array.
+    """
+    mask = 0
+    for test_case in test_case_ids:
+        mask |= 1 << int(test_case)
+    return (test_case_masks(test_cases) & mask) != 0
+
+def test_case_members(test_case):
+    """
+    Returns the test case ids of a test case, all test cases for an apply-destroy cycle.
+
+    :param test_case: An integer or a float representing the test case number.
+    :return: A sorted list of test case ids, e.g. [4, 7, 9] for the cycle of TC4, TC7 and TC9.
+    """
+    test_case = int(test_case)
+    if test_case < 0 or not test_case & MULTI_TEST_CASE_FLAG:
+        return [test_case]
+    return [bit for bit in range(MAX_CYCLE_TEST_CASE + 1) if test_case >> bit & 1]
+
 def format_test_case_label(test_case, test_approach):
     """
     Formats and returns a string label for a test case and test approach.
 
     This function takes numerical values for a test case and test approach, and returns a formatted string label.
-    The test case number is formatted such that if it has more than two digits, commas are inserted between each digit.
-    The test approach is prepended with 'TA' and the test case number is prepended with 'TC'.
+    The test approach is prepended with 'TA' and the test case is labeled as by short_test_case_label.
 
     :param test_case: An integer or a float representing the test case number. 
                       If a float is provided, it is converted to an integer.
     :param test_approach: An integer or a float representing the test approach number. 
                           If a float is provided, it is converted to an integer.
     :return: A formatted string label representing the test case and test approach.
-             For example, for test_case=123 and test_approach=4, it returns "TC1,2,3 (TA4)".
+             For example, for test_case=12 and test_approach=4, it returns "TC12 (TA4)".
     """
-    test_case_str = str(int(test_case))
-    if len(test_case_str) > 2:
-        test_case_str = ','.join(test_case_str)
-    return f"TC{test_case_str} (TA{int(test_approach)})"
+    return f"{short_test_case_label(test_case)} (TA{int(test_approach)})"
 
 def short_test_case_label(test_case):
     """
     Returns a string label for a test case.
 
     This function takes a numerical value for a test case and returns a formatted string label.
-    If the test case number has more than two digits, commas are inserted between each digit.
-    The test case number is prepended with 'TC'.
+    The test case number is prepended with 'TC', the test cases of an apply-destroy cycle
+    (see MULTI_TEST_CASE_FLAG) are separated by commas.
 
     :param test_case: An integer or a float representing the test case number. 
                       If a float is provided, it is converted to an integer.
     :return: A formatted string label representing the test case.
-             For example, for test_case=123, it returns "TC1,2,3".
-             For test_case=12, it returns "TC12".
+             For example, for test_case=12, it returns "TC12".
+             For the cycle of TC4, TC7 and TC9, it returns "TC4,7,9".
     """
-    test_case_str = str(int(test_case))
-    if len(test_case_str) > 2:
-        test_case_str = ','.join(test_case_str)
-    return f"TC{test_case_str}"
+    return 'TC' + ','.join(str(member) for member in test_case_members(test_case))
 
 def format_deploy_phase_label(test_tool):
     """
@@ -256,10 +381,22 @@ def format_deploy_phase_label(test_tool):
     """
     return 'deploy' if test_tool == 'terraform apply' else 'destroy' if test_tool == 'terraform destroy' else None
 
+def format_stage_label(test_tool, test_approach):
+    """
+    Formats and returns a string label for a test stage.
+
+    :param test_tool: A string representing the test tool of the stage.
+    :param test_approach: An integer representing the test approach number.
+    :return: A formatted string label representing the test stage.
+             For example, for test_tool='tfsec' and test_approach=3, it returns "tfsec (TA3)".
+    """
+    return f"{test_tool} (TA{int(test_approach)})"
+
 
 
+@profiled
 def write_latex(caption, label, data=None, header_key_pairs=None, summary_table=False,
-                output_file='../output.tex', digits=2):
+                output_file='../output.tex', digits=2, writer=None, summary=None):
     """
     Function to create LaTeX tables and figure boilerplate.
     
@@ -270,16 +407,25 @@ def write_latex(caption, label, data=None, header_key_pairs=None, summary_table=
     :param summary_table: Boolean indicating whether to generate a summary table with statistics.
     :param output_file: The file path for the output LaTeX file.
     :param digits: Optional; Number of digits to round floating-point numbers to (default is 2).
+    :param writer: Optional; a LatexWriter session to write to instead of output_file.
+    :param summary: Optional; precomputed statistics for a summary table instead of data,
+                    e.g. from sketch_statistics.
     """
-    if data is not None:
+    if summary is not None:
+        latex = generate_summary_table(data, header_key_pairs, caption, label, digits, summary=summary)
+    elif data is not None:
         if summary_table:
             latex = generate_summary_table(data, header_key_pairs, caption, label, digits)
         else:
             latex = generate_table(data, header_key_pairs, caption, label, digits)
 
-    if data is None:
+    if data is None and summary is None:
         latex = generate_figure(label, caption)
-    
+
+    if writer is not None:
+        writer.write(label, latex)
+        return
+
     append_to_file(
         output_file=output_file,
         content=latex,
@@ -288,6 +434,7 @@ def write_latex(caption, label, data=None, header_key_pairs=None, summary_table=
 
 
 
+@profiled
 def generate_table(data, header_key_pairs, caption, label, digits=2):
     """
     Generates LaTeX code for a standard table.
@@ -305,18 +452,18 @@ def generate_table(data, header_key_pairs, caption, label, digits=2):
         cleaned_header = cleaned_header.replace(', Log Scale', '', 1)
         processed_header_key_pairs.append((cleaned_header, key))
     columns = [pair[1] for pair in processed_header_key_pairs]
-    selected_data = data[columns]
+    selected_data = data[columns].reset_index(drop=True)
 
     table_latex = r"\begin{table}[h!]" + "\n"
     table_latex += r"  \begin{tabular}{|" + " | ".join(["l"] * len(processed_header_key_pairs)) + "|}" + "\n"
     table_latex += r"    \hline" + "\n"
     table_latex += "    " + " & ".join([f"\\textbf{{{label}}}" for label, _ in processed_header_key_pairs]) + r" \\" + "\n"
     table_latex += r"    \hline" + "\n"
-    for _, row in selected_data.iterrows():
-        # Format each cell value using format_table_numbers
-        row_values = [format_table_numbers(row[col], digits) for col in columns]
-        table_latex += "    " + " & ".join(row_values) + r" \\" + "\n"
-        table_latex += r"    \hline" + "\n"
+    if len(selected_data) > 0:
+        # Format each column at once and concatenate the cells of all rows
+        formatted_columns = [format_table_column(selected_data[col], digits) for col in columns]
+        rows = formatted_columns[0].str.cat(formatted_columns[1:], sep=" & ")
+        table_latex += ("    " + rows + r" \\" + "\n" + r"    \hline" + "\n").str.cat()
     table_latex += r"  \end{tabular}" + "\n"
     table_latex += fr"  \caption{{{caption}}}" + "\n"
     table_latex += fr"  \label{{tab:{label}}}" + "\n"
@@ -325,7 +472,8 @@ def generate_table(data, header_key_pairs, caption, label, digits=2):
     return table_latex
 
 
-def generate_summary_table(data, header_key_pairs, caption, label, digits=2):
+@profiled
+def generate_summary_table(data, header_key_pairs, caption, label, digits=2, summary=None):
     """
     Generates LaTeX code for a summary table with statistics.
 
@@ -334,6 +482,8 @@ def generate_summary_table(data, header_key_pairs, caption, label, digits=2):
     :param caption: Title of the table to use as the caption.
     :param label: LaTeX label for referencing the table.
     :param digits: Number of digits to round floating-point numbers to (default is 2).
+    :param summary: Optional; precomputed statistics in the format of grouped_statistics,
+                    used instead of calculating them from data.
     """
     if len(header_key_pairs) != 2:
         raise ValueError("header_key_pairs must contain exactly two pairs.")
@@ -341,9 +491,10 @@ def generate_summary_table(data, header_key_pairs, caption, label, digits=2):
     # Unpacking the pairs
     legend_label, legend_key = header_key_pairs[0]
     ylabel, ykey = header_key_pairs[1]
-    row_headers = data[legend_key].unique()
-    statistics = ['Mean', 'Median', 'Q1', 'Q3', 'IQR', 'Min', 'Max', 'Std Dev']
-
+    statistics = STATISTICS
+    # Calculate all statistics for all row headers in a single pass
+    if summary is None:
+        summary = grouped_statistics(data, legend_key, ykey)
 
     # Checking if resizebox is needed
     resizebox = digits >= 5
@@ -356,12 +507,10 @@ def generate_summary_table(data, header_key_pairs, caption, label, digits=2):
     table_latex += r"    \hline" + "\n"
     table_latex += "    \\textbf{" + legend_label + "} & " + " & ".join(stat for stat in statistics) + r" \\" + "\n"
     table_latex += r"    \hline" + "\n"
-    for s in row_headers:
-        subset = data[data[legend_key] == s]
-        row_values = [get_statistic(subset, ykey, stat) for stat in statistics]
-        formatted_values = [format_table_numbers(val, digits) for val in row_values]
-        table_latex += "    " + s + " & " + " & ".join(formatted_values) + r" \\" + "\n"
-        table_latex += r"    \hline" + "\n"
+    if len(summary) > 0:
+        formatted_columns = [format_table_column(summary[stat], digits) for stat in statistics]
+        rows = pd.Series(summary.index.astype(str), index=summary.index).str.cat(formatted_columns, sep=" & ")
+        table_latex += ("    " + rows + r" \\" + "\n" + r"    \hline" + "\n").str.cat()
     table_latex += r"  \end{tabular}" + "\n"
     if resizebox: table_latex += r"  }" + "\n"
     table_latex += fr"  \caption{{{caption}}}" + "\n"
@@ -418,13 +567,28 @@ def format_table_numbers(num, digits=2):
 
 
 
+def format_table_column(column, digits=2):
+    """
+    Formats all values of a column like format_table_numbers.
+    Numeric columns are formatted without checking each value individually.
+
+    :param column: Pandas Series with the values to be formatted.
+    :param digits: Number of digits to round the numbers to (default is 2).
+    :return: Pandas Series of formatted strings, with the index of the column.
+    """
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+        return column.astype(float).map(f"{{:.{digits}f}}".format).astype(object)
+    return column.map(lambda value: str(format_table_numbers(value, digits))).astype(object)
+
+
+
 def generate_figure(label, caption):
     """
-    Generates LaTeX code for a figure.
+    Generates LaTeX code for a figure in the configured figure format.
     """
     figure_latex = r"\begin{figure}[h!]" + "\n"
     figure_latex += r"  \centering" + "\n"
-    figure_latex += fr"  \includegraphics[width=\textwidth]{{img/{label}.png}}" + "\n"
+    figure_latex += fr"  \includegraphics[width=\textwidth]{{img/{label}{figure_extension()}}}" + "\n"
     figure_latex += fr"  \caption{{{caption}}}" + "\n"
     figure_latex += fr"  \label{{fig:{label}}}" + "\n"
     figure_latex += r"\end{figure}" + "\n"
@@ -432,52 +596,15 @@ def generate_figure(label, caption):
     return figure_latex
 
 
+@profiled
 def append_to_file(output_file, label, content):
     """
-    Appends or replaces content in a LaTeX file based on a specific label substring.
+    Appends or replaces content in a LaTeX file based on the label of a table or figure.
+    Use a LatexWriter session instead to write several tables and figures with a single write.
 
     :param output_file: Path to the LaTeX file.
-    :param label: The unique substring of the label of the table or figure to append or replace.
+    :param label: The label of the table or figure to append or replace.
     :param content: The LaTeX code to append or replace in the file.
     """
-    try:
-        with open(output_file, 'r+') as file:
-            existing_content = file.read()
-
-            # Determine whether it's a table or figure
-            if r'\begin{table}' in content:
-                start_tag = r'\begin{table}'
-                end_tag = r'\end{table}'
-            elif r'\begin{figure}' in content:
-                start_tag = r'\begin{figure}'
-                end_tag = r'\end{figure}'
-            else:
-                file.write(content)
-                return
-
-            # Search for the label within the section
-            section_start = existing_content.find(start_tag)
-            while section_start != -1:
-                section_end = existing_content.find(end_tag, section_start) + len(end_tag)
-                section_content = existing_content[section_start:section_end]
-
-                if label in section_content:
-                    # Replace existing content
-                    new_content = existing_content[:section_start] + content + existing_content[section_end:]
-                    break
-
-                section_start = existing_content.find(start_tag, section_end)
-
-            else:
-                # Append new content if no match was found
-                new_content = existing_content + '\n' + content
-
-            # Write updated content
-            file.seek(0)
-            file.write(new_content)
-            file.truncate()
-
-    except FileNotFoundError:
-        # Create file if it doesn't exist
-        with open(output_file, 'w') as file:
-            file.write(content)
+    with LatexWriter(output_file) as writer:
+        writer.write(label, content)
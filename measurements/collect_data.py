@@ -0,0 +1,774 @@
+#!/usr/bin/env python3
+"""
+Merges the measurement CSV files of Jenkins build directories into merged measurement files.
+
+Python implementation of collect_data.sh, producing the same output. In container mode all files
+are harvested from the Jenkins controller with a single tar stream instead of many docker calls.
+All builds are read first, their measurements are then validated in one vectorized pass and
+each output file is written with a single bulk write. A manifest of the merged builds lets
+re-runs skip processed builds without reading the output files.
+"""
+import argparse
+import concurrent.futures
+import glob
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import tarfile
+import time
+
+# Define defaults
+DEFAULT_BUILDS_PATH = '/var/jenkins_home/jobs/thesis/builds'
+DEFAULT_CSV_FILE = 'measurements.csv'
+DEFAULT_OUTPUT_FILE = 'merged_measurements.csv'
+DEFAULT_CONTAINER_NAME = 'jenkins-blueocean'
+DEFAULT_BREAKDOWN_FILE = 'infracost.json'
+
+# Extension and format version of the manifest of merged builds, placed next to the output files
+MANIFEST_EXTENSION = '.manifest.json'
+MANIFEST_VERSION = 1
+
+# Build information columns appended to every merged line
+BUILD_INFO_HEADER = 'revision,build_start,build_duration(hh:mm:ss)'
+
+# Correction of the test case numeration for older data:
+# (defect_category, old test_case, test_approach, test_tool prefix, new test_case)
+TEST_CASE_RENUMBERING = [
+    ('1', '1', '5', '', '3'),
+    ('1', '2', '5', '', '4'),
+    ('2', '1', '4', 'terra', '5'),
+    ('2', '2', '4', 'pytest', '6'),
+    ('2', '1', '5', '', '7'),
+    ('3', '1', '4', 'pytest', '8'),
+    ('3', '1', '5', '', '9'),
+    ('4', '1', '4', 'pytest', '10'),
+    ('5', '1', '5', '', '11'),
+    ('6', '1', '4', 'pytest', '13'),
+]
+
+# Patterns of the build information in a Jenkins build.xml, the first match is used
+BUILD_XML_PATTERNS = {
+    'result': re.compile(r'<result>([A-Z]*)</result>'),
+    'sha1': re.compile(r'<sha1>([a-z0-9]*)</sha1>'),
+    'start_time': re.compile(r'<startTime>([0-9]*)</startTime>'),
+    'duration': re.compile(r'<duration>([0-9]*)</duration>'),
+}
+
+
+def convert_timestamp_to_datetimegroup(timestamp):
+    """
+    Converts a timestamp in milliseconds to a date-time-group in local time.
+
+    :param timestamp: The timestamp in milliseconds, as string or int.
+    :return: The date-time-group as string in the format YYYYmmddHHMMSS, or '' if there is no timestamp.
+    """
+    if timestamp in (None, ''):
+        return ''
+    return time.strftime('%Y%m%d%H%M%S', time.localtime(int(timestamp) // 1000))
+
+
+def convert_milliseconds_to_hours_minutes_seconds(milliseconds):
+    """
+    Converts a duration in milliseconds to a string in hours, minutes and seconds,
+    rounded to the nearest second.
+
+    :param milliseconds: The duration in milliseconds, as string or int.
+    :return: The duration as string in the format hh:mm:ss, or '' if there is no duration.
+    """
+    if milliseconds in (None, ''):
+        return ''
+    total_seconds = (int(milliseconds) + 500) // 1000
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def parse_build_xml(content):
+    """
+    Extracts result, revision, start and duration of a build from the content of its build.xml.
+
+    :param content: The content of the build.xml, or None if there is none.
+    :return: A dictionary with the keys 'result', 'revision', 'build_start' and 'build_duration'.
+    """
+    values = {}
+    for key, pattern in BUILD_XML_PATTERNS.items():
+        match = pattern.search(content) if content else None
+        values[key] = match.group(1) if match else ''
+    return {
+        'result': values['result'],
+        'revision': values['sha1'][:7],
+        'build_start': convert_timestamp_to_datetimegroup(values['start_time']),
+        'build_duration': convert_milliseconds_to_hours_minutes_seconds(values['duration'])
+    }
+
+
+def normalize_header(header):
+    """
+    Prepares the header of a measurement file for the merged output file.
+    Older measurement files contain the '$' character, which is replaced with 'USD'.
+
+    :param header: The first line of the measurement file.
+    :return: The header with the build information columns appended.
+    """
+    return header.strip().replace('$', 'USD') + ',' + BUILD_INFO_HEADER
+
+
+def validate_data(lines, build_numbers):
+    """
+    Validates the measurement lines of many builds at once.
+
+    - Skips lines not starting with the build number of their build.
+    - Corrects test case numeration for older data.
+    - Skips lines with zero runtime unless the test tool is 'terraform fmt'.
+
+    :param lines: A pandas Series of measurement lines, without line breaks.
+    :param build_numbers: A pandas Series of the build number (as string) of each line, same index as lines.
+    :return: A pandas Series with the processed lines of the valid measurements, original index kept.
+    """
+    import pandas as pd
+    lines = lines.str.replace('\r', '', regex=False)
+    build_fields = lines.str.split(',', n=1)
+    lines = lines[(build_fields.str.len() == 2) & (build_fields.str[0] == build_numbers)]
+    if lines.empty:
+        return lines
+
+    # Split off build, defect_category, test_case, test_approach and the rest of the line
+    fields = lines.str.split(',', n=4, expand=True).reindex(columns=range(5))
+    rest = fields[4].fillna('')
+    renumbered = pd.Series(False, index=lines.index)
+    for defect_category, test_case, test_approach, tool_prefix, new_test_case in TEST_CASE_RENUMBERING:
+        mask = ((fields[1] == defect_category) & (fields[2] == test_case)
+                & (fields[3] == test_approach) & fields[4].notna() & rest.str.startswith(tool_prefix))
+        fields.loc[mask, 2] = new_test_case
+        renumbered |= mask
+    lines = lines.copy()
+    renumbered_fields = fields[renumbered]
+    lines[renumbered] = renumbered_fields[0].str.cat(renumbered_fields[[1, 2, 3, 4]], sep=',')
+
+    # If runtime (field 6) is zero, it's likely a corrupted measurement and will be reported.
+    # Exception: test tool 'terraform fmt', which can have a legitimate zero runtime (rounded down).
+    tool_and_runtime = rest.str.split(',', n=2, expand=True).reindex(columns=range(2))
+    corrupted = (~tool_and_runtime[0].fillna('').str.endswith('fmt')) & (tool_and_runtime[1] == '0')
+    return lines[~corrupted]
+
+
+def list_build_dirs(builds_path):
+    """
+    Returns the names of the build directories, sorted numerically.
+
+    :param builds_path: Base path to the build directories.
+    :return: A list of directory names.
+    """
+    dirs = [entry.name for entry in os.scandir(builds_path) if entry.is_dir(follow_symlinks=False)]
+    return sorted(dirs, key=lambda name: (int(name) if name.isdigit() else 0, name))
+
+
+def select_builds(dirs, from_build=None, to_build=None):
+    """
+    Restricts the build directories to the requested range.
+
+    :param dirs: The numerically sorted build directory names.
+    :param from_build: Optional; starting build number as string.
+    :param to_build: Optional; ending build number as string.
+    :return: The selected directory names.
+    :raises ValueError: If the range is invalid.
+    """
+    # Ensure from_build and to_build are numbers if they are set
+    for name, value in [('FROM_BUILD', from_build), ('TO_BUILD', to_build)]:
+        if value and not value.isdigit():
+            raise ValueError(f"{name} ({value}) is not a valid number.")
+    if from_build and to_build and int(from_build) > int(to_build):
+        raise ValueError(f"FROM_BUILD ({from_build}) should be less or euqal to TO_BUILD ({to_build}).")
+    # Ensure from_build and to_build are in the range of directories
+    if from_build and from_build not in dirs:
+        raise ValueError(f"Invalid FROM_BUILD value ({from_build}). "
+                         f"Smallest build number in dirs: {dirs[0] if dirs else ''}")
+    if to_build and to_build not in dirs:
+        raise ValueError(f"Invalid TO_BUILD value ({to_build}). "
+                         f"Highest build number in dirs: {dirs[-1] if dirs else ''}")
+
+    if from_build:
+        dirs = [name for name in dirs if name.isdigit() and int(name) >= int(from_build)]
+    if to_build:
+        dirs = [name for name in dirs if name.isdigit() and int(name) <= int(to_build)]
+    return dirs
+
+
+class MergeManifest:
+    """
+    Manifest of the builds merged into the output files, stored next to them as `<base>.manifest.json`.
+
+    For each merged build it records the output file, the number of merged rows and the SHA-256
+    checksum of the source CSV file; builds with a final result other than SUCCESS are recorded
+    with their skip message. Re-runs thereby skip processed builds without reading any output file.
+    The manifest also stores size and mtime of all output files: if they do not match
+    (e.g. after a merge by collect_data.sh or a manual edit), it is rebuilt from the output files.
+    """
+
+    def __init__(self, output_file):
+        self.base, self.ext = os.path.splitext(output_file)
+        self.path = self.base + MANIFEST_EXTENSION
+        self.builds = {}
+        self.skipped = {}
+        self.modified = False
+        manifest = self._read()
+        if manifest is not None and manifest.get('files') == self._output_file_stats():
+            self.builds = manifest.get('builds', {})
+            self.skipped = manifest.get('skipped', {})
+        else:
+            self._rebuild()
+            self.modified = True
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as file:
+                manifest = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        return manifest if manifest.get('version') == MANIFEST_VERSION else None
+
+    def _output_files(self):
+        return sorted(glob.glob(f"{glob.escape(self.base)}*{self.ext}"))
+
+    def _output_file_stats(self):
+        stats = {}
+        for path in self._output_files():
+            stat = os.stat(path)
+            stats[path] = [stat.st_size, stat.st_mtime_ns]
+        return stats
+
+    def _rebuild(self):
+        """
+        Recreates the merged builds from the output files, without source checksums.
+        """
+        self.builds = {}
+        self.skipped = {}
+        for path in self._output_files():
+            with open(path, 'r') as file:
+                file.readline()
+                rows = {}
+                for line in file:
+                    build = line.split(',', 1)[0]
+                    rows[build] = rows.get(build, 0) + 1
+            for build, count in rows.items():
+                self.builds.setdefault(build, {'file': path, 'rows': count, 'sha256': None})
+
+    def skip_message(self, build):
+        """
+        Returns the message for a build which does not need to be processed again, or None.
+
+        :param build: The build number as string.
+        """
+        if build in self.builds:
+            return f"Build number {build} has already been merged. Skipping..."
+        return self.skipped.get(build)
+
+    def add(self, build, path, rows, sha256):
+        self.builds[build] = {'file': path, 'rows': rows, 'sha256': sha256}
+        self.modified = True
+
+    def add_skipped(self, build, message):
+        self.skipped[build] = message
+        self.modified = True
+
+    def rename_file(self, old_path, new_path):
+        for entry in self.builds.values():
+            if entry['file'] == old_path:
+                entry['file'] = new_path
+                self.modified = True
+
+    def save(self):
+        """
+        Writes the manifest together with the current stats of the output files, if modified.
+        """
+        if not self.modified:
+            return
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'files': self._output_file_stats(),
+            'builds': self.builds,
+            'skipped': self.skipped
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            file.write(json.dumps(manifest))
+        os.replace(tmp_path, self.path)
+        self.modified = False
+
+
+def parse_build(build_number, build_info, csv_source, csv_files, csv_file, valid_entries=None):
+    """
+    Parses the measurements of a single build, independent of where its files were read from.
+
+    :param build_number: The build number as string.
+    :param build_info: The build information as returned by parse_build_xml.
+    :param csv_source: The content of the CSV file as bytes, or None if the file does not exist.
+    :param csv_files: Names of the CSV files in the archive directory of the build.
+    :param csv_file: Name of the CSV file to merge.
+    :param valid_entries: Optional; expected number of entries, other builds are skipped.
+    :return: A dictionary with the keys 'build', 'header', 'lines', 'revision', 'build_start',
+             'build_duration' and 'sha256' (of the CSV file), or a dictionary with the keys 'build',
+             'message' and optionally 'final' (the build result will not change) if the build is skipped.
+    """
+    # Validate the build result, a build without result is still running
+    if build_info['result'] != 'SUCCESS':
+        return {'build': build_number,
+                'message': f"Build number {build_number} has result {build_info['result']}. Skipping...",
+                'final': build_info['result'] != ''}
+
+    if csv_source is None:
+        message = f"\"{csv_file}\" not found for build {build_number}."
+        if not csv_files:
+            message += f"\nNo csv files found for build {build_number}."
+        else:
+            message += (f"\nAvailable CSV files for build {build_number}: "
+                        + ''.join(name + ' ' for name in sorted(csv_files)))
+        return {'build': build_number, 'message': message}
+
+    header, _, content = csv_source.decode().partition('\n')
+    content = content.rstrip('\n')
+
+    # Validate the number of entries, if valid_entries is set
+    if valid_entries is not None:
+        entry_count = len(content.split('\n'))
+        if entry_count != valid_entries:
+            return {'build': build_number,
+                    'message': f"Build number {build_number} has {entry_count} entries, "
+                               f"expected {valid_entries}. Skipping..."}
+
+    return {
+        'build': build_number,
+        'header': normalize_header(header),
+        'lines': content.split('\n') if content else [],
+        'revision': build_info['revision'],
+        'build_start': build_info['build_start'],
+        'build_duration': build_info['build_duration'],
+        'sha256': hashlib.sha256(csv_source).hexdigest()
+    }
+
+
+def read_build(build_dir, csv_file, valid_entries=None):
+    """
+    Reads the measurements and build information of a single local build directory.
+
+    :param build_dir: Path to the build directory.
+    :param csv_file: Name of the CSV file in the archive directory.
+    :param valid_entries: Optional; expected number of entries, other builds are skipped.
+    :return: A dictionary as returned by parse_build.
+    """
+    build_number = os.path.basename(build_dir)
+    build_xml_path = os.path.join(build_dir, 'build.xml')
+    build_xml = None
+    if os.path.isfile(build_xml_path):
+        with open(build_xml_path, 'r', errors='replace') as file:
+            build_xml = file.read()
+    build_info = parse_build_xml(build_xml)
+    if build_info['result'] != 'SUCCESS':
+        return parse_build(build_number, build_info, None, [], csv_file, valid_entries)
+
+    file_path = os.path.join(build_dir, 'archive', csv_file)
+    csv_source = None
+    csv_files = []
+    if os.path.isfile(file_path):
+        with open(file_path, 'rb') as file:
+            csv_source = file.read()
+    else:
+        csv_files = [os.path.basename(path)
+                     for path in glob.glob(os.path.join(glob.escape(build_dir), 'archive', '*.csv'))]
+    return parse_build(build_number, build_info, csv_source, csv_files, csv_file, valid_entries)
+
+
+def read_builds(build_dirs, read, workers=None):
+    """
+    Reads builds with a pool of worker threads, as reading is dominated by I/O.
+    The results are returned in the order of build_dirs, independent of the number of workers.
+
+    :param build_dirs: The build directories to read.
+    :param read: Function reading a single build directory.
+    :param workers: Number of worker threads. Default: number of CPU cores. 1 reads the builds serially.
+    :return: The list of results of read, in the order of build_dirs.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(build_dirs) <= 1:
+        return [read(build_dir) for build_dir in build_dirs]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(read, build_dirs))
+
+
+class ContainerBuilds:
+    """
+    Harvests build directories from the dockerized Jenkins controller.
+
+    Instead of several `docker exec` calls per build, the build directories are listed with one call
+    and build.xml and archive/*.csv of all requested builds, as well as the breakdown file,
+    are streamed to the host in a single tar stream and parsed there.
+
+    The docker command can be replaced, e.g. by a shim which runs `exec` commands locally
+    to serve a directory tree for testing.
+    """
+
+    # Lists the files of the builds read from stdin and writes them as tar stream to stdout.
+    # Arguments: builds path, CSV file name, breakdown file path relative to the builds path (optional)
+    HARVEST_SCRIPT = (
+        'cd "$1" || exit 1; '
+        '{ while IFS= read -r build; do '
+        'for file in "$build/build.xml" "$build/archive/$2" "$build"/archive/*.csv; do '
+        '[ -f "$file" ] && printf "%s\\n" "$file"; '
+        'done; done; '
+        '[ -n "$3" ] && [ -f "$3" ] && printf "%s\\n" "$3"; '
+        '} | sort -u | tar -cf - -T -'
+    )
+
+    def __init__(self, container_name, builds_path, docker_command='docker'):
+        self.container_name = container_name
+        self.builds_path = builds_path
+        self.docker_command = shlex.split(docker_command)
+
+    def _exec(self, args, **kwargs):
+        return subprocess.run(self.docker_command + ['exec', '-i', self.container_name] + args,
+                              check=True, stdout=subprocess.PIPE, **kwargs)
+
+    def list_build_dirs(self):
+        """
+        Returns the names of the build directories in the container, sorted numerically.
+        """
+        output = self._exec(['find', self.builds_path, '-maxdepth', '1', '-mindepth', '1', '-type', 'd']).stdout
+        dirs = [os.path.basename(path) for path in output.decode().splitlines() if path]
+        return sorted(dirs, key=lambda name: (int(name) if name.isdigit() else 0, name))
+
+    def harvest_parallel(self, build_numbers, csv_file, breakdown_path=None, workers=None):
+        """
+        Harvests the builds with one tar stream per worker, each covering a consecutive batch of builds.
+
+        :param workers: Number of parallel streams. Default: number of CPU cores.
+        :return: The combined result of harvest for all batches.
+        """
+        workers = min(workers or os.cpu_count() or 1, max(len(build_numbers), 1))
+        # Without new builds, a single empty batch still harvests the breakdown file
+        batch_size = max(-(-len(build_numbers) // workers), 1)
+        batches = [build_numbers[start:start + batch_size]
+                   for start in range(0, len(build_numbers), batch_size)] or [[]]
+        # The breakdown file is harvested with the first batch
+        results = read_builds(range(len(batches)), lambda index: self.harvest(
+            batches[index], csv_file, breakdown_path if index == 0 else None), workers)
+        files = {}
+        for batch_files, _ in results:
+            files.update(batch_files)
+        return files, results[0][1]
+
+    def harvest(self, build_numbers, csv_file, breakdown_path=None):
+        """
+        Streams the files of the requested builds from the container with a single docker exec call.
+
+        :param build_numbers: The build directory names to harvest.
+        :param csv_file: Name of the CSV file to merge.
+        :param breakdown_path: Optional; path of the breakdown file relative to the builds path.
+        :return: A tuple (files, breakdown): files maps each build number to a tuple
+                 (build_info, csv_source, csv_files) as used by parse_build,
+                 breakdown is the content of the breakdown file or None if not found.
+        """
+        files = {build: [None, None, []] for build in build_numbers}
+        breakdown = None
+        if build_numbers or breakdown_path:
+            process = subprocess.Popen(
+                self.docker_command + ['exec', '-i', self.container_name, 'bash', '-c', self.HARVEST_SCRIPT,
+                                       'collect_data', self.builds_path, csv_file, breakdown_path or ''],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            # The build list is consumed completely before the tar stream starts
+            process.stdin.write(''.join(build + '\n' for build in build_numbers).encode())
+            process.stdin.close()
+            with tarfile.open(fileobj=process.stdout, mode='r|') as tar:
+                for member in tar:
+                    if not member.isfile():
+                        continue
+                    content = tar.extractfile(member).read()
+                    if member.name == breakdown_path:
+                        breakdown = content
+                    parts = member.name.split('/')
+                    if parts[0] not in files:
+                        continue
+                    if parts[1:] == ['build.xml']:
+                        files[parts[0]][0] = parse_build_xml(content.decode(errors='replace'))
+                    elif len(parts) == 3 and parts[1] == 'archive':
+                        if parts[2].endswith('.csv'):
+                            files[parts[0]][2].append(parts[2])
+                        if parts[2] == csv_file:
+                            files[parts[0]][1] = content
+            if process.wait() != 0:
+                raise subprocess.CalledProcessError(process.returncode, 'docker exec')
+
+        for build, build_files in files.items():
+            if build_files[0] is None:
+                build_files[0] = parse_build_xml(None)
+        return {build: tuple(build_files) for build, build_files in files.items()}, breakdown
+
+
+class OutputFiles:
+    """
+    The merged output files, split into numbered files per CSV header generation.
+
+    New lines are collected in memory and written on flush, with a single write per file.
+    A changed header creates a new file `<base>_<n>.<ext>`; the first time this happens,
+    the unnumbered output file is renamed to `<base>_1.<ext>`.
+    """
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.base, self.ext = os.path.splitext(output_file)
+        self.numbered_pattern = re.compile(r'_([0-9]+)' + re.escape(self.ext) + '$')
+        # path -> {'header', 'disk_path' (None for new files), 'lines'}
+        self.files = {}
+        # old path -> new path of renamed files
+        self.renamed = {}
+        for path in glob.glob(f"{glob.escape(self.base)}_*{self.ext}") + [output_file]:
+            if os.path.isfile(path) and path not in self.files:
+                with open(path, 'r') as file:
+                    header = file.readline().rstrip('\n')
+                self.files[path] = {'header': header, 'disk_path': path, 'lines': []}
+
+    def _numbered_files(self):
+        prefix = self.base + '_'
+        return sorted(path for path in self.files if path.startswith(prefix) and path.endswith(self.ext))
+
+    def _create(self, path, header):
+        self.files[path] = {'header': header, 'disk_path': None, 'lines': []}
+
+    def select(self, header):
+        """
+        Returns the output file for measurements with the given header, creating it if required.
+
+        :param header: The normalized header of the measurements.
+        :return: The path of the output file.
+        """
+        for path in self._numbered_files():
+            match = self.numbered_pattern.search(path)
+            if match and len(match.group(1)) <= 3 and self.files[path]['header'] == header:
+                # merge file content into output file with matching header
+                return path
+
+        first_numbered_file = f"{self.base}_1{self.ext}"
+        if self.output_file in self.files or first_numbered_file in self.files:
+            output_entry = self.files.get(self.output_file)
+            if output_entry is not None and output_entry['header'] == header:
+                return self.output_file
+            # Find the highest existing number
+            numbers = [int(match.group(1)) for match in map(self.numbered_pattern.search, self._numbered_files())
+                       if match]
+            max_num = max(numbers, default=0)
+            new_num = max_num + 1
+            # Rename existing output_file if it's the first duplicate
+            if max_num == 0:
+                self.files[first_numbered_file] = self.files.pop(self.output_file)
+                self.renamed[self.output_file] = first_numbered_file
+                new_num = 2
+            # Create a new file with incremented number
+            path = f"{self.base}_{new_num}{self.ext}"
+            print(f"Header changed. Creating new file: {path}")
+            self._create(path, header)
+            return path
+
+        # First file to be created
+        self._create(self.output_file, header)
+        return self.output_file
+
+    def append(self, path, lines):
+        """
+        Appends lines to an output file.
+
+        :param path: The path of the output file as returned by select.
+        :param lines: An iterable of lines without line breaks.
+        """
+        self.files[path]['lines'].extend(lines)
+
+    def flush(self):
+        """
+        Renames and writes the output files, with a single write per file.
+        """
+        for path, entry in self.files.items():
+            if entry['disk_path'] is not None and entry['disk_path'] != path:
+                os.rename(entry['disk_path'], path)
+                entry['disk_path'] = path
+        for path, entry in self.files.items():
+            if entry['disk_path'] is None:
+                with open(path, 'w') as file:
+                    file.write(''.join(line + '\n' for line in [entry['header']] + entry['lines']))
+                entry['disk_path'] = path
+            elif entry['lines']:
+                with open(path, 'a') as file:
+                    file.write(''.join(line + '\n' for line in entry['lines']))
+            entry['lines'] = []
+
+
+def merge_lines(records):
+    """
+    Validates the measurement lines of the read builds and appends their build information.
+
+    :param records: List of dictionaries of read builds as returned by read_build, without skipped builds.
+    :return: A list with the merged lines of each record.
+    """
+    # pandas is imported on demand, so re-runs without new builds start fast
+    import pandas as pd
+    lines = pd.Series([line for record in records for line in record['lines']], dtype=object)
+    positions = pd.Series([position for position, record in enumerate(records) for _ in record['lines']],
+                          dtype='int64')
+    build_numbers = pd.Series([record['build'] for record in records], dtype=object)
+    valid_lines = validate_data(lines, build_numbers.iloc[positions].reset_index(drop=True))
+    valid_positions = positions[valid_lines.index]
+
+    # Append build information to all valid lines at once
+    build_info = pd.Series([f",{record['revision']},{record['build_start']},{record['build_duration']}"
+                            for record in records], dtype=object)
+    merged_lines = valid_lines + build_info.iloc[valid_positions].set_axis(valid_lines.index)
+    merged_lines_by_position = merged_lines.groupby(valid_positions).agg(list).to_dict()
+    return [merged_lines_by_position.get(position, []) for position in range(len(records))]
+
+
+def merge_builds(builds, output_files, manifest):
+    """
+    Validates the measurements of the read builds and appends them to the output files in build order.
+
+    :param builds: List of dictionaries as returned by read_build, in build order.
+    :param output_files: The OutputFiles to append to.
+    :param manifest: The MergeManifest to record the merged builds in.
+    """
+    records = [build for build in builds if 'message' not in build]
+    merged_lines_by_position = merge_lines(records) if records else []
+
+    position = 0
+    for build in builds:
+        if 'message' in build:
+            print(build['message'])
+            if build.get('final'):
+                manifest.add_skipped(build['build'], build['message'])
+            continue
+        path = output_files.select(build['header'])
+        print(f"Merge build {build['build']} into {path}")
+        merged_lines = merged_lines_by_position[position]
+        output_files.append(path, merged_lines)
+        manifest.add(build['build'], path, len(merged_lines), build['sha256'])
+        position += 1
+    for old_path, new_path in output_files.renamed.items():
+        manifest.rename_file(old_path, new_path)
+
+
+def get_breakdown(builds_path, first_build_dir, breakdown_file):
+    """
+    Copies the breakdown file of the first build directory to the working directory,
+    renamed to <name>_build_<build>.<ext>.
+    """
+    original_path = os.path.join(builds_path, first_build_dir, 'archive', breakdown_file)
+    if not os.path.isfile(original_path):
+        print(f"Breakdown file not found: {original_path}")
+    else:
+        shutil.copyfile(original_path, breakdown_file_name(first_build_dir, breakdown_file))
+
+
+def breakdown_file_name(first_build_dir, breakdown_file):
+    name, ext = os.path.splitext(breakdown_file)
+    return f"{name}_build_{first_build_dir}{ext}"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Merge CSV files from build directories.', allow_abbrev=False)
+    parser.add_argument('--path', dest='builds_path', default=DEFAULT_BUILDS_PATH,
+                        help=f"Base path to build directories. Default: {DEFAULT_BUILDS_PATH}")
+    parser.add_argument('--from-build', default='', help='Starting build number.')
+    parser.add_argument('--to-build', default='', help='Ending build number.')
+    parser.add_argument('--csv-file', default=DEFAULT_CSV_FILE,
+                        help=f"Name of the CSV file to merge. Default: {DEFAULT_CSV_FILE}")
+    parser.add_argument('--container-name', default=DEFAULT_CONTAINER_NAME,
+                        help=f"Name of the Docker container to use. Default: {DEFAULT_CONTAINER_NAME}")
+    parser.add_argument('--run-locally', action='store_true',
+                        help='If set, script runs locally instead of connecting to dockerized Jenkins.')
+    parser.add_argument('--output-file', default=DEFAULT_OUTPUT_FILE,
+                        help=f"Name of the merged output CSV file. Default: {DEFAULT_OUTPUT_FILE}")
+    parser.add_argument('--get-breakdown', action='store_true',
+                        help='If set, retrieves the breakdown file from the first build directory.')
+    parser.add_argument('--breakdown-file', default=None,
+                        help='Name of the breakdown file to retrieve. Setting this automatically turns on '
+                             f"--get-breakdown. Default: {DEFAULT_BREAKDOWN_FILE}")
+    parser.add_argument('--docker-command', default='docker',
+                        help='Command used to run docker, e.g. a shim serving a local directory tree. '
+                             'Default: docker')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of builds read in parallel, in container mode the number of parallel '
+                             'harvest streams. Default: number of CPU cores.')
+    parser.add_argument('--valid-entries', type=int, default=None,
+                        help='Optional: When set, only CSV files with the expected number of entries '
+                             'will be collected.')
+    args = parser.parse_args(argv)
+    if args.breakdown_file is not None:
+        args.get_breakdown = True
+    else:
+        args.breakdown_file = DEFAULT_BREAKDOWN_FILE
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    container = None
+    if not args.run_locally:
+        if not args.container_name:
+            print("Error: Container name must be provided if not running locally.")
+            return 1
+        container = ContainerBuilds(args.container_name, args.builds_path, args.docker_command)
+
+    try:
+        all_dirs = container.list_build_dirs() if container else list_build_dirs(args.builds_path)
+        dirs = select_builds(all_dirs, args.from_build, args.to_build)
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}")
+        return 1
+    if not dirs:
+        print("No directories found to process.")
+        return 1
+
+    # Get and rename the breakdown file if --get-breakdown is set, in container mode it is harvested below
+    if args.get_breakdown and not container:
+        get_breakdown(args.builds_path, dirs[0], args.breakdown_file)
+
+    # Read only builds which have not been processed yet
+    manifest = MergeManifest(args.output_file)
+    new_dirs = [build_dir for build_dir in dirs if manifest.skip_message(build_dir) is None]
+    if container:
+        breakdown_path = f"{dirs[0]}/archive/{args.breakdown_file}" if args.get_breakdown else None
+        try:
+            harvested, breakdown = container.harvest_parallel(new_dirs, args.csv_file, breakdown_path,
+                                                              args.workers)
+        except (OSError, subprocess.CalledProcessError, tarfile.TarError) as e:
+            print(f"Error: Harvesting builds from container {args.container_name} failed: {e}")
+            return 1
+        if args.get_breakdown:
+            if breakdown is None:
+                print('Breakdown file not found in Docker container')
+            else:
+                with open(breakdown_file_name(dirs[0], args.breakdown_file), 'wb') as file:
+                    file.write(breakdown)
+
+    if container:
+        new_builds = [parse_build(build_dir, *harvested[build_dir], args.csv_file, args.valid_entries)
+                      for build_dir in new_dirs]
+    else:
+        new_builds = read_builds(new_dirs, lambda build_dir: read_build(
+            os.path.join(args.builds_path, build_dir), args.csv_file, args.valid_entries), args.workers)
+    new_builds = dict(zip(new_dirs, new_builds))
+    builds = [new_builds[build_dir] if build_dir in new_builds
+              else {'build': build_dir, 'message': manifest.skip_message(build_dir)}
+              for build_dir in dirs]
+
+    output_files = OutputFiles(args.output_file)
+    merge_builds(builds, output_files, manifest)
+    output_files.flush()
+    manifest.save()
+
+    print(f"CSV files merged into {args.output_file}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
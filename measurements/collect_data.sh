@@ -19,6 +19,9 @@ show_help() {
   echo ""
 }
 
+# Keep the original arguments for the Python implementation
+ORIGINAL_ARGS=("$@")
+
 # Define defaults
 BUILDS_PATH="/var/jenkins_home/jobs/thesis/builds"
 FROM_BUILD=""
@@ -82,6 +85,12 @@ while [ "$#" -gt 0 ]; do
     esac
 done
 
+# Use the Python implementation (collect_data.py) if pandas is available, which is much faster
+# for many builds and harvests containers in a single round trip. Otherwise this script is used.
+if python3 -c "import importlib.util, sys; sys.exit(importlib.util.find_spec('pandas') is None)" >/dev/null 2>&1; then
+    exec python3 "$(dirname "$0")/collect_data.py" "${ORIGINAL_ARGS[@]}"
+fi
+
 # Get directories from the path excluding the base directory
 if [[ "$RUN_LOCALLY" = true ]]; then
     dirs=($(find "$BUILDS_PATH" -maxdepth 1 -mindepth 1 -type d | sort -n))